@@ -0,0 +1,236 @@
+"""
+HTTP service for document extraction, KYC/income verification, salary analysis and RAG queries.
+
+Every handler is async; the blocking SDK, Mongo and Qdrant calls run in worker threads so one
+process serves many users concurrently, and work no longer depends on a Streamlit rerun.
+
+Run from the agents directory:
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 2
+"""
+import io
+import os
+import base64
+import asyncio
+import threading
+from typing import List, Optional
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from fin_utilities.data_extractor import extract_raw_data_batch, extract_transaction_data, read_statement_pages
+from fin_utilities.db_connection import UserDocumentDB, DocumentSnapshot
+from fin_utilities.instrumentation import span, tracing_callback_handler
+from fin_utilities.job_handlers import extraction_job, statement_job
+from fin_utilities.job_queue import get_job_queue, JobPayloadTooLarge
+from fin_utilities.prompt_registry import get_prompt_registry
+from fin_agents.data_extractor_agent import get_chat
+from fin_agents.verification_agent import verify_documents, build_agent_chain
+
+# Largest accepted document, after base64 decoding
+MAX_UPLOAD_BYTES = int(os.getenv("API_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Default engine for /verify when the request does not choose one
+VERIFICATION_ENGINE = os.getenv("VERIFICATION_ENGINE", "local")
+
+app = FastAPI(title="Quadra Agent", description="Document extraction and verification service")
+
+
+class UploadedDocument(io.BytesIO):
+    """In-memory upload exposing the `name` attribute the extraction code expects (like Streamlit's UploadedFile)"""
+
+    def __init__(self, content, name):
+        super().__init__(content)
+        self.name = name
+
+
+class DocumentPayload(BaseModel):
+    tag: str = Field(description="Document type: pan, aadhar, itr, form16 or bankstatement")
+    filename: str = Field(description="Original file name; its extension decides the MIME type")
+    content_base64: str
+
+
+class ExtractionRequest(BaseModel):
+    documents: List[DocumentPayload]
+    store: bool = Field(True, description="Save the extracted sections to the user document")
+
+
+class StatementRequest(BaseModel):
+    filename: str = "bank_statement.pdf"
+    content_base64: str
+
+
+class VerificationRequest(BaseModel):
+    engine: Optional[str] = Field(None, description="local, prefetch or agent; defaults to VERIFICATION_ENGINE")
+
+
+class JobRequest(BaseModel):
+    documents: List[DocumentPayload] = Field(description="Documents for an 'extract' job, or the one bank statement for 'ingest'/'salary'")
+    max_attempts: int = Field(5, ge=1, le=20)
+
+
+class QueryRequest(BaseModel):
+    query: str
+    top_k: int = Field(12, ge=1, le=100)
+
+
+_db = None
+_vector_store = None
+_singletons_lock = threading.Lock()
+
+
+def get_db():
+    global _db
+    with _singletons_lock:
+        if _db is None:
+            _db = UserDocumentDB(connection_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+        return _db
+
+
+def get_vector_store():
+    global _vector_store
+    with _singletons_lock:
+        if _vector_store is None:
+            from fin_utilities.setup_vectordb import QdrantVectorStore
+            _vector_store = QdrantVectorStore()
+        return _vector_store
+
+
+def _decode(filename, content_base64):
+    try:
+        content = base64.b64decode(content_base64, validate=True)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{filename}: content_base64 is not valid base64")
+    if not content:
+        raise HTTPException(status_code=400, detail=f"{filename}: the document is empty")
+    if len(content) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"{filename}: larger than {MAX_UPLOAD_BYTES} bytes")
+    return UploadedDocument(content, filename)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/users/{user_id}")
+async def get_user_documents(user_id: str):
+    """Return every stored document section of a user"""
+    user = await asyncio.to_thread(get_db().get_user, user_id, {"_id": 0})
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"No user found with ID: {user_id}")
+    return user
+
+
+@app.post("/users/{user_id}/documents")
+async def extract_documents(user_id: str, request: ExtractionRequest):
+    """
+    Extract several documents concurrently and, unless `store` is false, save the successful
+    ones as sections of the user document in one write. Answers 502 (with the extraction results
+    and `stored` false) when that write fails.
+    """
+    tags = set(get_prompt_registry().tags())
+    unknown = [document.tag for document in request.documents if document.tag not in tags]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown document tags: {', '.join(unknown)}")
+    documents = [(_decode(document.filename, document.content_base64), document.tag) for document in request.documents]
+    try:
+        results, errors = await asyncio.to_thread(extract_raw_data_batch, documents)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    body = {"results": results, "errors": {tag: str(error) for tag, error in errors.items()}, "stored": False}
+    if request.store and results:
+        if await asyncio.to_thread(get_db().upsert_sections, user_id, results) is None:
+            return JSONResponse(status_code=502, content=jsonable_encoder(body))
+        body["stored"] = True
+    return body
+
+
+def _verify(user_id, name, engine):
+    snapshot = DocumentSnapshot(get_db(), user_id).load()
+    if not snapshot.data:
+        raise HTTPException(status_code=404, detail=f"No documents stored for user: {user_id}")
+    chat = get_chat()
+    agent_chain = build_agent_chain(chat, snapshot) if engine != "local" else None
+    return verify_documents(name, snapshot, chat, agent_chain, mode=engine,
+                            callbacks=[tracing_callback_handler(user_id=user_id, flow=name)])
+
+
+@app.post("/users/{user_id}/verify/{check}")
+async def verify(user_id: str, check: str, request: Optional[VerificationRequest] = None):
+    """Run the KYC (`check`=kyc) or income (`check`=income) verification on the stored documents"""
+    names = {"kyc": "kyc_check", "income": "income_check"}
+    if check not in names:
+        raise HTTPException(status_code=404, detail=f"Unknown verification: {check}")
+    engine = (request.engine if request and request.engine else VERIFICATION_ENGINE)
+    if engine not in ("local", "prefetch", "agent"):
+        raise HTTPException(status_code=400, detail=f"Unknown verification engine: {engine}")
+    return await asyncio.to_thread(_verify, user_id, names[check], engine)
+
+
+@app.post("/users/{user_id}/salary")
+async def analyze_salary(user_id: str, request: StatementRequest):
+    """Find employer salary credits in a bank statement PDF"""
+    statement = _decode(request.filename, request.content_base64)
+    with span("api.salary", user_id=user_id):
+        page_texts = await asyncio.to_thread(read_statement_pages, statement)
+        return await asyncio.to_thread(extract_transaction_data, statement, page_texts)
+
+
+@app.post("/users/{user_id}/statements")
+async def ingest_statement(user_id: str, request: StatementRequest):
+    """Index a bank statement in the vector store for RAG queries"""
+    statement = _decode(request.filename, request.content_base64)
+    report = await asyncio.to_thread(get_vector_store().put_vector_db, user_id, statement.getvalue())
+    if report is None:
+        raise HTTPException(status_code=502, detail="Vector ingestion failed; see the service logs")
+    return report
+
+
+@app.post("/users/{user_id}/query")
+async def query_statements(user_id: str, request: QueryRequest):
+    """Retrieve the statement chunks of a user most relevant to a question"""
+    results = await asyncio.to_thread(get_vector_store().get_vector_db, user_id, request.query, request.top_k)
+    return {"results": results}
+
+
+@app.post("/users/{user_id}/jobs/{kind}", status_code=202)
+async def submit_job(user_id: str, kind: str, request: JobRequest):
+    """
+    Queue an 'extract', 'ingest' or 'salary' job for the worker pool (see worker.py) and return
+    its id. Submitting the same documents again returns the existing job. Documents larger than
+    JOB_PAYLOAD_MAX_BYTES together are refused with 413.
+    """
+    if kind not in ("extract", "ingest", "salary"):
+        raise HTTPException(status_code=404, detail=f"Unknown job kind: {kind}")
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="No documents given")
+    if kind == "extract":
+        tags = set(get_prompt_registry().tags())
+        unknown = [document.tag for document in request.documents if document.tag not in tags]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown document tags: {', '.join(unknown)}")
+        job = extraction_job(user_id, [(_decode(document.filename, document.content_base64), document.tag)
+                                       for document in request.documents])
+    elif len(request.documents) != 1:
+        raise HTTPException(status_code=400, detail=f"A '{kind}' job takes exactly one bank statement")
+    else:
+        document = request.documents[0]
+        job = statement_job(kind, user_id, _decode(document.filename, document.content_base64))
+
+    kind, payload, key = job
+    try:
+        job_id, created = await asyncio.to_thread(get_job_queue().enqueue, kind, payload, user_id, key,
+                                                  request.max_attempts)
+    except JobPayloadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return {"id": job_id, "created": created}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll the status, progress, result and error of a job"""
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job found with ID: {job_id}")
+    return jsonable_encoder(job, custom_encoder={ObjectId: str})
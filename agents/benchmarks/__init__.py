@@ -0,0 +1 @@
+## initialization of package
\ No newline at end of file
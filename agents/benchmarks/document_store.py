@@ -0,0 +1,124 @@
+"""
+Measures the parse-once document store on the bank statement flow of one user: the KYC
+extraction sends the statement's first page to Gemini, the salary analysis reads every page and
+the vector ingestion chunks every page.
+
+  reparse  the store keeps nothing, so each consumer parses the PDF itself, as before
+  shared   the statement is parsed once and every consumer reads the stored page texts
+
+Each mode runs the flow for --users users on --concurrency threads against fake Gemini, chat
+and embedding services, and reports the flow's p50/p95 latency, the PDF parses per flow and
+the CPU time spent parsing. --processes sets the worker processes for statements of at least
+--process-min-pages pages.
+
+Usage (from the agents directory):
+    python -m benchmarks.document_store
+    python -m benchmarks.document_store --months 48 --users 16 --processes 4
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+for key in ("GOOGLE_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(key, "benchmark-placeholder")
+os.environ.setdefault("QDRANT_HOST", ":memory:")
+os.environ.setdefault("QDRANT_COLLECTION_NAME", "benchmark_statements")
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("TRACE_SINKS", "")
+os.environ["EXTRACTION_CACHE_ENABLED"] = "false"
+
+from benchmarks import fakes  # noqa: E402
+from benchmarks.run import NamedBytesIO, _percentile  # noqa: E402
+from benchmarks.synthetic import statement_pages, pdf_bytes  # noqa: E402
+
+MODES = ("reparse", "shared")
+
+
+def run_mode(mode, args, store_factory):
+    from fin_utilities import data_extractor, document_store
+    from fin_utilities.instrumentation import InMemorySink, add_sink, remove_sink
+    from fin_utilities.setup_vectordb import QdrantVectorStore
+
+    # The reparse store is too small to keep anything
+    document_store._document_store = store_factory(1 if mode == "reparse" else document_store.DOCUMENT_STORE_MAX_BYTES)
+    vector_store = QdrantVectorStore()
+    vector_store.qdrant_client = fakes.SerializedClient(vector_store.qdrant_client)
+    statements = [pdf_bytes(statement_pages(months=args.months, seed=user)) for user in range(args.users)]
+
+    def flow(user):
+        statement = NamedBytesIO(statements[user], "statement.pdf")
+        data_extractor.extract_raw_data(statement, "bankstatement")
+        page_texts = data_extractor.read_statement_pages(statement)
+        data_extractor.extract_transaction_data(statement, page_texts=page_texts)
+        vector_store.put_vector_db(f"user{user}@example.com", statement.getvalue())
+
+    sink = add_sink(InMemorySink())
+    latencies = []
+
+    def timed(user):
+        started = time.perf_counter()
+        flow(user)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(timed, range(args.users)))
+    finally:
+        remove_sink(sink)
+
+    parses = [span for span in sink.spans if span["name"] == "document_store.parse"]
+    return {
+        "mode": mode,
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "parses_per_flow": round(len(parses) / args.users, 2),
+        "parse_ms_per_flow": round(sum(span["duration_ms"] for span in parses) / args.users, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--months", type=int, default=12, help="Months per synthetic bank statement")
+    parser.add_argument("--processes", type=int, default=0, help="PDF parse worker processes (0 parses in-thread)")
+    parser.add_argument("--process-min-pages", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mean Gemini/chat latency in seconds")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    fakes.patch_mongo()
+    from fin_utilities import data_extractor
+    from fin_utilities.document_store import DocumentStore
+    from fin_utilities.prompt_registry import get_prompt_registry
+
+    registry = get_prompt_registry()
+    data_extractor.genai = fakes.FakeGenAI(generate_latency=fakes.Latency(args.llm_latency),
+                                           prompts={registry.get(tag).text: tag for tag in registry.tags()})
+    data_extractor.chat_bank = fakes.fake_chat_model(["date: None\nemployer_name: None\ncredit_amount: None"],
+                                                     args.llm_latency)
+
+    def store_factory(max_bytes):
+        return DocumentStore(max_bytes=max_bytes, processes=args.processes, process_min_pages=args.process_min_pages)
+
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args, store_factory)
+        results.append(result)
+        print(f"{mode:<8} p50={result['p50_ms']:>8.1f}ms  p95={result['p95_ms']:>8.1f}ms  "
+              f"parses/flow={result['parses_per_flow']:>4}  parse={result['parse_ms_per_flow']:>7.1f}ms/flow",
+              file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
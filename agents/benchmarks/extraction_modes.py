@@ -0,0 +1,105 @@
+"""
+Compares the two ways extract_raw_data_batch talks to Gemini.
+
+  parallel  one generate_content request per document, run concurrently
+  combined  every document of the batch and its prompt packed into one request, the JSON
+            answer split back per tag (extract_raw_data_combined)
+
+Runs the KYC batch (pan, aadhar, bank statement) and the income batch (form16, itr) against the
+fake Gemini, whose latency is a per-request part plus a per-output-token part. Reports p50/p95
+batch latency, requests and prompt/output tokens per batch, and the fields of the prompts'
+examples found in the results. The extraction cache is off so every batch reaches the model.
+
+Usage (from the agents directory):
+    python -m benchmarks.extraction_modes
+    python -m benchmarks.extraction_modes --iterations 50 --llm-latency 0.8 --output-token-seconds 0.002
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+os.environ.setdefault("TRACE_SINKS", "")
+os.environ["EXTRACTION_CACHE_ENABLED"] = "false"
+
+from benchmarks import fakes  # noqa: E402
+from benchmarks.run import NamedBytesIO, _percentile  # noqa: E402
+from benchmarks.synthetic import statement_pages, pdf_bytes  # noqa: E402
+
+MODES = ("parallel", "combined")
+BATCHES = {
+    "kyc": ("pan", "aadhar", "bankstatement"),
+    "income": ("form16", "itr"),
+}
+
+
+def run_mode(mode, batch, args, statement):
+    from fin_utilities import data_extractor
+    from fin_utilities.prompt_registry import get_prompt_registry
+
+    registry = get_prompt_registry()
+    genai = fakes.FakeGenAI(generate_latency=fakes.Latency(args.llm_latency),
+                            prompts={registry.get(tag).text: tag for tag in registry.tags()},
+                            output_token_seconds=args.output_token_seconds)
+    data_extractor.genai = genai
+
+    def document(i, tag):
+        if tag == "bankstatement":
+            return NamedBytesIO(statement + b"%" + str(i).encode(), "statement.pdf")
+        return NamedBytesIO(f"synthetic {tag} image {i}".encode(), f"{tag}.png")
+
+    latencies = []
+    fields = 0
+    for i in range(args.iterations):
+        documents = [(document(i, tag), tag) for tag in BATCHES[batch]]
+        started = time.perf_counter()
+        results, errors = data_extractor.extract_raw_data_batch(documents, mode=mode)
+        latencies.append((time.perf_counter() - started) * 1000)
+        fields += sum(len(set(registry.get(tag).fields) & set(result)) for tag, result in results.items())
+
+    return {
+        "batch": batch,
+        "mode": mode,
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "requests_per_batch": round(genai.calls["generate_content"] / args.iterations, 2),
+        "prompt_tokens_per_batch": round(genai.tokens["prompt"] / args.iterations),
+        "output_tokens_per_batch": round(genai.tokens["output"] / args.iterations),
+        "fields_per_batch": round(fields / args.iterations, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--batches", nargs="+", choices=list(BATCHES), default=list(BATCHES))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.4,
+                        help="Mean per-request Gemini latency in seconds (queueing and prompt processing)")
+    parser.add_argument("--output-token-seconds", type=float, default=0.004,
+                        help="Gemini generation time per output token in seconds")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    statement = pdf_bytes(statement_pages(months=3))
+    results = []
+    for batch in args.batches:
+        for mode in args.modes:
+            result = run_mode(mode, batch, args, statement)
+            results.append(result)
+            print(f"{batch:<7} {mode:<9} p50={result['p50_ms']:>7.1f}ms  p95={result['p95_ms']:>7.1f}ms  "
+                  f"requests={result['requests_per_batch']:>4}  prompt_tokens={result['prompt_tokens_per_batch']:>5}  "
+                  f"output_tokens={result['output_tokens_per_batch']:>4}  fields={result['fields_per_batch']:>4}",
+                  file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
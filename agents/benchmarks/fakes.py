@@ -0,0 +1,236 @@
+"""
+Latency-configurable local stand-ins for the external services: Gemini (google.generativeai),
+the LangChain chat models, the embedding API and MongoDB. Qdrant needs no fake; the benchmarks
+run it in its in-memory local mode.
+"""
+import json
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import SimpleNamespace
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from fin_utilities.embeddings import LocalHashingEmbeddingProvider
+
+# Canned extraction results per document tag, shaped like the examples in data_extraction_prompts.yaml
+EXTRACTIONS = {
+    "pan": {"PAN_number": "ABCDE1234F", "Name": "RAHUL KUMAR SHARMA", "Father's_Name": "SURESH KUMAR SHARMA",
+            "DOB": "14/08/1990"},
+    "aadhar": {"Aadhar_number": "1234 5678 9012", "Name": "Rahul Kumar Sharma", "DOB": "14-08-1990", "Gender": "Male",
+               "Address": "Flat No. 12, Green Avenue Apts, MG Road, Bengaluru, Karnataka, PIN: 560001"},
+    "bankstatement": {"Account_Holder_Name": "RAHUL KUMAR SHARMA", "Bank_Name": "HDFC Bank",
+                      "Account_Number": "XXXX1234", "Statement_Period": "01-04-2023 to 31-03-2024",
+                      "Address": "Flat 12 Green Avenue Apartments, M.G. Rd, Bangalore 560001"},
+    "itr": {"PAN_number": "ABCDE1234F", "Assessment_Year": "2024-25", "Total_Income": "1200000",
+            "Tax_Paid": "125000", "Filing_Date": "31-07-2024", "Filing_Type": "Original"},
+    "form16": {"Employee_PAN": "ABCDE1234F", "Employer_PAN": "ZYXWV9876G", "Assessment_Year": "2024-25",
+               "Employee_Name": "Rahul Kumar Sharma", "Employer_Name": "ACME TECHNOLOGIES PVT LTD",
+               "Gross_Total_Income": "1200000", "Total_Tax_Deducted": "120000",
+               **{f"Summary of {kind} in Q{quarter}": value for quarter in range(1, 5)
+                  for kind, value in (("amount paid/credited", "300000"), ("tax deducted at source", "30000"))},
+               "Employment_Period": "01-04-2023 to 31-03-2024", "Employer_TAN": "BLRA12345B"},
+}
+
+
+@dataclass
+class Latency:
+    """
+    Simulated service latency: `mean` seconds, scaled by a random factor in [0.7, 1.0 + tail].
+    With probability `spike_probability` the call takes `spike_seconds` instead (a slow tail).
+    """
+    mean: float = 0.0
+    tail: float = 0.6
+    spike_probability: float = 0.0
+    spike_seconds: float = 0.0
+
+    def sleep(self):
+        if self.spike_probability and random.random() < self.spike_probability:
+            time.sleep(self.spike_seconds)
+        elif self.mean > 0:
+            time.sleep(self.mean * random.uniform(0.7, 1.0 + self.tail))
+
+
+class FakeGenAI:
+    """Stand-in for the `google.generativeai` module as used by data_extractor"""
+
+    def __init__(self, upload_latency=None, generate_latency=None, prompts=None, output_token_seconds=0.0):
+        self.upload_latency = upload_latency or Latency()
+        self.generate_latency = generate_latency or Latency()
+        # prompt text -> tag, to know which document the model is asked about
+        self.prompts = prompts or {}
+        # Generation time per output token, on top of generate_latency
+        self.output_token_seconds = output_token_seconds
+        self.calls = {"upload_file": 0, "generate_content": 0, "delete_file": 0}
+        self.tokens = {"prompt": 0, "output": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def _count_tokens(self, prompt_tokens, output_tokens):
+        with self._lock:
+            self.tokens["prompt"] += prompt_tokens
+            self.tokens["output"] += output_tokens
+
+    def configure(self, **kwargs):
+        pass
+
+    def upload_file(self, path, mime_type=None, display_name=None):
+        self._count("upload_file")
+        self.upload_latency.sleep()
+        return SimpleNamespace(name=f"files/{display_name}", mime_type=mime_type, uri="local://file")
+
+    def delete_file(self, name):
+        self._count("delete_file")
+
+    def GenerativeModel(self, model_name=None):
+        return _FakeGenerativeModel(self)
+
+
+class _FakeGenerativeModel:
+    def __init__(self, genai):
+        self.genai = genai
+
+    def generate_content(self, contents):
+        self.genai._count("generate_content")
+        self.genai.generate_latency.sleep()
+        prompt = next((part for part in contents if isinstance(part, str)), "")
+        if prompt in self.genai.prompts:
+            answer = EXTRACTIONS[self.genai.prompts[prompt]]
+        else:
+            # A combined request embeds the prompt of every document and is answered keyed by tag
+            tags = [tag for text, tag in self.genai.prompts.items() if text.strip() in prompt]
+            answer = {tag: EXTRACTIONS[tag] for tag in tags} if tags else EXTRACTIONS["pan"]
+        text = "```json\n" + json.dumps(answer) + "\n```"
+        # Gemini bills an image or a short PDF as about 258 tokens
+        prompt_tokens = sum(len(part) // 4 if isinstance(part, str) else 258 for part in contents)
+        output_tokens = len(text) // 4
+        time.sleep(output_tokens * self.genai.output_token_seconds)
+        self.genai._count_tokens(prompt_tokens, output_tokens)
+        usage = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                                total_token_count=prompt_tokens + output_tokens)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class LatencyFakeChatModel(FakeListChatModel):
+    """FakeListChatModel that also waits on `invoke`, not only when streaming, and can fail"""
+    latency: float = 0.0
+    spike_probability: float = 0.0
+    spike_seconds: float = 0.0
+    error_rate: float = 0.0
+
+    def _call(self, *args, **kwargs):
+        Latency(self.latency, spike_probability=self.spike_probability, spike_seconds=self.spike_seconds).sleep()
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("503 The model is overloaded (simulated)")
+        return super()._call(*args, **kwargs)
+
+
+def fake_chat_model(responses, latency=0.0, **behaviour):
+    """
+    A LangChain chat model that replies with `responses` in turn after about `latency` seconds.
+    `behaviour` sets spike_probability, spike_seconds and error_rate.
+    """
+    return LatencyFakeChatModel(responses=list(responses), latency=latency, **behaviour)
+
+
+def kyc_agent_responses():
+    """Scripted structured-chat agent turns: fetch each KYC document, then answer"""
+    turns = []
+    for doc_type in ("pan", "aadhar", "bankstatement"):
+        turns.append("Thought: I need the " + doc_type + " details.\nAction:\n```json\n"
+                     + json.dumps({"action": "gather_data", "action_input": {"doc_type": doc_type}}) + "\n```")
+    turns.append("Thought: I have everything.\nAction:\n```json\n"
+                 + json.dumps({"action": "Final Answer",
+                               "action_input": "Names and DOB match across documents. KYC Successful"}) + "\n```")
+    return turns
+
+
+class FakeRateLimitError(Exception):
+    """HTTP 429 shaped like the OpenAI/Anthropic SDK errors: status_code plus response headers"""
+
+    def __init__(self, retry_after):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after-ms": str(int(retry_after * 1000))})
+
+
+class ThrottlingService:
+    """
+    Provider endpoint with a server-side quota: more than `max_concurrency` calls in flight, or
+    more than `requests_per_second`, are rejected with a 429 carrying a Retry-After.
+    """
+
+    def __init__(self, max_concurrency=4, requests_per_second=None, latency=None, retry_after=0.05):
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.latency = latency or Latency()
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.started = deque()
+        self.calls = {"ok": 0, "throttled": 0}
+        self._lock = threading.Lock()
+
+    def call(self):
+        with self._lock:
+            now = time.monotonic()
+            while self.started and now - self.started[0] > 1.0:
+                self.started.popleft()
+            over_rate = self.requests_per_second and len(self.started) >= self.requests_per_second
+            if self.in_flight >= self.max_concurrency or over_rate:
+                self.calls["throttled"] += 1
+                raise FakeRateLimitError(self.retry_after)
+            self.in_flight += 1
+            self.started.append(now)
+        try:
+            self.latency.sleep()
+            return "ok"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.calls["ok"] += 1
+
+
+class LatencyEmbeddingProvider(LocalHashingEmbeddingProvider):
+    """Local hashing embedder that also waits like a network embedding API would"""
+
+    def __init__(self, dimensions=1536, latency=None):
+        super().__init__(dimensions=dimensions)
+        self.latency = latency or Latency()
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        self.latency.sleep()
+        return super().embed(texts)
+
+
+def patch_mongo():
+    """Route every pymongo.MongoClient created from now on to an in-memory mongomock client"""
+    import mongomock
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+    return mongomock
+
+
+class SerializedClient:
+    """
+    Proxy that serializes every method call on a client. Qdrant's in-memory local mode is not
+    thread-safe, while the pipeline upserts and searches from several threads.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+        return call
@@ -0,0 +1,88 @@
+"""
+Filtered-search latency benchmark for the statement collection layout.
+
+Fills a scratch collection with synthetic users and measures `user_id`-filtered search latency
+as the number of users grows, once with a plain collection (no payload index, global HNSW graph)
+and once with the tenant-optimized layout from `ensure_collection`.
+
+Usage (from the agents directory):
+    python -m benchmarks.filtered_search --users 10 100 1000 --url http://localhost:6333
+
+Without --url the in-memory local mode is used, which ignores payload indexes; point it at a
+real Qdrant server to see the effect of the layout.
+"""
+import argparse
+import statistics
+import time
+import uuid
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from fin_utilities.vector_collection import CollectionConfig, StorageProfile, ensure_collection
+
+COLLECTION_NAME = "bench_filtered_search"
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _fill(client, user_count, points_per_user, dim, rng, batch_size=500):
+    batch = []
+    for user in range(user_count):
+        vectors = rng.standard_normal((points_per_user, dim)).astype(np.float32)
+        for chunk_id, vector in enumerate(vectors):
+            batch.append(PointStruct(id=str(uuid.uuid4()), vector=vector.tolist(),
+                                     payload={"user_id": f"user{user}@example.com", "document_id": "bankstatement",
+                                              "chunk_id": chunk_id, "text": f"chunk {chunk_id}"}))
+            if len(batch) >= batch_size:
+                client.upsert(collection_name=COLLECTION_NAME, points=batch, wait=True)
+                batch = []
+    if batch:
+        client.upsert(collection_name=COLLECTION_NAME, points=batch, wait=True)
+
+
+def _measure(client, user_count, dim, queries, rng):
+    latencies = []
+    for _ in range(queries):
+        user_filter = Filter(must=[FieldCondition(
+            key="user_id", match=MatchValue(value=f"user{rng.integers(user_count)}@example.com"))])
+        query = rng.standard_normal(dim).astype(np.float32).tolist()
+        started = time.perf_counter()
+        client.search(collection_name=COLLECTION_NAME, query_vector=query, query_filter=user_filter, limit=12)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def run(user_counts, points_per_user, dim, queries, url):
+    client = QdrantClient(url=url) if url else QdrantClient(":memory:")
+    rng = np.random.default_rng(7)
+    rows = []
+    for layout in ("plain", "tenant"):
+        for user_count in user_counts:
+            if client.collection_exists(COLLECTION_NAME):
+                client.delete_collection(COLLECTION_NAME)
+            if layout == "plain":
+                client.create_collection(COLLECTION_NAME, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+            else:
+                config = CollectionConfig(storage_profile=StorageProfile("bench", dimensions=dim), shard_number=1,
+                                          indexing_threshold=1000)
+                ensure_collection(client, COLLECTION_NAME, config)
+            _fill(client, user_count, points_per_user, dim, rng)
+            latencies = _measure(client, user_count, dim, queries, rng)
+            rows.append((layout, user_count, statistics.median(latencies), _percentile(latencies, 95)))
+            print(f"{layout:>6}  users={user_count:<6} p50={rows[-1][2]:.2f}ms  p95={rows[-1][3]:.2f}ms")
+    client.delete_collection(COLLECTION_NAME)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--points-per-user", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--url", default=None, help="Qdrant server URL; in-memory local mode when omitted")
+    args = parser.parse_args()
+    run(args.users, args.points_per_user, args.dim, args.queries, args.url)
@@ -0,0 +1,126 @@
+"""
+Compares chat call latency with a single provider, routed between providers, and routed with
+hedged requests.
+
+  single   every call goes to the primary provider (the previous hard-bound chat model)
+  routed   LLMRouter picks the fastest healthy provider and fails over on errors
+  hedged   as routed, plus a duplicate request to the next provider after the primary's p95
+
+The providers are latency-configurable fake chat models: the primary is fast but has a slow
+tail and occasional server errors, the secondary is a little slower and steady. Reports
+p50/p95/p99 latency, failed calls and the model calls spent per request.
+
+Usage (from the agents directory):
+    python -m benchmarks.llm_router
+    python -m benchmarks.llm_router --requests 400 --concurrency 8 --spike-probability 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("TRACE_SINKS", "")
+
+from benchmarks import fakes  # noqa: E402
+
+MODES = ("single", "routed", "hedged")
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _providers(args):
+    calls = {"primary": 0, "secondary": 0}
+    primary = fakes.fake_chat_model(["ok"], args.primary_latency, spike_probability=args.spike_probability,
+                                    spike_seconds=args.spike_seconds, error_rate=args.error_rate)
+    secondary = fakes.fake_chat_model(["ok"], args.secondary_latency)
+
+    def counted(name, model):
+        def build():
+            from langchain_core.runnables import RunnableLambda
+
+            def invoke(messages):
+                calls[name] += 1
+                return model.invoke(messages)
+            return RunnableLambda(invoke)
+        return build
+
+    return {"primary": counted("primary", primary), "secondary": counted("secondary", secondary)}, calls
+
+
+def run_mode(mode, args):
+    from langchain_core.messages import HumanMessage
+    from fin_agents.llm_router import LLMRouter, RoutedChatModel
+    from fin_utilities.rate_limiter import AdaptiveLimiter
+
+    providers, calls = _providers(args)
+    routes = {"verification": ["primary"] if mode == "single" else ["primary", "secondary"]}
+    router = LLMRouter(providers, routes, hedge=mode == "hedged", hedge_min_delay=args.hedge_min_delay,
+                       explore_ratio=0.05 if mode != "single" else 0.0,
+                       limiters={name: AdaptiveLimiter(name, max_concurrency=args.concurrency, backoff_base_seconds=0.05)
+                                 for name in providers})
+    chat = RoutedChatModel(router=router, task="verification")
+    latencies, failures = [], 0
+
+    def request(_):
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            chat.invoke([HumanMessage(content="Verify the documents.")])
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(request, range(args.requests)))
+
+    return {
+        "mode": mode,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "failed": failures,
+        "model_calls_per_request": round(sum(calls.values()) / args.requests, 2),
+        "providers": router.report(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--primary-latency", type=float, default=0.1, help="Mean primary latency in seconds")
+    parser.add_argument("--secondary-latency", type=float, default=0.15, help="Mean secondary latency in seconds")
+    parser.add_argument("--spike-probability", type=float, default=0.02, help="Share of primary calls that stall")
+    parser.add_argument("--spike-seconds", type=float, default=2.0, help="Duration of a stalled primary call")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of primary calls that fail")
+    parser.add_argument("--hedge-min-delay", type=float, default=0.1)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Failover warnings are expected here
+    logging.getLogger("fin_agents.llm_router").setLevel(logging.ERROR)
+    logging.getLogger("fin_utilities.rate_limiter").setLevel(logging.ERROR)
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        results.append(result)
+        print(f"{mode:<8} p50={result['p50_ms']:>8.1f}ms  p95={result['p95_ms']:>8.1f}ms  "
+              f"p99={result['p99_ms']:>8.1f}ms  failed={result['failed']:>4}  "
+              f"calls/request={result['model_calls_per_request']:.2f}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
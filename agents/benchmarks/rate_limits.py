@@ -0,0 +1,97 @@
+"""
+Measures calls against a throttling provider with and without the adaptive rate limiter.
+
+  unlimited  every worker calls the provider directly and a 429 fails the call, as before
+  limited    calls go through fin_utilities.rate_limiter: AIMD concurrency, Retry-After pauses
+             and retries
+
+The provider is a fake with a server-side quota on calls in flight and requests per second.
+Reports completed and failed calls, 429s received, throughput and the limiter's final
+concurrency limit.
+
+Usage (from the agents directory):
+    python -m benchmarks.rate_limits
+    python -m benchmarks.rate_limits --calls 1000 --workers 64 --server-concurrency 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("TRACE_SINKS", "")
+
+from benchmarks import fakes  # noqa: E402
+
+MODES = ("unlimited", "limited")
+
+
+def run_mode(mode, args):
+    from fin_utilities.rate_limiter import AdaptiveLimiter
+
+    service = fakes.ThrottlingService(max_concurrency=args.server_concurrency,
+                                      requests_per_second=args.server_rps,
+                                      latency=fakes.Latency(args.latency), retry_after=args.retry_after)
+    limiter = AdaptiveLimiter("benchmark", max_concurrency=args.workers, backoff_base_seconds=0.05,
+                              max_retries=args.max_retries)
+    failed = 0
+
+    def call(_):
+        nonlocal failed
+        try:
+            if mode == "limited":
+                limiter.call(service.call)
+            else:
+                service.call()
+        except Exception:
+            failed += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(call, range(args.calls)))
+    wall = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "completed": args.calls - failed,
+        "failed": failed,
+        "throttled_responses": service.calls["throttled"],
+        "throughput_per_s": round((args.calls - failed) / wall, 1),
+        "wall_s": round(wall, 2),
+        "final_concurrency_limit": round(limiter.limit, 1) if mode == "limited" else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=32, help="Client threads issuing calls")
+    parser.add_argument("--server-concurrency", type=int, default=6, help="Provider quota on calls in flight")
+    parser.add_argument("--server-rps", type=int, default=200, help="Provider quota on requests per second")
+    parser.add_argument("--latency", type=float, default=0.03, help="Mean provider latency in seconds")
+    parser.add_argument("--retry-after", type=float, default=0.05, help="Retry-After sent with a 429")
+    parser.add_argument("--max-retries", type=int, default=8)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Retry warnings are expected here
+    logging.getLogger("fin_utilities.rate_limiter").setLevel(logging.ERROR)
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        results.append(result)
+        print(f"{mode:<10} completed={result['completed']:>5}  failed={result['failed']:>5}  "
+              f"429s={result['throttled_responses']:>5}  {result['throughput_per_s']:>7.1f} calls/s  "
+              f"wall={result['wall_s']:>6.2f}s  limit={result['final_concurrency_limit']}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
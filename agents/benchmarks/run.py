@@ -0,0 +1,240 @@
+"""
+End-to-end benchmark of the document pipeline against local stand-ins.
+
+Drives extract_raw_data / extract_raw_data_batch, put_vector_db / get_vector_db, the salary
+page analysis and the agent_chain KYC flow with synthetic documents, and reports p50/p95
+latency, throughput and peak Python memory per stage. Gemini, the chat models and the
+embedding API are replaced by latency-configurable fakes, MongoDB by mongomock and Qdrant
+runs in its in-memory local mode, so no API key or server is needed.
+
+Usage (from the agents directory, after `pip install -r benchmarks/requirements.txt`):
+    python -m benchmarks.run
+    python -m benchmarks.run --iterations 50 --concurrency 8 --llm-latency 0.8 --stages extract vector
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Placeholders so modules that read credentials at import time can load offline
+for key in ("GOOGLE_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(key, "benchmark-placeholder")
+os.environ.setdefault("QDRANT_HOST", ":memory:")
+os.environ.setdefault("QDRANT_COLLECTION_NAME", "benchmark_statements")
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+# Span log lines would dominate the output; --spans collects them in memory instead
+os.environ.setdefault("TRACE_SINKS", "")
+
+from benchmarks import fakes  # noqa: E402
+from benchmarks.synthetic import statement_pages, pdf_bytes, QUERIES  # noqa: E402
+
+STAGES = ("extract", "vector", "salary", "agent")
+
+
+class NamedBytesIO(io.BytesIO):
+    """In-memory upload with the `name` attribute Streamlit's UploadedFile provides"""
+
+    def __init__(self, content, name):
+        super().__init__(content)
+        self.name = name
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(name, operation, iterations, concurrency):
+    """
+    Runs `operation(i)` for i in range(iterations) on `concurrency` threads, then once more with
+    i = iterations under tracemalloc to record its peak memory (tracing would distort the timed runs).
+
+    Returns:
+        dict: stage name, p50/p95 latency in ms, throughput in ops/s and peak traced memory in MB.
+    """
+    latencies = []
+
+    def timed(i):
+        started = time.perf_counter()
+        operation(i)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(iterations)))
+    wall = time.perf_counter() - started
+
+    tracemalloc.start()
+    operation(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "stage": name,
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "throughput_per_s": round(iterations / wall, 2),
+        "peak_mb": round(peak / 2**20, 1),
+    }
+
+
+def extract_stages(args):
+    from fin_utilities import data_extractor
+    from fin_utilities.prompt_registry import get_prompt_registry
+
+    registry = get_prompt_registry()
+    genai = fakes.FakeGenAI(upload_latency=fakes.Latency(args.upload_latency),
+                            generate_latency=fakes.Latency(args.llm_latency),
+                            prompts={registry.get(tag).text: tag for tag in registry.tags()})
+    data_extractor.genai = genai
+    statement = pdf_bytes(statement_pages(months=3))
+
+    def document(i, tag):
+        if tag == "bankstatement":
+            return NamedBytesIO(statement + b"%" + str(i).encode(), "statement.pdf")
+        return NamedBytesIO(f"synthetic {tag} image {i}".encode(), f"{tag}.png")
+
+    yield measure("extract_raw_data (cold)",
+                  lambda i: data_extractor.extract_raw_data(document(i, "pan"), "pan"),
+                  args.iterations, args.concurrency)
+    yield measure("extract_raw_data (cached)",
+                  lambda i: data_extractor.extract_raw_data(document(0, "pan"), "pan"),
+                  args.iterations, args.concurrency)
+    offset = 2 * args.iterations + 1
+    yield measure("extract_raw_data_batch (KYC)",
+                  lambda i: data_extractor.extract_raw_data_batch(
+                      [(document(offset + i, tag), tag) for tag in ("pan", "aadhar", "bankstatement")]),
+                  args.iterations, args.concurrency)
+
+
+def vector_stages(args):
+    from fin_utilities.setup_vectordb import QdrantVectorStore
+
+    store = QdrantVectorStore()
+    store.qdrant_client = fakes.SerializedClient(store.qdrant_client)
+    store.embedding_provider = fakes.LatencyEmbeddingProvider(store.embedding_provider.dimensions,
+                                                              fakes.Latency(args.embed_latency))
+    store.embedding_model_id = store.embedding_provider.model_id
+    directory = tempfile.mkdtemp(prefix="bench_statements_")
+    paths = []
+    for i in range(args.iterations + 1):
+        path = os.path.join(directory, f"statement_{i}.pdf")
+        with open(path, "wb") as file:
+            file.write(pdf_bytes(statement_pages(months=args.months, seed=i)))
+        paths.append(path)
+
+    yield measure("put_vector_db", lambda i: store.put_vector_db(f"user{i}@example.com", paths[i]),
+                  args.iterations, args.concurrency)
+    yield measure("put_vector_db (unchanged re-upload)",
+                  lambda i: store.put_vector_db(f"user{i}@example.com", paths[i]),
+                  args.iterations, args.concurrency)
+    yield measure("get_vector_db",
+                  lambda i: store.get_vector_db(f"user{i % args.iterations}@example.com", QUERIES[i % len(QUERIES)]),
+                  args.iterations * 4, args.concurrency)
+
+
+def salary_stages(args):
+    from fin_utilities import data_extractor
+    from fin_utilities.page_analyzer import analyze_pages_ordered, build_salary_prompt
+
+    chat_bank = fakes.fake_chat_model(["date: None\nemployer_name: None\ncredit_amount: None"], args.llm_latency)
+    data_extractor.chat_bank = chat_bank
+    pages = statement_pages(months=args.months)
+    statement = NamedBytesIO(pdf_bytes(pages), "statement.pdf")
+
+    yield measure("salary pages via LLM",
+                  lambda i: analyze_pages_ordered(chat_bank, [build_salary_prompt(page) for page in pages]),
+                  args.iterations, args.concurrency)
+    yield measure("extract_transaction_data",
+                  lambda i: data_extractor.extract_transaction_data(statement),
+                  args.iterations, args.concurrency)
+
+
+def agent_stages(args):
+    from fin_agents.verification_agent import build_agent_chain
+    from fin_utilities.db_connection import UserDocumentDB, DocumentSnapshot
+    from fin_utilities.prompt_registry import get_prompt_registry
+
+    db = UserDocumentDB()
+    for i in range(args.iterations + 1):
+        db.upsert_sections(f"user{i}@example.com", {tag: fakes.EXTRACTIONS[tag] for tag in ("pan", "aadhar", "bankstatement")})
+    messages = get_prompt_registry().messages("kyc_check")
+
+    def run_kyc(i):
+        snapshot = DocumentSnapshot(db, f"user{i}@example.com").load()
+        agent = build_agent_chain(fakes.fake_chat_model(fakes.kyc_agent_responses(), args.llm_latency), snapshot)
+        response = agent(messages)
+        assert "KYC Successful" in response["output"]
+
+    yield measure("agent_chain KYC", run_kyc, args.iterations, args.concurrency)
+
+    from fin_utilities.kyc_verifier import verify_kyc, report_prompt
+    report_messages = get_prompt_registry().messages("verification_report")
+
+    def run_local_kyc(i):
+        snapshot = DocumentSnapshot(db, f"user{i}@example.com").load()
+        documents = {tag: snapshot.get(tag) for tag in ("pan", "aadhar", "bankstatement")}
+        report = verify_kyc(**documents)
+        assert report.passed, report.to_json()
+        chat = fakes.fake_chat_model([f"Final Verdict: {report.final_verdict}"], args.llm_latency)
+        chat.invoke(report_messages + [{"role": "user", "content": report_prompt(report, documents)}])
+
+    yield measure("kyc_verifier + phrased report", run_local_kyc, args.iterations, args.concurrency)
+
+
+STAGE_RUNNERS = {"extract": extract_stages, "vector": vector_stages, "salary": salary_stages, "agent": agent_stages}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--months", type=int, default=12, help="Months per synthetic bank statement")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Mean chat/generation latency in seconds")
+    parser.add_argument("--upload-latency", type=float, default=0.15, help="Mean Gemini file upload latency")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Mean embedding request latency")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--spans", action="store_true", help="Print a per-span latency breakdown at the end")
+    args = parser.parse_args(argv)
+
+    fakes.patch_mongo()
+    from fin_utilities.instrumentation import InMemorySink, add_sink
+    span_sink = add_sink(InMemorySink()) if args.spans else None
+    results = []
+    for stage in args.stages:
+        for result in STAGE_RUNNERS[stage](args):
+            results.append(result)
+            print(f"{result['stage']:<38} p50={result['p50_ms']:>9.1f}ms  p95={result['p95_ms']:>9.1f}ms  "
+                  f"{result['throughput_per_s']:>8.2f} ops/s  peak={result['peak_mb']:>6.1f}MB", file=sys.stderr)
+
+    if span_sink is not None:
+        print_span_breakdown(span_sink.spans)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+def print_span_breakdown(spans):
+    """Summarize recorded spans by name, slowest total time first"""
+    durations, errors, tokens = {}, {}, {}
+    for span in spans:
+        durations.setdefault(span["name"], []).append(span["duration_ms"])
+        errors[span["name"]] = errors.get(span["name"], 0) + (span["status"] == "error")
+        tokens[span["name"]] = tokens.get(span["name"], 0) + (span.get("input_tokens") or 0) + (span.get("output_tokens") or 0)
+    print(f"\n{'span':<28} {'count':>7} {'p50':>10} {'p95':>10} {'total':>11} {'errors':>7} {'tokens':>9}", file=sys.stderr)
+    for name, samples in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        print(f"{name:<28} {len(samples):>7} {_percentile(samples, 50):>8.1f}ms {_percentile(samples, 95):>8.1f}ms "
+              f"{sum(samples) / 1000:>10.2f}s {errors[name]:>7} {tokens[name]:>9}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
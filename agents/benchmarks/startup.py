@@ -0,0 +1,147 @@
+"""
+Measures cold start and Streamlit rerun overhead.
+
+  import    time to import each entry module in a fresh interpreter, without API keys in the
+            environment (importing must neither need them nor load the LLM SDKs)
+  app       main.py under streamlit.testing: the first script run in a fresh interpreter (cold
+            start) and the following reruns, which is what every widget interaction costs.
+            The option_menu component is stubbed; if the script still raises, the stage is
+            reported as not measured
+
+Every measurement runs in a child process so module caches never carry over. MongoDB is
+mongomock, so no server is needed.
+
+Usage (from the agents directory):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --iterations 10 --reruns 20 --stages import
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STAGES = ("import", "app")
+
+# Entry modules and the heavy SDKs that must stay unloaded after importing them
+MODULES = (
+    "fin_utilities.data_extractor",
+    "fin_agents.data_extractor_agent",
+    "fin_agents.verification_agent",
+    "api",
+)
+HEAVY_MODULES = ("google.generativeai", "langchain_google_genai", "langchain_openai", "langchain_anthropic",
+                 "langchain.agents", "pandas", "PyPDF2")
+
+IMPORT_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+APP_CHILD = """
+import json, os, sys, time, types
+os.environ.setdefault("TRACE_SINKS", "")
+from benchmarks import fakes
+fakes.patch_mongo()
+from streamlit.testing.v1 import AppTest
+
+# streamlit_option_menu is a custom component, which streamlit.testing cannot render; the stub
+# selects the default option so the whole script runs
+option_menu = types.ModuleType("streamlit_option_menu")
+option_menu.option_menu = lambda menu_title, options, default_index=0, **kwargs: options[default_index]
+sys.modules["streamlit_option_menu"] = option_menu
+
+app = AppTest.from_file("main.py", default_timeout=120)
+started = time.perf_counter()
+app.run()
+first = time.perf_counter() - started
+reruns = []
+for _ in range({reruns}):
+    started = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - started)
+print(json.dumps({{"first": first, "reruns": reruns, "exceptions": [e.message.splitlines()[0] for e in app.exception]}}))
+"""
+
+
+def _child_env():
+    env = dict(os.environ)
+    for key in ("GOOGLE_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY"):
+        env.pop(key, None)
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def _run_child(code):
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_child_env(),
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "child failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def import_stage(args):
+    for module in MODULES:
+        samples, loaded = [], []
+        for _ in range(args.iterations):
+            child = _run_child(IMPORT_CHILD.format(module=module, heavy=HEAVY_MODULES))
+            samples.append(child["seconds"])
+            loaded = child["loaded"]
+        yield {
+            "stage": f"import {module}",
+            "p50_ms": round(statistics.median(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+            "heavy_modules_loaded": loaded,
+        }
+
+
+def app_stage(args):
+    child = _run_child(APP_CHILD.format(reruns=args.reruns))
+    if child["exceptions"]:
+        # The script stopped part-way, so the timings would only cover the code before the error
+        for stage in ("main.py first run (cold)", "main.py rerun"):
+            yield {"stage": stage, "p50_ms": None, "max_ms": None, "not_measured": "; ".join(child["exceptions"])}
+        return
+    yield {"stage": "main.py first run (cold)", "p50_ms": round(child["first"] * 1000, 1),
+           "max_ms": round(child["first"] * 1000, 1)}
+    yield {"stage": "main.py rerun", "p50_ms": round(statistics.median(child["reruns"]) * 1000, 1),
+           "max_ms": round(max(child["reruns"]) * 1000, 1)}
+
+
+STAGE_RUNNERS = {"import": import_stage, "app": app_stage}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--iterations", type=int, default=5, help="Fresh interpreters per imported module")
+    parser.add_argument("--reruns", type=int, default=10, help="Script reruns after the first app run")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for stage in args.stages:
+        for result in STAGE_RUNNERS[stage](args):
+            results.append(result)
+            if result.get("not_measured"):
+                print(f"{result['stage']:<42} not measured, the script raised: {result['not_measured']}",
+                      file=sys.stderr)
+                continue
+            notes = ""
+            if result.get("heavy_modules_loaded"):
+                notes = "  loaded: " + ", ".join(result["heavy_modules_loaded"])
+            print(f"{result['stage']:<42} p50={result['p50_ms']:>9.1f}ms  max={result['max_ms']:>9.1f}ms{notes}",
+                  file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Recall-vs-memory benchmark for the Qdrant storage profiles.
+
+Embeds a synthetic statement corpus once at full 1536 dimensions and replays every profile
+offline: text-embedding-3 vectors requested with fewer `dimensions` equal the truncated and
+re-normalized full vectors, and scalar (int8) / binary quantization with oversampled rescoring
+is reproduced the way Qdrant applies it. Recall@k is measured against exact full-dimension search.
+
+Usage (from the agents directory, OPENAI_API_KEY set):
+    python -m benchmarks.storage_profiles --users 20 --save embeddings.npz
+    python -m benchmarks.storage_profiles --embeddings embeddings.npz
+"""
+import argparse
+import numpy as np
+from benchmarks.synthetic import statement_pages, statement_chunks, QUERIES
+from fin_utilities.vector_collection import STORAGE_PROFILES
+
+
+def _normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _embed(texts, batch_size=256):
+    import openai
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        response = openai.embeddings.create(input=texts[start:start + batch_size], model="text-embedding-3-small")
+        vectors.extend(item.embedding for item in response.data)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def build_corpus(users):
+    chunks, queries = [], []
+    for user in range(users):
+        pages = statement_pages(seed=user)
+        chunks.extend(statement_chunks(pages))
+    queries.extend(QUERIES)
+    queries.extend(chunk.splitlines()[0] for chunk in chunks[::max(1, len(chunks) // 50)])
+    return chunks, queries
+
+
+def _scalar_quantize(vectors, quantile=0.99):
+    low, high = np.quantile(vectors, [1 - quantile, quantile])
+    scale = (high - low) / 255
+    return np.clip(np.round((vectors - low) / scale), 0, 255).astype(np.uint8), low, scale
+
+
+def search(profile, corpus, queries, k):
+    """Top-k ids per query under a storage profile"""
+    corpus = _normalize(corpus[:, :profile.dimensions])
+    queries = _normalize(queries[:, :profile.dimensions])
+
+    if profile.quantization == "scalar":
+        codes, low, scale = _scalar_quantize(corpus)
+        approximate = queries @ (codes.astype(np.float32) * scale + low).T
+    elif profile.quantization == "binary":
+        approximate = np.sign(queries) @ np.sign(corpus).T
+    else:
+        return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+    # Oversample on the quantized scores, then rescore the candidates with the original vectors
+    candidates = np.argsort(-approximate, axis=1)[:, :int(np.ceil(k * profile.oversampling))]
+    rescored = np.einsum("qd,qcd->qc", queries, corpus[candidates])
+    order = np.argsort(-rescored, axis=1)[:, :k]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def ram_bytes_per_vector(profile):
+    if profile.quantization == "scalar":
+        return profile.dimensions
+    if profile.quantization == "binary":
+        return profile.dimensions / 8
+    return profile.dimensions * 4
+
+
+def run(corpus, queries, k):
+    truth = search(STORAGE_PROFILES["full"], corpus, queries, k)
+    print(f"{len(corpus)} chunks, {len(queries)} queries, recall@{k}")
+    print(f"{'profile':<10}{'dims':>6}{'RAM/1M vectors':>18}{'disk/1M vectors':>18}{'recall':>9}")
+    for profile in STORAGE_PROFILES.values():
+        found = search(profile, corpus, queries, k)
+        recall = np.mean([len(set(row) & set(expected)) / k for row, expected in zip(found, truth)])
+        ram = ram_bytes_per_vector(profile) * 1e6 / 2**20
+        disk = profile.dimensions * 4 * 1e6 / 2**20 if profile.on_disk_vectors else 0
+        print(f"{profile.name:<10}{profile.dimensions:>6}{ram:>15.0f} MB{disk:>15.0f} MB{recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Synthetic statements in the corpus")
+    parser.add_argument("--k", type=int, default=12)
+    parser.add_argument("--embeddings", help="Load corpus/query embeddings saved with --save instead of calling OpenAI")
+    parser.add_argument("--save", help="Save the computed embeddings to this .npz file")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        saved = np.load(args.embeddings)
+        corpus_vectors, query_vectors = saved["corpus"], saved["queries"]
+    else:
+        chunks, query_texts = build_corpus(args.users)
+        corpus_vectors, query_vectors = _embed(chunks), _embed(query_texts)
+        if args.save:
+            np.savez_compressed(args.save, corpus=corpus_vectors, queries=query_vectors)
+    run(corpus_vectors, query_vectors, args.k)
@@ -0,0 +1,118 @@
+"""Synthetic bank statements shared by the benchmarks."""
+import random
+
+EMPLOYERS = ["ACME TECHNOLOGIES PVT LTD", "GLOBEX CORPORATION", "INITECH SOFTWARE SERVICES", "UMBRELLA HEALTHCARE LTD",
+             "STARK INDUSTRIES INDIA", "WAYNE ENTERPRISES PVT LTD"]
+MERCHANTS = ["SWIGGY", "ZOMATO", "AMAZON", "FLIPKART", "BIGBASKET", "UBER", "OLA", "IRCTC", "AIRTEL", "JIO",
+             "BESCOM", "APOLLO PHARMACY", "DMART", "MYNTRA", "BOOKMYSHOW"]
+IFSC_PREFIXES = ["HDFC", "ICIC", "SBIN", "UTIB", "KKBK", "CITI"]
+
+QUERIES = [
+    "find transaction from employer with date, employer name and salary amount",
+    "salary credited by NEFT from employer",
+    "monthly salary credit RTGS",
+    "electricity bill payment",
+    "food delivery UPI payments",
+    "online shopping debit card purchase",
+]
+
+
+def _money(value):
+    whole, fraction = f"{value:.2f}".split(".")
+    return f"{int(whole):,}.{fraction}"
+
+
+def statement_pages(months=12, transactions_per_month=40, rows_per_page=30, seed=7, employer=None):
+    """
+    Generates the text of a bank statement, one string per page, in the row layout the salary
+    detector parses: date, narration, amount, balance.
+
+    Args:
+        months (int): Number of statement months, each with one salary credit.
+        transactions_per_month (int): Non-salary transactions per month.
+        rows_per_page (int): Transaction rows per page.
+        seed (int): Random seed, so runs are reproducible.
+        employer (str, optional): Employer name; picked at random when omitted.
+
+    Returns:
+        list[str]: Page texts.
+    """
+    rng = random.Random(seed)
+    employer = employer or rng.choice(EMPLOYERS)
+    salary = rng.randrange(40_000, 250_000, 500)
+    balance = rng.uniform(5_000, 50_000)
+    rows = []
+    for month in range(months):
+        month_number, year = (3 + month) % 12 + 1, 2023 + (3 + month) // 12
+        days = sorted(rng.sample(range(2, 29), min(27, transactions_per_month)) * 2)[:transactions_per_month]
+        balance += salary
+        rows.append(f"01/{month_number:02d}/{year} NEFT-{rng.choice(IFSC_PREFIXES)}0{rng.randrange(10**5, 10**6)}-"
+                    f"{employer}-SALARY {_money(salary)} {_money(balance)}")
+        for day in days:
+            amount = round(rng.uniform(50, 5_000), 2)
+            if rng.random() < 0.1:
+                balance += amount
+                narration = f"IMPS-{rng.randrange(10**11, 10**12)}-REFUND {rng.choice(MERCHANTS)}"
+            else:
+                balance -= amount
+                narration = f"UPI/{rng.randrange(10**11, 10**12)}/{rng.choice(MERCHANTS)}/PAYMENT"
+            rows.append(f"{day:02d}/{month_number:02d}/{year} {narration} {_money(amount)} {_money(balance)}")
+
+    header = "Date Narration Amount Balance"
+    return ["\n".join([header] + rows[start:start + rows_per_page]) for start in range(0, len(rows), rows_per_page)]
+
+
+def statement_chunks(pages, chunk_size=350):
+    """Split page texts into chunks of whole lines of at most `chunk_size` characters"""
+    chunks = []
+    for page in pages:
+        current = ""
+        for line in page.splitlines():
+            if current and len(current) + len(line) + 1 > chunk_size:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_bytes(pages, font_size=7, leading=9):
+    """
+    Renders page texts into a minimal text-layer PDF (Helvetica, one line per text line), so the
+    PDF loaders in the pipeline have something real to parse without extra dependencies.
+
+    Args:
+        pages (list[str]): Text of every page.
+
+    Returns:
+        bytes: The PDF file content.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        lines = [f"BT /F1 {font_size} Tf {leading} TL 36 806 Td"]
+        lines.extend(f"({_pdf_escape(line)}) '" for line in text.splitlines())
+        lines.append("ET")
+        stream = "\n".join(lines).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       b"/Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
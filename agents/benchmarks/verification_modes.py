@@ -0,0 +1,127 @@
+"""
+Compares the two ways of running the agent_chain verification conversations.
+
+  agent     the STRUCTURED_CHAT ReAct loop: reason, call gather_data once per document, re-read
+            the growing scratchpad and reason again
+  prefetch  every required section is read from the document snapshot up front and one model
+            call returns the report
+
+For each mode and conversation it reports model calls, prompt tokens (estimated as characters
+/ 4 over every prompt sent) and wall time. Chat models are latency-configurable fakes and
+MongoDB is mongomock, so no API key or server is needed.
+
+Usage (from the agents directory):
+    python -m benchmarks.verification_modes
+    python -m benchmarks.verification_modes --iterations 20 --llm-latency 0.8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+for key in ("GOOGLE_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(key, "benchmark-placeholder")
+os.environ.setdefault("TRACE_SINKS", "")
+
+from benchmarks import fakes  # noqa: E402
+
+
+def _counting_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class PromptCounter(BaseCallbackHandler):
+        """Counts chat model calls and the characters of every prompt sent"""
+
+        def __init__(self):
+            self.calls = 0
+            self.prompt_chars = 0
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            self.calls += 1
+            self.prompt_chars += sum(len(str(message.content)) for batch in messages for message in batch)
+
+    return PromptCounter()
+
+
+def _agent_responses(name):
+    if name == "kyc_check":
+        return fakes.kyc_agent_responses()
+    turns = []
+    for doc_type in ("pan", "itr", "form16"):
+        turns.append("Thought: I need the " + doc_type + " details.\nAction:\n```json\n"
+                     + json.dumps({"action": "gather_data", "action_input": {"doc_type": doc_type}}) + "\n```")
+    turns.append("Thought: I have everything.\nAction:\n```json\n"
+                 + json.dumps({"action": "Final Answer", "action_input": "PAN and names match. Verified."}) + "\n```")
+    return turns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Mean chat model latency in seconds")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    fakes.patch_mongo()
+    from langchain.agents import initialize_agent, AgentType
+    from langchain.tools.base import StructuredTool
+    from fin_agents.verification_agent import run_verification, verdict_passed, VERDICT_KINDS
+    from fin_utilities.kyc_verifier import FINAL_VERDICTS, MATCH
+    from fin_utilities.db_connection import UserDocumentDB, DocumentSnapshot
+    from fin_utilities.prompt_registry import get_prompt_registry
+
+    db = UserDocumentDB()
+    db.upsert_sections("bench@example.com", dict(fakes.EXTRACTIONS))
+    registry = get_prompt_registry()
+
+    results = []
+    for name in ("kyc_check", "income_check"):
+        for mode in ("agent", "prefetch"):
+            wall, calls, prompt_tokens = [], [], []
+            for _ in range(args.iterations):
+                snapshot = DocumentSnapshot(db, "bench@example.com").load()
+
+                def gather_data(doc_type: str) -> dict:
+                    """Return the stored extraction for a document type ('pan', 'aadhar', 'bankstatement', 'itr', 'form16')."""
+                    return snapshot.get(doc_type)
+
+                agent = initialize_agent([StructuredTool.from_function(gather_data)],
+                                         fakes.fake_chat_model(_agent_responses(name), args.llm_latency),
+                                         agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION, verbose=False)
+                llm = fakes.fake_chat_model([json.dumps({"report": "All checks passed.",
+                                                         "final_verdict": FINAL_VERDICTS[VERDICT_KINDS[name]][MATCH]})],
+                                            args.llm_latency)
+                counter = _counting_handler()
+
+                started = time.perf_counter()
+                response = run_verification(name, registry.messages(name), snapshot, llm, agent, mode=mode,
+                                            callbacks=[counter])
+                wall.append(time.perf_counter() - started)
+                assert response["mode"] == mode, response
+                assert mode == "agent" or verdict_passed(name, response), response
+                calls.append(counter.calls)
+                prompt_tokens.append(counter.prompt_chars // 4)
+
+            result = {
+                "conversation": name,
+                "mode": mode,
+                "llm_calls": statistics.mean(calls),
+                "prompt_tokens": statistics.mean(prompt_tokens),
+                "wall_ms_p50": round(statistics.median(wall) * 1000, 1),
+                "wall_ms_max": round(max(wall) * 1000, 1),
+            }
+            results.append(result)
+            print(f"{name:<14} {mode:<9} llm_calls={result['llm_calls']:>4.1f}  "
+                  f"prompt_tokens={result['prompt_tokens']:>7.0f}  wall p50={result['wall_ms_p50']:>8.1f}ms  "
+                  f"max={result['wall_ms_max']:>8.1f}ms", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
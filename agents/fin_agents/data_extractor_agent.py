@@ -1,61 +1,140 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
-import os
-from langchain_openai import ChatOpenAI
-#import logging
-from langchain_anthropic import ChatAnthropic
-from dotenv import load_dotenv
-#from langchain_openai import ChatOpenAI
-
-# Load environment variables
-try:
-    load_dotenv()
-except Exception as e:
-    print(f"Error loading .env file: {e}")
-
-# Fetch Google API key
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY :
-    raise ValueError("GOOGLE_API_KEY not found in environment variables")
-
-
-chat = ChatGoogleGenerativeAI(
-    model="models/gemini-1.5-flash-8b-latest",
-    temperature=0.2,
-    google_api_key=GOOGLE_API_KEY,
-   )
-
-
-# ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
-# if not ANTHROPIC_API_KEY:
-#     raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-
-
-# chat_bank = ChatAnthropic(
-#     model="claude-3-5-sonnet-20240620",
-#     temperature=0.7,
-#     max_tokens=2048,
-#     api_key=ANTHROPIC_API_KEY
-# )
-
-# import google.generativeai as genai
-# def list_available_models():
-#     models = genai.list_models()
-#     for model in models:
-#         print(model)
-# # Call the function
-# list_available_models()
-
-
-load_dotenv()
-# Configure Google API
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
-
-
-chat_bank = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.2,
-    openai_api_key=OPENAI_API_KEY
-)
\ No newline at end of file
+import os
+import threading
+from dotenv import load_dotenv
+#import logging
+#from langchain_openai import ChatOpenAI
+
+# Load environment variables
+try:
+    load_dotenv()
+except Exception as e:
+    print(f"Error loading .env file: {e}")
+
+# The chat clients are built on first use and shared by the whole process, so importing this
+# module does not load the LLM SDKs or require API keys.
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Task class -> providers in order of preference. The router sends each call to the fastest
+# healthy one; providers without an API key are left out. Override with LLM_ROUTES, e.g.
+# "verification=gemini,anthropic;page_analysis=openai".
+DEFAULT_ROUTES = {
+    "verification": ["gemini", "openai", "anthropic"],
+    "page_analysis": ["openai", "anthropic", "gemini"],
+}
+
+
+def build_gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="models/gemini-1.5-flash-8b-latest",
+        temperature=0.2,
+        google_api_key=os.getenv('GOOGLE_API_KEY'),
+        # Retries and backoff are done by fin_utilities.rate_limiter
+        max_retries=0,
+       )
+
+
+def build_openai():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o",
+        temperature=0.2,
+        openai_api_key=os.getenv('OPENAI_API_KEY'),
+        max_retries=0,
+    )
+
+
+def build_anthropic():
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(
+        model="claude-3-5-sonnet-20240620",
+        temperature=0.2,
+        max_tokens=2048,
+        api_key=os.getenv('ANTHROPIC_API_KEY'),
+        max_retries=0,
+    )
+
+
+# Provider name -> (API key variable, client builder)
+PROVIDERS = {
+    "gemini": ("GOOGLE_API_KEY", build_gemini),
+    "openai": ("OPENAI_API_KEY", build_openai),
+    "anthropic": ("ANTHROPIC_API_KEY", build_anthropic),
+}
+
+
+def load_routes():
+    """Task routes from LLM_ROUTES, or DEFAULT_ROUTES"""
+    routes = {task: list(names) for task, names in DEFAULT_ROUTES.items()}
+    for entry in filter(None, os.getenv("LLM_ROUTES", "").split(";")):
+        task, _, names = entry.partition("=")
+        routes[task.strip()] = [name.strip() for name in names.split(",") if name.strip()]
+    return routes
+
+
+def get_router():
+    """Returns the process-wide LLMRouter over every provider with an API key"""
+    with _clients_lock:
+        if "router" not in _clients:
+            from fin_agents.llm_router import LLMRouter
+            providers = {name: builder for name, (key, builder) in PROVIDERS.items() if os.getenv(key)}
+            _clients["router"] = LLMRouter(providers, load_routes())
+        return _clients["router"]
+
+
+def get_routed_chat(task):
+    """
+    Returns a chat model whose calls are routed between the providers of a task class.
+
+    Raises:
+        ValueError: If no provider of the task has an API key.
+    """
+    router = get_router()
+    with _clients_lock:
+        if task not in _clients:
+            if not router.routes.get(task):
+                keys = ", ".join(PROVIDERS[name][0] for name in load_routes().get(task, []) if name in PROVIDERS)
+                raise ValueError(f"No chat model available for {task}: set one of {keys or 'the provider API keys'}")
+            from fin_agents.llm_router import RoutedChatModel
+            _clients[task] = RoutedChatModel(router=router, task=task)
+        return _clients[task]
+
+
+def get_chat():
+    """
+    Returns the chat model used by the agents and for report writing (Gemini flash-8b first).
+
+    Raises:
+        ValueError: If no provider API key is set.
+    """
+    return get_routed_chat("verification")
+
+
+def get_chat_bank():
+    """
+    Returns the chat model used for bank statement page analysis (GPT-4o first).
+
+    Raises:
+        ValueError: If no provider API key is set.
+    """
+    return get_routed_chat("page_analysis")
+
+
+def __getattr__(name):
+    # Keeps `from fin_agents.data_extractor_agent import chat, chat_bank` working; the client is
+    # built at that point instead of when the module is imported.
+    if name == "chat":
+        return get_chat()
+    if name == "chat_bank":
+        return get_chat_bank()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# import google.generativeai as genai
+# def list_available_models():
+#     models = genai.list_models()
+#     for model in models:
+#         print(model)
+# # Call the function
+# list_available_models()
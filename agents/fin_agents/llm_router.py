@@ -0,0 +1,268 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from fin_utilities.instrumentation import span
+from fin_utilities.rate_limiter import get_limiter, estimate_tokens, used_tokens
+
+logger = logging.getLogger(__name__)
+
+# Calls remembered per provider for the latency percentiles and the error rate
+ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+# Samples needed before a provider's own latency is used to rank it
+ROUTER_MIN_SAMPLES = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+# Rolling error rate above which a provider is skipped for ROUTER_COOLDOWN_SECONDS
+ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
+ROUTER_COOLDOWN_SECONDS = float(os.getenv("LLM_ROUTER_COOLDOWN_SECONDS", "30"))
+# Share of calls sent to a random healthy provider so every provider keeps fresh latency samples
+ROUTER_EXPLORE_RATIO = float(os.getenv("LLM_ROUTER_EXPLORE_RATIO", "0.05"))
+# Hedging: after the primary provider's p95 latency (at least LLM_HEDGE_MIN_DELAY seconds), the
+# same request is also sent to the next provider and the first answer wins
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "yes", "on")
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+
+
+class ProviderStats:
+    """Rolling latency and error record of one provider"""
+
+    def __init__(self, window=ROUTER_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.unhealthy_until = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok, max_error_rate=ROUTER_MAX_ERROR_RATE, cooldown_seconds=ROUTER_COOLDOWN_SECONDS,
+               min_samples=ROUTER_MIN_SAMPLES):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(seconds)
+            elif len(self.outcomes) >= min_samples and self._error_rate() > max_error_rate:
+                self.unhealthy_until = time.monotonic() + cooldown_seconds
+
+    def _error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def error_rate(self):
+        with self.lock:
+            return self._error_rate()
+
+    def percentile(self, pct):
+        """Latency percentile in seconds, or None without samples"""
+        with self.lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def samples(self):
+        with self.lock:
+            return len(self.latencies)
+
+    def healthy(self):
+        return time.monotonic() >= self.unhealthy_until
+
+    def to_dict(self):
+        return {"samples": self.samples(), "p50_ms": _ms(self.percentile(50)), "p95_ms": _ms(self.percentile(95)),
+                "error_rate": round(self.error_rate(), 3), "healthy": self.healthy()}
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class LLMRouter:
+    """
+    Sends each chat call to the fastest healthy provider of its task class.
+
+    Providers are ranked by their rolling p50 latency weighted by their error rate; providers
+    without enough samples keep their configured preference order behind measured ones. A
+    provider whose rolling error rate passes `max_error_rate` is skipped for `cooldown_seconds`,
+    and so is one whose rate limiter is waiting out a Retry-After.
+    A failed call is retried on the next provider, and with hedging on, a duplicate request goes
+    to the next provider once the primary exceeded its p95 latency; the first answer is used.
+
+    Calls run on the caller's thread. Only a call that may be hedged runs on a thread of its own,
+    so the caller can return the duplicate's answer; the duplicates share a pool of `max_workers`.
+    """
+
+    def __init__(self, providers, routes, hedge=HEDGE_ENABLED, hedge_min_delay=HEDGE_MIN_DELAY_SECONDS,
+                 explore_ratio=ROUTER_EXPLORE_RATIO, min_samples=ROUTER_MIN_SAMPLES, limiters=None, max_workers=32):
+        """
+        Args:
+            providers (dict): Provider name -> chat model, or a zero-argument callable building it
+                on first use.
+            routes (dict): Task class -> provider names in order of preference.
+            hedge (bool): Send hedged duplicates of slow calls.
+            hedge_min_delay (float): Lower bound in seconds of the hedge delay.
+            explore_ratio (float): Share of calls routed to a random healthy provider.
+            min_samples (int): Samples before a provider is ranked by its own latency.
+            limiters (dict, optional): Provider name -> AdaptiveLimiter; defaults to the process-wide
+                limiter of each provider (see fin_utilities.rate_limiter.get_limiter).
+            max_workers (int): Threads for hedged duplicates.
+        """
+        self._providers = dict(providers)
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self.routes = {task: [name for name in names if name in self._providers] for task, names in routes.items()}
+        self.stats = {name: ProviderStats() for name in self._providers}
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.explore_ratio = explore_ratio
+        self.min_samples = min_samples
+        self.limiters = limiters or {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+    def model(self, name):
+        """Returns the chat model of a provider, building it on first use"""
+        with self._models_lock:
+            if name not in self._models:
+                provider = self._providers[name]
+                self._models[name] = provider() if callable(provider) and not isinstance(provider, BaseChatModel) else provider
+            return self._models[name]
+
+    def limiter(self, name):
+        return self.limiters.get(name) or get_limiter(name)
+
+    def candidates(self, task):
+        """
+        Providers of a task class in the order they should be tried.
+
+        Raises:
+            ValueError: If no provider is configured for the task.
+        """
+        names = self.routes.get(task)
+        if not names:
+            raise ValueError(f"No chat model provider configured for task: {task}")
+        healthy = [name for name in names
+                   if self.stats[name].healthy() and not self.limiter(name).paused()] or list(names)
+
+        def rank(name):
+            stats = self.stats[name]
+            if stats.samples() < self.min_samples:
+                return (1, names.index(name), 0.0)
+            return (0, stats.percentile(50) * (1 + stats.error_rate()), names.index(name))
+
+        ordered = sorted(healthy, key=rank)
+        if len(ordered) > 1 and random.random() < self.explore_ratio:
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+        return ordered + [name for name in names if name not in ordered]
+
+    def _call(self, task, name, messages, hedged, retries, kwargs):
+        model = self.model(name)
+        started = time.perf_counter()
+        try:
+            with span("llm.route", task=task, provider=name, hedged=hedged):
+                # Throttling is retried by the provider's limiter only when no other provider is left
+                response = self.limiter(name).call(lambda: model.invoke(messages, **kwargs),
+                                                   tokens=estimate_tokens(messages), max_retries=retries,
+                                                   measure=used_tokens)
+        except Exception:
+            self.stats[name].record(time.perf_counter() - started, False)
+            raise
+        self.stats[name].record(time.perf_counter() - started, True)
+        return response
+
+    @staticmethod
+    def _start(function, *args):
+        """Runs a call on a new thread right away, so no queueing delays it; returns its Future"""
+        future = Future()
+
+        def run():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+        threading.Thread(target=run, name="llm-primary", daemon=True).start()
+        return future
+
+    def _hedge_delay(self, name):
+        p95 = self.stats[name].percentile(95)
+        if p95 is None or self.stats[name].samples() < self.min_samples:
+            return None
+        return max(self.hedge_min_delay, p95)
+
+    def invoke(self, task, messages, **kwargs):
+        """
+        Runs a chat call for a task class.
+
+        Args:
+            task (str): Task class, e.g. 'verification' or 'page_analysis'.
+            messages (list[BaseMessage]): Chat messages.
+            **kwargs: Passed to the provider's `invoke` (e.g. stop).
+
+        Returns:
+            BaseMessage: The first successful response.
+
+        Raises:
+            RuntimeError: If every provider failed.
+        """
+        order = self.candidates(task)
+        errors = []
+        next_index = 0
+
+        def take():
+            nonlocal next_index
+            name = order[next_index]
+            next_index += 1
+            return name, 0 if next_index < len(order) else None
+
+        while next_index < len(order):
+            name, retries = take()
+            delay = self._hedge_delay(name) if self.hedge and next_index < len(order) else None
+            if delay is None:
+                try:
+                    return self._call(task, name, messages, False, retries, kwargs)
+                except Exception as e:
+                    logger.warning("⚠️ %s call to %s failed: %s", task, name, e)
+                    errors.append(f"{name}: {e}")
+                    continue
+
+            pending = {self._start(self._call, task, name, messages, False, retries, kwargs): name}
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                # The primary is slower than its usual p95: race it against the next provider
+                hedge_name, hedge_retries = take()
+                pending[self._executor.submit(self._call, task, hedge_name, messages, True, hedge_retries,
+                                              kwargs)] = hedge_name
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    failed = pending.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        logger.warning("⚠️ %s call to %s failed: %s", task, failed, e)
+                        errors.append(f"{failed}: {e}")
+        raise RuntimeError(f"Every chat model provider failed for {task}: " + "; ".join(errors))
+
+    def report(self):
+        """Rolling latency and error statistics per provider"""
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+class RoutedChatModel(BaseChatModel):
+    """LangChain chat model backed by an LLMRouter, usable wherever a single chat model is expected"""
+
+    router: Any
+    task: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  **kwargs: Any) -> ChatResult:
+        if stop is not None:
+            kwargs["stop"] = stop
+        message = self.router.invoke(self.task, messages, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,238 @@
+import json
+import logging
+from fin_utilities.instrumentation import span
+from fin_utilities.kyc_verifier import verify_kyc, verify_income, report_prompt, FINAL_VERDICTS, MATCH
+from fin_utilities.prompt_registry import get_prompt_registry
+
+logger = logging.getLogger(__name__)
+
+# Document sections each agent conversation needs
+REQUIRED_SECTIONS = {
+    "kyc_check": ("pan", "aadhar", "bankstatement"),
+    "income_check": ("pan", "itr", "form16"),
+}
+
+# Local comparison engine of each conversation, called with REQUIRED_SECTIONS as keyword arguments
+VERIFIERS = {
+    "kyc_check": verify_kyc,
+    "income_check": verify_income,
+}
+
+# Verdict wordings (kyc_verifier.FINAL_VERDICTS) of each conversation
+VERDICT_KINDS = {
+    "kyc_check": "kyc",
+    "income_check": "income",
+}
+
+PREFETCH_INSTRUCTIONS = """All documents have already been extracted; their details are below, so no tool calls are needed.
+
+{documents}
+
+Reply with a single JSON object and nothing else:
+{{"report": "<the full report in markdown>", "final_verdict": "<{final_verdict}>"}}"""
+
+
+def build_agent_chain(llm, snapshot, verbose=False):
+    """
+    Builds a structured-chat ReAct agent whose gather_data tool reads from a document snapshot,
+    for callers without a Streamlit session (e.g., the HTTP service).
+
+    Args:
+        llm (BaseChatModel): Chat model driving the agent.
+        snapshot (DocumentSnapshot): Document snapshot of the user being verified.
+
+    Returns:
+        AgentExecutor: The agent.
+    """
+    from langchain.agents import initialize_agent, AgentType
+    from langchain.tools.base import StructuredTool
+
+    def gather_data(doc_type: str) -> dict:
+        """
+        Returns the extracted data of one of the user's documents.
+
+        Args:
+            doc_type (str): Type of document. Valid values: 'pan', 'aadhar', 'itr', 'form16', 'bankstatement'.
+
+        Returns:
+            dict: Extracted data in JSON format, or empty dict if the document is not available.
+        """
+        return snapshot.get(doc_type) or {}
+
+    return initialize_agent([StructuredTool.from_function(gather_data)], llm,
+                            agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION, verbose=verbose)
+
+
+def prefetched_messages(messages, documents, verdicts=None):
+    """
+    Appends the prefetched documents to an agent conversation so the model can answer in one call.
+
+    Args:
+        messages (list[dict]): Conversation from the prompt registry (e.g., messages("kyc_check")).
+        documents (dict): Section name -> extracted data.
+        verdicts (Iterable[str], optional): Wordings the final verdict must be chosen from.
+
+    Returns:
+        list[dict]: A new message list.
+    """
+    if verdicts:
+        final_verdict = "exactly one of: " + " | ".join(verdicts)
+    else:
+        final_verdict = "the final verdict line"
+    content = PREFETCH_INSTRUCTIONS.format(documents=json.dumps(documents, indent=2, default=str),
+                                           final_verdict=final_verdict)
+    return list(messages) + [{"role": "user", "content": content}]
+
+
+def parse_structured_report(content):
+    """
+    Reads the {"report", "final_verdict"} object returned in prefetch mode. Replies that are not
+    valid JSON are used as the report as-is.
+
+    Returns:
+        dict: {"report": str, "final_verdict": str or None}
+    """
+    text = content.strip()
+    if text.startswith("```json"):
+        text = text[len("```json"):].strip()
+    elif text.startswith("```"):
+        text = text[len("```"):].strip()
+    if text.endswith("```"):
+        text = text[:-len("```")].strip()
+    try:
+        parsed = json.loads(text)
+        return {"report": str(parsed.get("report", "")), "final_verdict": parsed.get("final_verdict")}
+    except (json.JSONDecodeError, AttributeError):
+        return {"report": content, "final_verdict": None}
+
+
+def run_prefetched(llm, messages, documents, callbacks=None, verdicts=None):
+    """
+    Answers an agent conversation with one model call over prefetched documents.
+
+    Args:
+        llm (BaseChatModel): Chat model (e.g., chat).
+        messages (list[dict]): Agent conversation.
+        documents (dict): Section name -> extracted data; every value must be present.
+        callbacks (list, optional): LangChain callback handlers.
+        verdicts (Iterable[str], optional): Wordings the final verdict must be chosen from.
+
+    Returns:
+        dict: {"output": report text, "final_verdict": str or None}
+
+    Raises:
+        ValueError: If a document section is missing.
+    """
+    missing = [section for section, data in documents.items() if not data]
+    if missing:
+        raise ValueError(f"Sections not available for prefetch: {', '.join(missing)}")
+    response = llm.invoke(prefetched_messages(messages, documents, verdicts), config={"callbacks": callbacks or []})
+    parsed = parse_structured_report(response.content)
+    output = parsed["report"]
+    if parsed["final_verdict"] and parsed["final_verdict"] not in output:
+        output = f"{output}\n\n**Final Verdict: {parsed['final_verdict']}**"
+    return {"output": output, "final_verdict": parsed["final_verdict"]}
+
+
+def run_verification(name, messages, snapshot, llm, agent_chain, mode="prefetch", callbacks=None):
+    """
+    Runs an agent conversation either as one prefetched call or through the ReAct agent loop.
+
+    In prefetch mode every section listed in REQUIRED_SECTIONS is read from the document snapshot
+    up front. If a section is missing or the call fails, the agent loop runs instead.
+
+    Args:
+        name (str): Conversation name, a key of REQUIRED_SECTIONS.
+        messages (list[dict]): The conversation messages.
+        snapshot (DocumentSnapshot): Loaded document snapshot of the user.
+        llm (BaseChatModel): Chat model used in prefetch mode.
+        agent_chain (AgentExecutor): Agent used in 'agent' mode and as the fallback.
+        mode (str): 'prefetch' or 'agent'.
+        callbacks (list, optional): LangChain callback handlers.
+
+    Returns:
+        dict: {"output": str, "mode": the mode that produced the output,
+            "final_verdict": the verdict the model chose in prefetch mode, else None}
+    """
+    if mode == "prefetch":
+        documents = {section: snapshot.get(section) for section in REQUIRED_SECTIONS[name]}
+        try:
+            with span("verification.prefetched", flow=name, user_id=snapshot.user_id):
+                result = run_prefetched(llm, messages, documents, callbacks,
+                                        verdicts=FINAL_VERDICTS[VERDICT_KINDS[name]].values())
+            return {"output": result["output"], "mode": "prefetch", "final_verdict": result["final_verdict"]}
+        except Exception as e:
+            logger.warning("⚠️ Prefetched %s failed, falling back to the agent loop: %s", name, e)
+
+    with span("verification.agent", flow=name, user_id=snapshot.user_id):
+        response = agent_chain(messages, callbacks=callbacks or [])
+    return {"output": response["output"], "mode": "agent", "final_verdict": None}
+
+
+def verdict_passed(name, result):
+    """
+    Reads whether a run_verification result passed. Prefetch answers pass when their final_verdict
+    is the success wording of FINAL_VERDICTS; agent answers only carry the verdict in their text,
+    so a KYC report passes when it says "KYC Successful".
+
+    Returns:
+        bool or None: None when the verdict cannot be read.
+    """
+    success = FINAL_VERDICTS[VERDICT_KINDS[name]][MATCH]
+    if result["mode"] == "prefetch":
+        if not result["final_verdict"]:
+            return None
+        return str(result["final_verdict"]).strip(" *.").lower() == success.lower()
+    return success in result["output"] if name == "kyc_check" else None
+
+
+def phrase_report(llm, report, documents, callbacks=None):
+    """
+    Phrases a kyc_verifier report with the chat model in one call, falling back to a plain
+    markdown table when the call fails.
+
+    Args:
+        llm (BaseChatModel): Chat model (e.g., chat).
+        report (VerificationReport): Verdicts decided by kyc_verifier.
+        documents (dict): Extracted fields per document type.
+        callbacks (list, optional): LangChain callback handlers.
+
+    Returns:
+        str: The report in markdown.
+    """
+    messages = get_prompt_registry().messages("verification_report")
+    messages.append({"role": "user", "content": report_prompt(report, documents)})
+    try:
+        return llm.invoke(messages, config={"callbacks": callbacks or []}).content
+    except Exception as e:
+        logger.warning("⚠️ Could not phrase the %s report: %s", report.kind, e)
+        return report.to_markdown()
+
+
+def verify_documents(name, snapshot, llm, agent_chain=None, mode="local", callbacks=None):
+    """
+    Runs a KYC or income verification with the selected engine.
+
+    Args:
+        name (str): 'kyc_check' or 'income_check'.
+        snapshot (DocumentSnapshot): Loaded document snapshot of the user.
+        llm (BaseChatModel): Chat model that phrases or writes the report.
+        agent_chain (AgentExecutor, optional): Agent for the 'prefetch' fallback and 'agent' mode.
+        mode (str): 'local' (kyc_verifier decides, the model phrases), 'prefetch' or 'agent'.
+        callbacks (list, optional): LangChain callback handlers.
+
+    Returns:
+        dict: {"output": report text, "mode": engine used, "passed": bool or None when the
+            verdict is only in the text, "report": structured verdicts in 'local' mode, else None}
+    """
+    if mode == "local":
+        documents = {section: snapshot.get(section) for section in REQUIRED_SECTIONS[name]}
+        with span("verification.local", flow=name, user_id=snapshot.user_id) as current:
+            report = VERIFIERS[name](**documents)
+            current.set(verdict=report.verdict)
+        output = phrase_report(llm, report, documents, callbacks)
+        return {"output": output, "mode": "local", "passed": report.passed, "report": report.to_dict()}
+
+    result = run_verification(name, get_prompt_registry().messages(name), snapshot, llm, agent_chain, mode=mode,
+                              callbacks=callbacks)
+    return dict(result, passed=verdict_passed(name, result), report=None)
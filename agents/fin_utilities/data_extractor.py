@@ -1,141 +1,432 @@
-#from PIL import Image
-import google.generativeai as genai
-import os
-import json
-import pandas as pd
-from dotenv import load_dotenv
-import mimetypes
-import yaml
-import PyPDF2
-from langchain_community.document_loaders.pdf import PyPDFLoader
-import tempfile
-from fin_agents.data_extractor_agent import chat_bank
-from langchain.schema import SystemMessage, HumanMessage
-from fin_utilities.promptSchema import bank_system_message, bank_human
-from langchain_community.document_loaders import PyPDFLoader
-
-
-# Load environment variables
-load_dotenv()
-api_key = os.environ["GOOGLE_API_KEY"]
-
-# Initialize Google API Client
-try:
-    genai.configure(api_key=api_key)
-except Exception as e:
-    raise RuntimeError("Failed to configure Google Generative AI client. Check your API key.") from e
-
-
-
-def load_prompts(docu):
-    """
-    Loads the prompt for the given document type from a YAML file.
-
-    Args:
-        docu (str): The document type tag (e.g., 'pan', 'aadhar', etc.)
-
-    Returns:
-        str: The prompt associated with the given document type.
-    """
-    try:
-        # Get the current file's directory
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Construct the full path to the YAML file
-        yaml_path = os.path.join(current_dir, 'data_extraction_prompts.yaml')
-        
-        # Open and load the YAML file
-        with open(yaml_path, 'r') as file:
-            prompts = yaml.safe_load(file)
-            
-            # Check if the document type exists in the prompts
-            if docu not in prompts:
-                raise KeyError(f"Document type '{docu}' not found in prompts.")
-            
-            return prompts[docu]
-    except FileNotFoundError:
-        raise RuntimeError("YAML file not found. Please check the file path.")
-    except yaml.YAMLError as e:
-        raise RuntimeError(f"Error parsing YAML file: {e}") from e
-    except KeyError as e:
-        raise RuntimeError(f"Missing key in YAML file: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"Unexpected error while loading prompts: {e}") from e
-
-
-def extract_raw_data(uploaded_file, tag: str) -> dict:
-    """
-    Extracts data from an uploaded file using the Google Generative AI API.
-
-    Args:
-        uploaded_file (UploadedFile): The uploaded file object from Streamlit.
-        tag (str): The document type tag (e.g., 'pan', 'aadhar', 'itr', 'form16', and bank statement (only for bank holder name, account number and address))
-
-    Returns:
-        dict: A dictionary containing extracted document details.
-    """
-    try:
-        # Extract MIME type
-        mime_type, _ = mimetypes.guess_type(uploaded_file.name)
-        if not mime_type:
-            raise ValueError(f"Could not determine MIME type for the file: {uploaded_file.name}")
-    except Exception as e:
-        raise RuntimeError(f"Failed to determine MIME type: {e}") from e
-
-    try:
-        # Handle PDF bankstatement - extract first page only
-        if mime_type == 'application/pdf' and tag == 'bankstatement':
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            if len(pdf_reader.pages) > 0:
-                # Create a new PDF writer
-                pdf_writer = PyPDF2.PdfWriter()
-                # Add only the first page
-                pdf_writer.add_page(pdf_reader.pages[0])
-                
-                # Save the first page to a temporary file
-                with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                    pdf_writer.write(temp_file)
-                    temp_file_path = temp_file.name
-                
-                # Upload the temporary file
-                file_response = genai.upload_file(path=temp_file_path, mime_type=mime_type, display_name="bankstatement_first_page")
-                # Clean up the temporary file
-                os.unlink(temp_file_path)
-        else:
-            # For other files, process normally
-            file_response = genai.upload_file(path=uploaded_file, mime_type=mime_type, display_name="document")
-    except Exception as e:
-        raise RuntimeError(f"Failed to upload the file to Google API: {e}") from e
-
-    try:
-        # Create the prompt
-        prompt = load_prompts(tag)
-        #prompt = prompts.get(tag, '')
-        
-        # Initialize the Gemini 1.5 API model
-        model_name = "models/gemini-1.5-flash-8b"
-        model = genai.GenerativeModel(model_name=model_name)
-        response = model.generate_content([prompt, file_response])
-    except Exception as e:
-        raise RuntimeError(f"Failed to generate content using the Gemini model: {e}") from e
-
-    try:
-        # Clean the response text
-        clean_response = response.text.strip()
-        
-        # Remove backticks and "json" markers
-        if clean_response.startswith("```json"):
-            clean_response = clean_response[len("```json"):].strip()
-        if clean_response.endswith("```"):
-            clean_response = clean_response[:-len("```")].strip()
-
-        # Parse the cleaned JSON
-        extracted_data = json.loads(clean_response)
-        return extracted_data
-    except json.JSONDecodeError as e:
-        raise ValueError(f"The model did not return valid JSON. Cleaned Response: {clean_response}") from e
-    except Exception as e:
-        raise RuntimeError(f"Unexpected error while parsing the response: {e}") from e
-
-
-#---------------------------------------------------------------------------------------------------------------------------#
+#from PIL import Image
+import os
+import json
+import logging
+import threading
+from dotenv import load_dotenv
+import mimetypes
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fin_agents.data_extractor_agent import get_chat_bank
+from fin_utilities.prompt_registry import get_prompt_registry
+from fin_utilities.extraction_cache import ExtractionCache, file_content_hash, get_extraction_cache
+from fin_utilities.page_analyzer import analyze_pages_ordered, build_salary_prompt
+from fin_utilities.instrumentation import span, token_usage
+from fin_utilities.rate_limiter import get_limiter, estimate_tokens, used_tokens
+from fin_utilities.gemini_transport import GEMINI_INLINE_MAX_BYTES, document_content, gemini_part, read_content
+from fin_utilities.document_store import get_document_store
+
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# google.generativeai and the bank statement chat model are loaded on first use (see get_genai
+# and get_chat_bank); assigning these replaces them, e.g. with fakes in the benchmarks.
+genai = None
+chat_bank = None
+_genai_lock = threading.Lock()
+
+
+def get_genai():
+    """
+    Returns the google.generativeai module, configured with GOOGLE_API_KEY on first use.
+
+    Raises:
+        RuntimeError: If the API key is missing or the client cannot be configured.
+    """
+    global genai
+    with _genai_lock:
+        if genai is None:
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise RuntimeError("GOOGLE_API_KEY not found in environment variables")
+            import google.generativeai as google_genai
+
+            # Initialize Google API Client
+            try:
+                google_genai.configure(api_key=api_key)
+            except Exception as e:
+                raise RuntimeError("Failed to configure Google Generative AI client. Check your API key.") from e
+            genai = google_genai
+        return genai
+
+
+def _chat_bank():
+    return chat_bank if chat_bank is not None else get_chat_bank()
+
+
+# Upper bound on documents extracted in parallel; keeps us under the Gemini per-minute quota
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+# How extract_raw_data_batch talks to Gemini: "parallel" sends one request per document,
+# "combined" packs every document of the batch into a single request
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "parallel").lower()
+GEMINI_MODEL_NAME = "models/gemini-1.5-flash-8b"
+
+COMBINED_EXTRACTION_PROMPT = """You are given {count} documents. Each one follows its key in the request below.
+Read every document separately, following the instructions given for its key:
+
+{sections}
+
+Return strictly one valid JSON object with exactly these keys: {keys}.
+The value of each key is the JSON object its instructions ask for, read only from that document."""
+
+
+
+def load_prompts(docu):
+    """
+    Loads the prompt for the given document type from the prompt registry.
+
+    Args:
+        docu (str): The document type tag (e.g., 'pan', 'aadhar', etc.)
+
+    Returns:
+        str: The prompt associated with the given document type.
+    """
+    return get_prompt_registry().get(docu).text
+
+
+def extract_raw_data(uploaded_file, tag: str) -> dict:
+    """
+    Extracts data from an uploaded file using the Google Generative AI API.
+
+    Args:
+        uploaded_file (UploadedFile): The uploaded file object from Streamlit.
+        tag (str): The document type tag (e.g., 'pan', 'aadhar', 'itr', 'form16', and bank statement (only for bank holder name, account number and address))
+
+    Returns:
+        dict: A dictionary containing extracted document details.
+    """
+    try:
+        # Extract MIME type
+        mime_type, _ = mimetypes.guess_type(uploaded_file.name)
+        if not mime_type:
+            raise ValueError(f"Could not determine MIME type for the file: {uploaded_file.name}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to determine MIME type: {e}") from e
+
+    # Create the prompt
+    compiled_prompt = get_prompt_registry().get(tag)
+    prompt = compiled_prompt.text
+
+    # Serve re-uploads of an identical document from the extraction cache
+    cache = get_extraction_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = ExtractionCache.make_key(file_content_hash(uploaded_file), tag, compiled_prompt.version)
+        with span("extraction_cache.get", doc_type=tag) as current:
+            cached = cache.get(cache_key)
+            current.set(hit=cached is not None)
+        if cached is not None:
+            return cached
+
+    genai = get_genai()
+    limiter = get_limiter("gemini")
+    try:
+        # Bank statements are cut to their first page in memory
+        content, display_name = document_content(uploaded_file, mime_type, tag)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read the document: {e}") from e
+
+    try:
+        # Small documents are sent inline; large ones are uploaded and deleted after the call
+        with gemini_part(genai, content, mime_type, display_name, doc_type=tag, limiter=limiter) as document_part:
+            # Initialize the Gemini 1.5 API model
+            model_name = GEMINI_MODEL_NAME
+            model = genai.GenerativeModel(model_name=model_name)
+            with span("gemini.generate_content", doc_type=tag, model=model_name,
+                      transport="inline" if isinstance(document_part, dict) else "file") as current:
+                contents = [prompt, document_part]
+                response = limiter.call(lambda: model.generate_content(contents), tokens=estimate_tokens(contents),
+                                        measure=used_tokens)
+                current.set(**token_usage(response))
+    except Exception as e:
+        raise RuntimeError(f"Failed to generate content using the Gemini model: {e}") from e
+
+    extracted_data = parse_json_response(response, tag)
+
+    if cache_key is not None:
+        with span("extraction_cache.put", doc_type=tag):
+            cache.put(cache_key, extracted_data)
+    return extracted_data
+
+
+def parse_json_response(response, tag) -> dict:
+    """
+    Parses the JSON answer of a generate_content call, with or without ```json fences.
+
+    Raises:
+        ValueError: If the response is not valid JSON.
+    """
+    try:
+        # Clean the response text
+        clean_response = response.text.strip()
+        
+        # Remove backticks and "json" markers
+        if clean_response.startswith("```json"):
+            clean_response = clean_response[len("```json"):].strip()
+        if clean_response.endswith("```"):
+            clean_response = clean_response[:-len("```")].strip()
+
+        # Parse the cleaned JSON
+        with span("extract.parse_json", doc_type=tag, response_chars=len(clean_response)):
+            return json.loads(clean_response)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"The model did not return valid JSON. Cleaned Response: {clean_response}") from e
+    except Exception as e:
+        raise RuntimeError(f"Unexpected error while parsing the response: {e}") from e
+
+
+def validate_extraction(data, tag: str) -> dict:
+    """
+    Checks an extraction has the shape `extract_raw_data` returns for its tag: a JSON object
+    with every field of the prompt's example (their values may be null).
+
+    Args:
+        data: The parsed model answer for one document.
+        tag (str): The document type tag.
+
+    Returns:
+        dict: The extraction.
+
+    Raises:
+        ValueError: If the answer is not an object or misses any of the expected fields.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object for '{tag}', got {type(data).__name__}")
+    missing = [field for field in get_prompt_registry().get(tag).fields if field not in data]
+    if missing:
+        raise ValueError(f"The answer for '{tag}' misses the fields: {', '.join(missing)}")
+    return data
+
+
+def extract_raw_data_combined(documents) -> tuple:
+    """
+    Extracts data from several uploaded files with a single Gemini request.
+
+    The prompts of every document are packed into one request next to the documents, and the
+    model answers with one JSON object keyed by tag, which is split back into per-tag results.
+    Cached documents are not sent, and a document whose part of the answer is missing or
+    malformed is extracted again on its own with `extract_raw_data`.
+
+    Args:
+        documents (Iterable[tuple]): (uploaded_file, tag) pairs with distinct tags.
+
+    Returns:
+        tuple[dict, dict]: (results, errors), both keyed by tag. A tag appears in exactly one of them.
+    """
+    documents = list(documents)
+    registry = get_prompt_registry()
+    cache = get_extraction_cache()
+    results, errors = {}, {}
+    pending = []
+
+    for uploaded_file, tag in documents:
+        try:
+            try:
+                mime_type, _ = mimetypes.guess_type(uploaded_file.name)
+                if not mime_type:
+                    raise ValueError(f"Could not determine MIME type for the file: {uploaded_file.name}")
+            except Exception as e:
+                raise RuntimeError(f"Failed to determine MIME type: {e}") from e
+            compiled_prompt = registry.get(tag)
+            cache_key = None
+            if cache is not None:
+                cache_key = ExtractionCache.make_key(file_content_hash(uploaded_file), tag, compiled_prompt.version)
+                with span("extraction_cache.get", doc_type=tag) as current:
+                    cached = cache.get(cache_key)
+                    current.set(hit=cached is not None)
+                if cached is not None:
+                    results[tag] = cached
+                    continue
+            try:
+                content, display_name = document_content(uploaded_file, mime_type, tag)
+            except Exception as e:
+                raise RuntimeError(f"Failed to read the document: {e}") from e
+        except Exception as e:
+            errors[tag] = e
+            continue
+        pending.append((uploaded_file, tag, compiled_prompt, mime_type, content, display_name, cache_key))
+
+    if len(pending) < 2:
+        # Nothing to pack: a single document goes through the regular path
+        for uploaded_file, tag, *_ in pending:
+            try:
+                results[tag] = extract_raw_data(uploaded_file, tag)
+            except Exception as e:
+                errors[tag] = e
+        return results, errors
+
+    tags = [tag for _, tag, *_ in pending]
+    prompt = COMBINED_EXTRACTION_PROMPT.format(
+        count=len(pending),
+        sections="\n\n".join(f"Key '{tag}':\n{compiled_prompt.text.strip()}"
+                              for _, tag, compiled_prompt, *_ in pending),
+        keys=", ".join(f'"{tag}"' for tag in tags),
+    )
+
+    retry = list(pending)
+    try:
+        genai = get_genai()
+        limiter = get_limiter("gemini")
+        with ExitStack() as stack:
+            # The whole request shares Gemini's size cap: documents that no longer fit inline are uploaded
+            contents = [prompt]
+            inline_budget = GEMINI_INLINE_MAX_BYTES
+            for _, tag, _, mime_type, content, display_name, _ in pending:
+                inline = len(content) <= inline_budget
+                inline_budget -= len(content) if inline else 0
+                contents.append(f"Document for key '{tag}':")
+                contents.append(stack.enter_context(gemini_part(genai, content, mime_type, display_name,
+                                                                doc_type=tag, limiter=limiter, inline=inline)))
+            model = genai.GenerativeModel(model_name=GEMINI_MODEL_NAME)
+            with span("gemini.generate_content", doc_type="+".join(tags), model=GEMINI_MODEL_NAME,
+                      documents=len(pending)) as current:
+                response = limiter.call(lambda: model.generate_content(contents), tokens=estimate_tokens(contents),
+                                        measure=used_tokens)
+                current.set(**token_usage(response))
+        combined = parse_json_response(response, "+".join(tags))
+        if not isinstance(combined, dict):
+            raise ValueError(f"Expected a JSON object keyed by document, got {type(combined).__name__}")
+    except Exception as e:
+        logger.warning("⚠️ Combined extraction of %s failed, extracting one by one: %s", ", ".join(tags), e)
+    else:
+        retry = []
+        for document in pending:
+            _, tag, *_, cache_key = document
+            try:
+                results[tag] = validate_extraction(combined.get(tag), tag)
+            except ValueError as e:
+                logger.warning("⚠️ Combined extraction returned no usable answer for %s: %s", tag, e)
+                retry.append(document)
+                continue
+            if cache_key is not None:
+                with span("extraction_cache.put", doc_type=tag):
+                    cache.put(cache_key, results[tag])
+
+    if retry:
+        retried, retry_errors = extract_raw_data_batch([(uploaded_file, tag) for uploaded_file, tag, *_ in retry],
+                                                       mode="parallel")
+        results.update(retried)
+        errors.update(retry_errors)
+    return results, errors
+
+
+#---------------------------------------------------------------------------------------------------------------------------#
+
+
+def extract_raw_data_batch(documents, max_workers=None, mode=None):
+    """
+    Extracts data from several uploaded files concurrently.
+
+    In the default "parallel" mode each document goes through `extract_raw_data` on its own
+    worker thread, so the total wait is close to the slowest single document instead of the
+    sum of all of them. In "combined" mode the documents share one Gemini request
+    (see `extract_raw_data_combined`).
+
+    Args:
+        documents (Iterable[tuple]): (uploaded_file, tag) pairs, e.g. [(pan, 'pan'), (aadhar, 'aadhar')].
+        max_workers (int, optional): Maximum number of extractions in flight. Defaults to EXTRACTION_MAX_WORKERS.
+        mode (str, optional): "parallel" or "combined". Defaults to EXTRACTION_MODE.
+
+    Returns:
+        tuple[dict, dict]: (results, errors), both keyed by tag. A tag appears in exactly one of them.
+    """
+    documents = list(documents)
+    tags = [tag for _, tag in documents]
+    if len(set(tags)) != len(tags):
+        raise ValueError(f"Duplicate document tags in batch: {tags}")
+
+    mode = (mode or EXTRACTION_MODE).lower()
+    if mode not in ("parallel", "combined"):
+        raise ValueError(f"Unknown extraction mode: {mode}")
+
+    results, errors = {}, {}
+    if not documents:
+        return results, errors
+    if mode == "combined":
+        return extract_raw_data_combined(documents)
+
+    workers = max(1, min(max_workers or EXTRACTION_MAX_WORKERS, len(documents)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as executor:
+        futures = {
+            executor.submit(extract_raw_data, uploaded_file, tag): tag
+            for uploaded_file, tag in documents
+        }
+        for future in as_completed(futures):
+            tag = futures[future]
+            try:
+                results[tag] = future.result()
+            except Exception as e:
+                errors[tag] = e
+
+    return results, errors
+
+
+def read_statement_pages(uploaded_file) -> list:
+    """
+    Extracts the text of every page of a PDF bank statement. The statement is parsed once per
+    distinct content; later calls for the same upload are served by the document store.
+
+    Args:
+        uploaded_file (UploadedFile): The uploaded PDF file object from Streamlit.
+
+    Returns:
+        list[str]: Page texts in page order (empty string for pages without a text layer).
+    """
+    try:
+        return get_document_store().page_texts(read_content(uploaded_file))
+    except Exception as e:
+        raise RuntimeError(f"Failed to read the bank statement PDF: {e}") from e
+
+
+def extract_transaction_data(uploaded_file, page_texts=None, on_page_result=None) -> dict:
+    """
+    Finds employer salary credits in a bank statement.
+
+    Transaction rows are parsed and classified locally by `salary_detector`; the chat model is
+    only asked about pages where no transaction row could be parsed.
+
+    Args:
+        uploaded_file (UploadedFile): The uploaded PDF bank statement.
+        page_texts (list[str], optional): Already extracted page texts, to avoid parsing the PDF again.
+        on_page_result (callable, optional): Called with {"index", "response", "error"} for every page
+            sent to the model, as soon as it finishes. `index` is the page index in the statement.
+
+    Returns:
+        dict: {
+            "salary_credits": [{"page", "date", "employer_name", "credit_amount", "confidence"}],
+            "unclassified_pages": page indexes that needed the model,
+            "rows_parsed": number of transaction rows recognised locally,
+            "page_count": number of pages in the statement,
+            "llm_page_analysis": [{"page_number", "response", "error"}] for the unclassified pages
+        }
+    """
+    # pandas is only needed here
+    from fin_utilities.salary_detector import detect_salary_credits
+
+    if page_texts is None:
+        page_texts = read_statement_pages(uploaded_file)
+
+    with span("salary.detect", doc_type="bankstatement", pages=len(page_texts)) as current:
+        transaction_data = detect_salary_credits(page_texts)
+        current.set(rows_parsed=transaction_data["rows_parsed"],
+                    unclassified_pages=len(transaction_data["unclassified_pages"]))
+    fallback_pages = transaction_data["unclassified_pages"]
+
+    def forward(result):
+        if on_page_result is not None:
+            on_page_result(dict(result, index=fallback_pages[result["index"]]))
+
+    # The chat model is only built when some page needs it
+    llm = _chat_bank() if fallback_pages else None
+    results = analyze_pages_ordered(llm, [build_salary_prompt(page_texts[page]) for page in fallback_pages],
+                                    on_result=forward)
+
+    transaction_data["page_count"] = len(page_texts)
+    transaction_data["llm_page_analysis"] = [
+        {"page_number": page, "response": result["response"], "error": result["error"]}
+        for page, result in zip(fallback_pages, results)
+    ]
+    return transaction_data
@@ -1,109 +1,300 @@
-import pymongo
-from pymongo import MongoClient, errors
-from datetime import datetime, timezone
-
-class UserDocumentDB:
-    def __init__(self, connection_uri="mongodb://localhost:27017", 
-                 db_name="Finance_suite", collection_name="Salaried"):
-        try:
-            self.client = MongoClient(connection_uri)
-            self.db = self.client[db_name]
-            self.collection = self.db[collection_name]
-            self._create_indexes()
-            print("✅ Database connection successful.")
-        except errors.ConnectionError as e:
-            print("❌ Failed to connect to MongoDB:", e)
-
-    def _create_indexes(self):
-        """Create required indexes for fast querying"""
-        try:
-            indexes = [
-                pymongo.IndexModel([("userId", 1)], name="user_id_unique", unique=True, 
-                                   partialFilterExpression={"userId": {"$exists": True, "$ne": None}}),
-                pymongo.IndexModel([("pan.PAN_number", 1)], name="pan_number_index"),
-                pymongo.IndexModel([("aadhar.Aadhar_number", 1)], name="aadhar_number_index"),
-                pymongo.IndexModel([("form16.Employee_PAN", 1)], name="form16_pan_index"),
-                pymongo.IndexModel([("itr.PAN_number", 1)], name="itr_pan_index")
-            ]
-            self.collection.create_indexes(indexes)
-            print("✅ Indexes created successfully.")
-        except errors.OperationFailure as e:
-            print("❌ Failed to create indexes:", e)
-
-    # CRUD Operations
-    
-    def create_user(self, user_id, documents):
-        """Create a new user document"""
-        if not user_id:
-            print("❌ Error: userId cannot be null.")
-            return None
-
-        document = {
-            "userId": user_id,
-            "lastUpdated": datetime.now(timezone.utc),
-            **documents
-        }
-
-        try:
-            result = self.collection.insert_one(document)
-            print(f"✅ User {user_id} created successfully.")
-            return result.inserted_id
-        except errors.DuplicateKeyError:
-            print(f"❌ Error: User ID '{user_id}' already exists.")
-        except Exception as e:
-            print("❌ Unexpected error during insertion:", e)
-
-    def get_user(self, user_id, projection=None):
-        """Retrieve a user document"""
-        try:
-            user = self.collection.find_one({"userId": user_id}, projection)
-            if user:
-                print(f"✅ User {user_id} retrieved successfully.")
-                return user
-            else:
-                print(f"❌ No user found with ID: {user_id}")
-        except Exception as e:
-            print("❌ Unexpected error during retrieval:", e)
-
-    def update_document_section(self, user_id, section, data):
-        """Update a specific document section"""
-        try:
-            result = self.collection.update_one(
-                {"userId": user_id},
-                {"$set": {section: data}, "$currentDate": {"lastUpdated": True}}
-            )
-            if result.modified_count:
-                print(f"✅ {section} updated successfully for User {user_id}.")
-            else:
-                print(f"⚠️ No updates made for User {user_id}.")
-            return result.modified_count
-        except Exception as e:
-            print("❌ Unexpected error during update:", e)
-
-    def delete_user(self, user_id):
-        """Delete a user document"""
-        try:
-            result = self.collection.delete_one({"userId": user_id})
-            if result.deleted_count:
-                print(f"✅ User {user_id} deleted successfully.")
-            else:
-                print(f"⚠️ No user found with ID: {user_id}.")
-            return result.deleted_count
-        except Exception as e:
-            print("❌ Unexpected error during deletion:", e)
-
-    def partial_update(self, user_id, update_dict):
-        """Perform a partial update on any document fields"""
-        try:
-            result = self.collection.update_one(
-                {"userId": user_id},
-                {"$set": update_dict, "$currentDate": {"lastUpdated": True}}
-            )
-            if result.modified_count:
-                print(f"✅ Partial update successful for User {user_id}.")
-            else:
-                print(f"⚠️ No updates made for User {user_id}.")
-            return result.modified_count
-        except Exception as e:
-            print("❌ Unexpected error during partial update:", e)
-
+import os
+import logging
+import threading
+import pymongo
+from pymongo import MongoClient, errors
+from datetime import datetime, timezone
+from fin_utilities.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Connection pool size of each shared MongoClient
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+# Number of operations sent per bulk_write call by bulk_upsert_sections
+BULK_WRITE_BATCH_SIZE = int(os.getenv("MONGO_BULK_WRITE_BATCH_SIZE", "1000"))
+
+_clients = {}
+_provisioned = set()
+_clients_lock = threading.Lock()
+
+
+def get_mongo_client(connection_uri="mongodb://localhost:27017"):
+    """
+    Returns the process-wide MongoClient for a URI. MongoClient is thread-safe and pools its
+    connections, so every session, cache and worker in the process shares one pool per URI.
+
+    Args:
+        connection_uri (str): MongoDB connection string.
+
+    Returns:
+        MongoClient: The shared client.
+    """
+    with _clients_lock:
+        client = _clients.get(connection_uri)
+        if client is None:
+            client = MongoClient(connection_uri, maxPoolSize=MONGO_MAX_POOL_SIZE)
+            _clients[connection_uri] = client
+        return client
+
+
+class UserDocumentDB:
+    def __init__(self, connection_uri="mongodb://localhost:27017", 
+                 db_name="Finance_suite", collection_name="Salaried"):
+        try:
+            self.client = get_mongo_client(connection_uri)
+            self.db = self.client[db_name]
+            self.collection = self.db[collection_name]
+            # Indexes are provisioned once per collection and process, not once per session;
+            # a failed attempt is retried by the next session
+            key = (connection_uri, db_name, collection_name)
+            with _clients_lock:
+                needs_indexes = key not in _provisioned
+            if needs_indexes and self._create_indexes():
+                with _clients_lock:
+                    _provisioned.add(key)
+                logger.info("✅ Database connection successful.")
+        except errors.ConnectionFailure as e:
+            logger.error("❌ Failed to connect to MongoDB: %s", e)
+
+    def _create_indexes(self):
+        """Create required indexes for fast querying; returns whether they were created"""
+        try:
+            indexes = [
+                pymongo.IndexModel([("userId", 1)], name="user_id_unique", unique=True, 
+                                   partialFilterExpression={"userId": {"$exists": True, "$ne": None}}),
+                pymongo.IndexModel([("pan.PAN_number", 1)], name="pan_number_index"),
+                pymongo.IndexModel([("aadhar.Aadhar_number", 1)], name="aadhar_number_index"),
+                pymongo.IndexModel([("form16.Employee_PAN", 1)], name="form16_pan_index"),
+                pymongo.IndexModel([("itr.PAN_number", 1)], name="itr_pan_index")
+            ]
+            with span("mongo.create_indexes", collection=self.collection.name):
+                self.collection.create_indexes(indexes)
+            logger.info("✅ Indexes created successfully.")
+            return True
+        except errors.OperationFailure as e:
+            logger.error("❌ Failed to create indexes: %s", e)
+            return False
+
+    # CRUD Operations
+    
+    def create_user(self, user_id, documents):
+        """Create a new user document"""
+        if not user_id:
+            logger.error("❌ Error: userId cannot be null.")
+            return None
+
+        document = {
+            "userId": user_id,
+            "lastUpdated": datetime.now(timezone.utc),
+            **documents
+        }
+
+        try:
+            with span("mongo.create_user", user_id=user_id, sections=",".join(documents)):
+                result = self.collection.insert_one(document)
+            logger.info("✅ User %s created successfully.", user_id)
+            return result.inserted_id
+        except errors.DuplicateKeyError:
+            logger.error("❌ Error: User ID '%s' already exists.", user_id)
+        except Exception as e:
+            logger.error("❌ Unexpected error during insertion: %s", e)
+
+    def get_user(self, user_id, projection=None):
+        """Retrieve a user document"""
+        try:
+            with span("mongo.get_user", user_id=user_id,
+                      projection=",".join(projection) if projection else None) as current:
+                user = self.collection.find_one({"userId": user_id}, projection)
+                current.set(found=user is not None)
+            if user:
+                logger.info("✅ User %s retrieved successfully.", user_id)
+                return user
+            else:
+                logger.warning("❌ No user found with ID: %s", user_id)
+        except Exception as e:
+            logger.error("❌ Unexpected error during retrieval: %s", e)
+
+    def update_document_section(self, user_id, section, data):
+        """Update a specific document section"""
+        try:
+            with span("mongo.update_section", user_id=user_id, doc_type=section):
+                result = self.collection.update_one(
+                    {"userId": user_id},
+                    {"$set": {section: data}, "$currentDate": {"lastUpdated": True}}
+                )
+            if result.modified_count:
+                logger.info("✅ %s updated successfully for User %s.", section, user_id)
+            else:
+                logger.warning("⚠️ No updates made for User %s.", user_id)
+            return result.modified_count
+        except Exception as e:
+            logger.error("❌ Unexpected error during update: %s", e)
+
+    def get_sections(self, user_id, sections):
+        """
+        Retrieve several document sections of a user, plus `lastUpdated`, in one query.
+
+        Args:
+            user_id (str): The user's ID.
+            sections (Iterable[str]): Section names, e.g. ["pan", "aadhar", "bankstatement"].
+
+        Returns:
+            dict: Section name -> data for the sections present, plus "lastUpdated"; None if the
+                user does not exist or on error.
+        """
+        projection = {section: 1 for section in sections}
+        projection.update({"lastUpdated": 1, "_id": 0})
+        return self.get_user(user_id, projection)
+
+    def get_last_updated(self, user_id):
+        """Return the `lastUpdated` timestamp of a user document, or None if it does not exist"""
+        try:
+            with span("mongo.get_last_updated", user_id=user_id):
+                user = self.collection.find_one({"userId": user_id}, {"lastUpdated": 1, "_id": 0})
+            return user.get("lastUpdated") if user else None
+        except Exception as e:
+            logger.error("❌ Unexpected error during retrieval: %s", e)
+
+    def upsert_sections(self, user_id, sections):
+        """
+        Create or update several document sections of a user in one atomic write.
+
+        Args:
+            user_id (str): The user's ID.
+            sections (dict): Section name -> data, e.g. {"pan": {...}, "aadhar": {...}}.
+
+        Returns:
+            int: Number of user documents created or updated (1), or None on error.
+        """
+        if not user_id:
+            logger.error("❌ Error: userId cannot be null.")
+            return None
+
+        try:
+            with span("mongo.upsert_sections", user_id=user_id, sections=",".join(sections)) as current:
+                result = self.collection.update_one(
+                    {"userId": user_id},
+                    {"$set": sections, "$currentDate": {"lastUpdated": True}},
+                    upsert=True
+                )
+                current.set(created=result.upserted_id is not None)
+            if result.upserted_id is not None:
+                logger.info("✅ User %s created successfully.", user_id)
+                return 1
+            if result.modified_count:
+                logger.info("✅ %s updated successfully for User %s.", ", ".join(sections), user_id)
+            else:
+                logger.warning("⚠️ No updates made for User %s.", user_id)
+            return result.modified_count
+        except Exception as e:
+            logger.error("❌ Unexpected error during upsert: %s", e)
+
+    def bulk_upsert_sections(self, updates):
+        """
+        Create or update document sections for many users with unordered bulk writes, e.g. for
+        backfills. Writes are sent in batches of BULK_WRITE_BATCH_SIZE operations.
+
+        Args:
+            updates (dict): user_id -> {section name: data}.
+
+        Returns:
+            dict: {"matched", "modified", "upserted"} counts summed over all batches, or None on error.
+        """
+        operations = [
+            pymongo.UpdateOne(
+                {"userId": user_id},
+                {"$set": sections, "$currentDate": {"lastUpdated": True}},
+                upsert=True
+            )
+            for user_id, sections in updates.items() if user_id
+        ]
+        totals = {"matched": 0, "modified": 0, "upserted": 0}
+        try:
+            for start in range(0, len(operations), BULK_WRITE_BATCH_SIZE):
+                batch = operations[start:start + BULK_WRITE_BATCH_SIZE]
+                with span("mongo.bulk_upsert_sections", operations=len(batch)):
+                    result = self.collection.bulk_write(batch, ordered=False)
+                totals["matched"] += result.matched_count
+                totals["modified"] += result.modified_count
+                totals["upserted"] += result.upserted_count
+            logger.info("✅ Bulk upsert: %s users created, %s updated.", totals["upserted"], totals["modified"])
+            return totals
+        except errors.BulkWriteError as e:
+            logger.error("❌ Bulk upsert failed for %s operations: %s", len(e.details.get("writeErrors", [])), e)
+        except Exception as e:
+            logger.error("❌ Unexpected error during bulk upsert: %s", e)
+
+    def delete_user(self, user_id):
+        """Delete a user document"""
+        try:
+            with span("mongo.delete_user", user_id=user_id):
+                result = self.collection.delete_one({"userId": user_id})
+            if result.deleted_count:
+                logger.info("✅ User %s deleted successfully.", user_id)
+            else:
+                logger.warning("⚠️ No user found with ID: %s.", user_id)
+            return result.deleted_count
+        except Exception as e:
+            logger.error("❌ Unexpected error during deletion: %s", e)
+
+    def partial_update(self, user_id, update_dict):
+        """Perform a partial update on any document fields"""
+        try:
+            with span("mongo.partial_update", user_id=user_id, fields=",".join(update_dict)):
+                result = self.collection.update_one(
+                    {"userId": user_id},
+                    {"$set": update_dict, "$currentDate": {"lastUpdated": True}}
+                )
+            if result.modified_count:
+                logger.info("✅ Partial update successful for User %s.", user_id)
+            else:
+                logger.warning("⚠️ No updates made for User %s.", user_id)
+            return result.modified_count
+        except Exception as e:
+            logger.error("❌ Unexpected error during partial update: %s", e)
+
+
+class DocumentSnapshot:
+    """
+    In-memory copy of the document sections of one user, loaded with a single query.
+
+    Agent tools read sections from the snapshot instead of querying Mongo on every call.
+    `refresh()` costs one `lastUpdated` lookup and reloads the sections only when the user
+    document changed since the snapshot was taken.
+    """
+
+    def __init__(self, db, user_id, sections=("pan", "aadhar", "bankstatement", "itr", "form16")):
+        self.db = db
+        self.user_id = user_id
+        self.sections = tuple(sections)
+        self.data = {}
+        self.last_updated = None
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Fetch every section of the snapshot in one query"""
+        with self._lock:
+            user = self.db.get_sections(self.user_id, self.sections) or {}
+            self.last_updated = user.pop("lastUpdated", None)
+            self.data = user
+            self.loaded = True
+        return self
+
+    def refresh(self):
+        """
+        Reload the snapshot if the user document changed since it was loaded.
+
+        Returns:
+            bool: True if the sections were reloaded.
+        """
+        if self.loaded and self.db.get_last_updated(self.user_id) == self.last_updated:
+            return False
+        self.load()
+        return True
+
+    def get(self, section):
+        """Return a section from memory, loading the snapshot on first use"""
+        if not self.loaded:
+            self.load()
+        return self.data.get(section)
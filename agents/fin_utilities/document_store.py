@@ -0,0 +1,256 @@
+import io
+import os
+import time
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from cachetools import LRUCache
+from fin_utilities.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Parsed documents kept in memory, bounded by the characters of their page texts
+DOCUMENT_STORE_MAX_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_BYTES", str(128 * 1024 * 1024)))
+# PDFs with at least this many pages are split into page ranges parsed in worker processes
+DOCUMENT_PARSE_PROCESS_MIN_PAGES = int(os.getenv("DOCUMENT_PARSE_PROCESS_MIN_PAGES", "20"))
+# Worker processes for large PDFs; 0 parses everything on the calling thread
+DOCUMENT_PARSE_PROCESSES = int(os.getenv("DOCUMENT_PARSE_PROCESSES",
+                                         str(min(4, os.cpu_count() or 1) if (os.cpu_count() or 1) > 1 else 0)))
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 hex digest of document bytes, the key of the document store"""
+    return hashlib.sha256(content).hexdigest()
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    """Page texts and metadata of a PDF, parsed once per distinct content"""
+    content_hash: str
+    page_texts: tuple
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def page_count(self):
+        return len(self.page_texts)
+
+    @property
+    def size(self):
+        return sum(len(text) for text in self.page_texts)
+
+
+def extract_page_texts(content: bytes, start=0, stop=None) -> list:
+    """
+    Extracts the text of pages [start, stop) of a PDF. Runs in the parse worker processes.
+
+    Returns:
+        list[str]: Page texts in page order (empty string for pages without a text layer).
+    """
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+    return [page.extract_text() or "" for page in pdf_reader.pages[start:stop]]
+
+
+def slice_pdf(content: bytes, pages=(0,)) -> bytes:
+    """
+    Builds a PDF holding only the given pages, in memory.
+
+    Args:
+        content (bytes): The source PDF.
+        pages (Iterable[int]): Page indexes to keep; indexes past the last page are ignored.
+
+    Returns:
+        bytes: The new PDF.
+
+    Raises:
+        ValueError: If none of the pages exist.
+    """
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+    selected = [index for index in pages if index < len(pdf_reader.pages)]
+    if not selected:
+        raise ValueError("The PDF has none of the requested pages")
+    pdf_writer = PyPDF2.PdfWriter()
+    for index in selected:
+        pdf_writer.add_page(pdf_reader.pages[index])
+    output = io.BytesIO()
+    pdf_writer.write(output)
+    return output.getvalue()
+
+
+def parse_pdf(content: bytes, pool=None, workers=1, process_min_pages=DOCUMENT_PARSE_PROCESS_MIN_PAGES) -> ParsedDocument:
+    """
+    Parses a PDF into its page texts and metadata.
+
+    Args:
+        content (bytes): The PDF.
+        pool (ProcessPoolExecutor, optional): Workers for PDFs of at least `process_min_pages` pages.
+        workers (int): Number of page ranges a PDF parsed in the pool is split into.
+        process_min_pages (int): Page count from which the pool is used.
+
+    Returns:
+        ParsedDocument: The parsed document.
+    """
+    import PyPDF2
+
+    started = time.perf_counter()
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+    page_count = len(pdf_reader.pages)
+    info = pdf_reader.metadata or {}
+    if pool is not None and page_count >= process_min_pages:
+        step = -(-page_count // max(1, workers))
+        futures = [pool.submit(extract_page_texts, content, start, start + step)
+                   for start in range(0, page_count, step)]
+        page_texts = tuple(text for future in futures for text in future.result())
+        parsed_in = "process"
+    else:
+        page_texts = tuple(page.extract_text() or "" for page in pdf_reader.pages)
+        parsed_in = "thread"
+
+    metadata = {"bytes": len(content), "page_count": page_count, "parsed_in": parsed_in,
+                "parse_ms": round((time.perf_counter() - started) * 1000, 1)}
+    for key in ("Title", "Producer", "Creator"):
+        if info.get("/" + key):
+            metadata[key.lower()] = str(info["/" + key])
+    return ParsedDocument(content_hash(content), page_texts, metadata)
+
+
+class DocumentStore:
+    """
+    In-process store of parsed PDFs keyed by content hash, shared by statement ingestion,
+    salary analysis and extraction, so an upload is parsed once however many of them read it.
+    Concurrent requests for the same content wait for a single parse. Entries are evicted
+    least recently used once their page texts exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=DOCUMENT_STORE_MAX_BYTES, processes=DOCUMENT_PARSE_PROCESSES,
+                 process_min_pages=DOCUMENT_PARSE_PROCESS_MIN_PAGES):
+        self._documents = LRUCache(maxsize=max_bytes, getsizeof=lambda document: max(1, document.size))
+        # Page slices sent to Gemini, e.g. the first page of a bank statement
+        self._slices = LRUCache(maxsize=max(1, max_bytes // 4), getsizeof=len)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.processes = processes
+        self.process_min_pages = process_min_pages
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get_pool(self):
+        """Process pool for large PDFs, started on first use; None when disabled"""
+        if self.processes <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs server threads can deadlock the child
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _parse(self, content):
+        pool = self._get_pool()
+        try:
+            return parse_pdf(content, pool, self.processes, self.process_min_pages)
+        except BrokenProcessPool as e:
+            # A worker died (or could not start); parse here and start a fresh pool next time
+            logger.warning("⚠️ PDF parse pool failed, parsing in-process: %s", e)
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            return parse_pdf(content)
+
+    def _remember(self, cache, key, value):
+        try:
+            cache[key] = value
+        except ValueError:
+            # Larger than the whole store: served once, not kept
+            pass
+
+    def get(self, content: bytes) -> ParsedDocument:
+        """
+        Returns the parsed form of a PDF, parsing it only if this content was not seen before.
+
+        Args:
+            content (bytes): The PDF.
+
+        Returns:
+            ParsedDocument: Page texts and metadata.
+
+        Raises:
+            Exception: Whatever the PDF parser raised for unreadable content.
+        """
+        key = content_hash(content)
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self.hits += 1
+                return document
+            pending = self._inflight.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+
+        try:
+            with span("document_store.parse", bytes=len(content)) as current:
+                document = self._parse(content)
+                current.set(pages=document.page_count, parsed_in=document.metadata["parsed_in"])
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._remember(self._documents, key, document)
+            self._inflight.pop(key, None)
+        pending.set_result(document)
+        return document
+
+    def page_texts(self, content: bytes) -> list:
+        """Page texts of a PDF in page order (empty string for pages without a text layer)"""
+        return list(self.get(content).page_texts)
+
+    def pdf_slice(self, content: bytes, pages=(0,)) -> bytes:
+        """`slice_pdf` of the content, remembered per (content hash, pages)"""
+        key = (content_hash(content), tuple(pages))
+        with self._lock:
+            sliced = self._slices.get(key)
+        if sliced is None:
+            sliced = slice_pdf(content, pages)
+            with self._lock:
+                self._remember(self._slices, key, sliced)
+        return sliced
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "documents": len(self._documents),
+                "text_bytes": self._documents.currsize,
+            }
+
+
+_document_store = None
+_document_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Returns the process-wide document store"""
+    global _document_store
+    with _document_store_lock:
+        if _document_store is None:
+            _document_store = DocumentStore()
+        return _document_store
@@ -0,0 +1,116 @@
+import logging
+import os
+import hashlib
+import threading
+from datetime import datetime, timezone
+import pymongo
+from pymongo import errors
+from fin_utilities.db_connection import get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent chunk-text -> embedding cache, stored in a Mongo collection next to the user
+    documents. Entries are keyed by the embedding model and the SHA-256 of the text, so unchanged
+    chunks are never sent to the embedding API twice.
+    """
+
+    def __init__(self, connection_uri="mongodb://localhost:27017",
+                 db_name="Finance_suite", collection_name="EmbeddingCache",
+                 ttl_seconds=30 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.collection = None
+        try:
+            self.client = get_mongo_client(connection_uri)
+            self.collection = self.client[db_name][collection_name]
+            self.collection.create_indexes([
+                pymongo.IndexModel([("createdAt", 1)], name="created_at_ttl", expireAfterSeconds=ttl_seconds),
+            ])
+            logger.info("✅ Embedding cache connection successful.")
+        except errors.PyMongoError as e:
+            logger.error("❌ Failed to connect embedding cache to MongoDB: %s", e)
+            self.collection = None
+
+    @staticmethod
+    def make_key(model, text):
+        """Build the cache key for a chunk of text"""
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, model, texts):
+        """
+        Looks up embeddings for several texts in one round trip.
+
+        Args:
+            model (str): Embedding model identifier the vectors were produced with.
+            texts (list[str]): Chunk texts.
+
+        Returns:
+            dict: text -> embedding for every cached text.
+        """
+        keys = {self.make_key(model, text): text for text in texts}
+        found = {}
+        if self.collection is not None and keys:
+            try:
+                for entry in self.collection.find({"_id": {"$in": list(keys)}}, {"embedding": 1}):
+                    found[keys[entry["_id"]]] = entry["embedding"]
+            except errors.PyMongoError as e:
+                logger.error("❌ Embedding cache lookup failed: %s", e)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(set(texts)) - len(found)
+        return found
+
+    def put_many(self, model, texts, embeddings):
+        """Store freshly generated embeddings"""
+        if self.collection is None or not texts:
+            return
+        now = datetime.now(timezone.utc)
+        operations = [
+            pymongo.ReplaceOne(
+                {"_id": self.make_key(model, text)},
+                {"embedding": list(embedding), "createdAt": now},
+                upsert=True,
+            )
+            for text, embedding in zip(texts, embeddings)
+        ]
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except errors.PyMongoError as e:
+            logger.error("❌ Embedding cache write failed: %s", e)
+
+    def stats(self):
+        """Return hit/miss counters for this process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """
+    Returns the process-wide embedding cache, or None when disabled through
+    EMBEDDING_CACHE_ENABLED=false.
+    """
+    global _cache
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                connection_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+                ttl_seconds=int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+            )
+        return _cache
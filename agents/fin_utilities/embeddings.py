@@ -0,0 +1,155 @@
+import os
+import re
+import abc
+import zlib
+import threading
+from functools import lru_cache
+import numpy as np
+from fin_utilities.instrumentation import span
+from fin_utilities.rate_limiter import get_limiter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class EmbeddingProvider(abc.ABC):
+    """
+    Interface for turning texts into vectors. `model_id` identifies the vector space and is used
+    as part of every embedding cache key; `cacheable` tells callers whether persisting the
+    vectors is worth a round trip.
+    """
+    model_id = None
+    dimensions = None
+    cacheable = True
+
+    @abc.abstractmethod
+    def embed(self, texts):
+        """
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            list[list[float]]: One vector per text, in input order.
+        """
+
+    def count_tokens(self, text):
+        """Approximate token count used to size embedding batches"""
+        return len(text) // 4 + 1
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI API (text-embedding-3-*), with an optional reduced dimension"""
+
+    def __init__(self, model="text-embedding-3-small", dimensions=1536, api_key=None):
+        self.api_key = api_key
+        self.model = model
+        self.dimensions = dimensions
+        self.model_id = f"{model}@{dimensions}"
+        self._encoding = None
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI client, built on first use so a missing API key only fails actual embedding calls"""
+        with self._client_lock:
+            if self._client is None:
+                import openai
+                # Retries and backoff are done by the 'openai_embeddings' rate limiter
+                self._client = openai.OpenAI(api_key=self.api_key or os.getenv("OPENAI_API_KEY"), max_retries=0)
+            return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def count_tokens(self, text):
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model(self.model)
+        return len(self._encoding.encode(text))
+
+    def embed(self, texts):
+        with span("embedding.create", provider="openai", model=self.model_id, inputs=len(texts)) as current:
+            response = get_limiter("openai_embeddings").call(
+                lambda: self.client.embeddings.create(input=texts, model=self.model, dimensions=self.dimensions),
+                tokens=sum(len(text) // 4 + 1 for text in texts),
+                measure=lambda result: result.usage.prompt_tokens)
+            current.set(input_tokens=response.usage.prompt_tokens)
+        return [item.embedding for item in response.data]
+
+
+@lru_cache(maxsize=200_000)
+def _feature_hash(feature):
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+class LocalHashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Offline CPU embedder: word unigrams, word bigrams and character trigrams are hashed into a
+    fixed number of signed buckets with sublinear term-frequency weights and L2-normalized.
+    Needs no network and no model download, so it suits load tests and latency-sensitive tenants.
+    """
+    cacheable = False
+
+    def __init__(self, dimensions=1536):
+        self.dimensions = dimensions
+        self.model_id = f"local-hashing@{dimensions}"
+
+    @staticmethod
+    def _features(text):
+        words = TOKEN_PATTERN.findall(text.lower())
+        features = list(words)
+        features.extend(f"{first} {second}" for first, second in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(f"#3{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts):
+        with span("embedding.create", provider="local", model=self.model_id, inputs=len(texts)):
+            return self._embed(texts)
+
+    def _embed(self, texts):
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(_feature_hash(feature) for feature in features)
+
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        if hashes:
+            hashes = np.asarray(hashes, dtype=np.uint32)
+            columns = (hashes % self.dimensions).astype(np.int64)
+            signs = np.where((hashes >> 31) & 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors, (np.asarray(rows), columns), signs)
+
+        # Sublinear term frequency keeps repeated tokens from dominating a chunk
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+
+EMBEDDING_PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalHashingEmbeddingProvider,
+}
+
+
+def get_embedding_provider(dimensions=1536, name=None):
+    """
+    Builds the embedding provider selected by name or EMBEDDING_PROVIDER (default 'openai').
+
+    Args:
+        dimensions (int): Vector size the collection expects.
+        name (str, optional): One of EMBEDDING_PROVIDERS.
+
+    Returns:
+        EmbeddingProvider: The configured provider.
+    """
+    name = name or os.getenv("EMBEDDING_PROVIDER", "openai")
+    try:
+        provider_class = EMBEDDING_PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding provider '{name}'. Valid values: {', '.join(EMBEDDING_PROVIDERS)}")
+    return provider_class(dimensions=dimensions)
@@ -0,0 +1,143 @@
+import logging
+import os
+import hashlib
+import threading
+from datetime import datetime, timezone
+import pymongo
+from pymongo import errors
+from fin_utilities.db_connection import get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(uploaded_file) -> str:
+    """
+    Computes the SHA-256 digest of an uploaded file without moving its read position.
+
+    Args:
+        uploaded_file (UploadedFile): The uploaded file object from Streamlit (or any binary file-like object).
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    if hasattr(uploaded_file, "getvalue"):
+        return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: uploaded_file.read(1 << 20), b""):
+        digest.update(block)
+    uploaded_file.seek(position)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent cache of `extract_raw_data` results, stored in a Mongo collection next to
+    the user documents. Entries are keyed by (document tag, prompt version, file content hash)
+    and evicted by a TTL index on `createdAt` plus a cap on the number of entries.
+    """
+
+    def __init__(self, connection_uri="mongodb://localhost:27017",
+                 db_name="Finance_suite", collection_name="ExtractionCache",
+                 ttl_seconds=7 * 24 * 3600, max_entries=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.collection = None
+        try:
+            self.client = get_mongo_client(connection_uri)
+            self.collection = self.client[db_name][collection_name]
+            self._create_indexes()
+            logger.info("✅ Extraction cache connection successful.")
+        except errors.PyMongoError as e:
+            logger.error("❌ Failed to connect extraction cache to MongoDB: %s", e)
+            self.collection = None
+
+    def _create_indexes(self):
+        """Create the TTL and recency indexes used for eviction"""
+        try:
+            self.collection.create_indexes([
+                pymongo.IndexModel([("createdAt", 1)], name="created_at_ttl",
+                                   expireAfterSeconds=self.ttl_seconds),
+            ])
+        except errors.OperationFailure as e:
+            logger.error("❌ Failed to create extraction cache indexes: %s", e)
+
+    @staticmethod
+    def make_key(content_hash, tag, prompt_version):
+        """Build the cache key for a document"""
+        return f"{tag}:{prompt_version}:{content_hash}"
+
+    def get(self, key):
+        """Return the cached extraction for `key`, or None on a miss"""
+        entry = None
+        if self.collection is not None:
+            try:
+                entry = self.collection.find_one({"_id": key}, {"data": 1})
+            except errors.PyMongoError as e:
+                logger.error("❌ Extraction cache lookup failed: %s", e)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["data"]
+
+    def put(self, key, data):
+        """Store an extraction result and trim the collection to `max_entries`"""
+        if self.collection is None:
+            return
+        try:
+            self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "data": data, "createdAt": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+            self._evict_overflow()
+        except errors.PyMongoError as e:
+            logger.error("❌ Extraction cache write failed: %s", e)
+
+    def _evict_overflow(self):
+        """Drop the oldest entries once the collection grows past `max_entries`"""
+        overflow = self.collection.estimated_document_count() - self.max_entries
+        if overflow <= 0:
+            return
+        stale = self.collection.find({}, {"_id": 1}).sort("createdAt", 1).limit(overflow)
+        self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+    def stats(self):
+        """Return hit/miss counters for this process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """
+    Returns the process-wide extraction cache, or None when disabled through
+    EXTRACTION_CACHE_ENABLED=false.
+    """
+    global _cache
+    if os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache(
+                connection_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+                ttl_seconds=int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+                max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "10000")),
+            )
+        return _cache
@@ -0,0 +1,80 @@
+import io
+import os
+import logging
+from contextlib import contextmanager
+from fin_utilities.instrumentation import span
+from fin_utilities.document_store import get_document_store
+
+logger = logging.getLogger(__name__)
+
+# Documents up to this size travel inline in the generate_content request; larger ones go
+# through the Files API. Gemini caps a whole request at 20 MB and inline data is base64-encoded
+# (4/3 larger), so keep this below 15 MB.
+GEMINI_INLINE_MAX_BYTES = int(os.getenv("GEMINI_INLINE_MAX_BYTES", str(14 * 1024 * 1024)))
+
+
+def read_content(uploaded_file) -> bytes:
+    """Returns the bytes of an uploaded file without moving its read position"""
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    position = uploaded_file.tell()
+    try:
+        uploaded_file.seek(0)
+        return uploaded_file.read()
+    finally:
+        uploaded_file.seek(position)
+
+
+def document_content(uploaded_file, mime_type, tag):
+    """
+    The bytes sent to Gemini for a document: bank statements are cut to their first page (the
+    header with the holder's details, sliced once per upload by the document store), everything
+    else is sent whole.
+
+    Returns:
+        tuple[bytes, str]: (content, display name).
+    """
+    content = read_content(uploaded_file)
+    if mime_type == 'application/pdf' and tag == 'bankstatement':
+        with span("pdf.slice", doc_type=tag, input_bytes=len(content)) as current:
+            content = get_document_store().pdf_slice(content, pages=(0,))
+            current.set(output_bytes=len(content))
+        return content, "bankstatement_first_page"
+    return content, "document"
+
+
+@contextmanager
+def gemini_part(genai, content, mime_type, display_name="document", doc_type=None, limiter=None, inline=None):
+    """
+    Yields the generate_content part for a document: inline bytes up to GEMINI_INLINE_MAX_BYTES,
+    otherwise a file uploaded from memory through the Files API, deleted again on exit.
+
+    Args:
+        genai (module): The configured google.generativeai module.
+        content (bytes): Document bytes.
+        mime_type (str): MIME type of the content.
+        display_name (str): Name of the uploaded file, when uploaded.
+        doc_type (str, optional): Document tag, for tracing.
+        limiter (AdaptiveLimiter, optional): Rate limiter the upload and delete calls go through.
+        inline (bool, optional): Force inline bytes (True) or an upload (False) instead of deciding by size.
+    """
+    call = limiter.call if limiter is not None else (lambda operation: operation())
+    if inline if inline is not None else len(content) <= GEMINI_INLINE_MAX_BYTES:
+        yield {"mime_type": mime_type, "data": content}
+        return
+
+    try:
+        with span("gemini.upload_file", doc_type=doc_type, mime_type=mime_type, bytes=len(content)):
+            file_response = call(lambda: genai.upload_file(path=io.BytesIO(content), mime_type=mime_type,
+                                                           display_name=display_name))
+    except Exception as e:
+        raise RuntimeError(f"Failed to upload the file to Google API: {e}") from e
+    try:
+        yield file_response
+    finally:
+        try:
+            with span("gemini.delete_file", doc_type=doc_type):
+                call(lambda: genai.delete_file(file_response.name))
+        except Exception as e:
+            # The Files API expires uploads after 48 hours anyway
+            logger.warning("⚠️ Could not delete uploaded file %s: %s", file_response.name, e)
@@ -0,0 +1,327 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("finquagent.trace")
+
+# Histogram buckets (seconds) for the Prometheus span duration metric
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Span attributes turned into Prometheus labels; everything else stays in logs only
+METRIC_LABELS = ("doc_type", "provider", "model", "tool")
+# Numeric span attributes summed into Prometheus counters
+TOKEN_ATTRIBUTES = ("input_tokens", "output_tokens")
+
+
+class Span:
+    """A timed unit of work with attributes such as user_id, doc_type or token counts"""
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.error = None
+        self.started = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        """Add attributes once they are known (e.g., token usage from a response)"""
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            **self.attributes,
+        }
+
+
+class LogSink:
+    """Writes one log line per finished span"""
+
+    def __init__(self, log=logger):
+        self.log = log
+
+    def export(self, span):
+        level = logging.WARNING if span.status == "error" else logging.INFO
+        attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+        self.log.log(level, "span=%s status=%s duration_ms=%.1f %s%s", span.name, span.status,
+                     span.duration * 1000, attributes, f" error={span.error!r}" if span.error else "")
+
+
+class InMemorySink:
+    """Keeps finished spans in a list, for tests and benchmarks"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span.to_dict())
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class PrometheusSink:
+    """
+    Aggregates spans into Prometheus metrics: a duration histogram and an error counter per
+    span name, plus token counters, and renders them in the text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._errors = {}
+        self._tokens = {}
+        self._server = None
+
+    @staticmethod
+    def _labels(span):
+        labels = {"span": span.name}
+        labels.update({key: str(span.attributes[key]) for key in METRIC_LABELS if key in span.attributes})
+        return tuple(sorted(labels.items()))
+
+    def export(self, span):
+        labels = self._labels(span)
+        with self._lock:
+            buckets, total, count = self._histograms.get(labels, ([0] * len(DURATION_BUCKETS), 0.0, 0))
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    buckets[index] += 1
+            self._histograms[labels] = (buckets, total + span.duration, count + 1)
+            if span.status == "error":
+                self._errors[labels] = self._errors.get(labels, 0) + 1
+            for attribute in TOKEN_ATTRIBUTES:
+                if isinstance(span.attributes.get(attribute), (int, float)):
+                    key = labels + (("kind", attribute.split("_")[0]),)
+                    self._tokens[key] = self._tokens.get(key, 0) + span.attributes[attribute]
+
+    @staticmethod
+    def _format(labels, extra=()):
+        pairs = [f'{key}="{value}"' for key, value in tuple(labels) + tuple(extra)]
+        return "{" + ",".join(pairs) + "}"
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        lines = ["# HELP finquagent_span_duration_seconds Duration of instrumented pipeline stages.",
+                 "# TYPE finquagent_span_duration_seconds histogram"]
+        with self._lock:
+            for labels, (buckets, total, count) in sorted(self._histograms.items()):
+                for bound, cumulative in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f"finquagent_span_duration_seconds_bucket{self._format(labels, [('le', bound)])} "
+                                 f"{cumulative}")
+                lines.append(f"finquagent_span_duration_seconds_bucket{self._format(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"finquagent_span_duration_seconds_sum{self._format(labels)} {total}")
+                lines.append(f"finquagent_span_duration_seconds_count{self._format(labels)} {count}")
+            lines += ["# HELP finquagent_span_errors_total Failed pipeline stages.",
+                      "# TYPE finquagent_span_errors_total counter"]
+            lines += [f"finquagent_span_errors_total{self._format(labels)} {count}"
+                      for labels, count in sorted(self._errors.items())]
+            lines += ["# HELP finquagent_llm_tokens_total Tokens reported by model responses.",
+                      "# TYPE finquagent_llm_tokens_total counter"]
+            lines += [f"finquagent_llm_tokens_total{self._format(labels)} {count}"
+                      for labels, count in sorted(self._tokens.items())]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9464, host="0.0.0.0"):
+        """Expose `render()` on http://host:port/metrics from a daemon thread"""
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self._server
+
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_configured = False
+
+
+def _configure_from_env():
+    """Install the sinks listed in TRACE_SINKS (comma separated: log, prometheus, memory)"""
+    global _configured
+    with _sinks_lock:
+        if _configured:
+            return
+        _configured = True
+        for name in filter(None, (part.strip() for part in os.getenv("TRACE_SINKS", "log").split(","))):
+            if name == "log":
+                _sinks.append(LogSink())
+            elif name == "memory":
+                _sinks.append(InMemorySink())
+            elif name == "prometheus":
+                sink = PrometheusSink()
+                port = os.getenv("TRACE_PROMETHEUS_PORT")
+                if port:
+                    sink.serve(int(port))
+                _sinks.append(sink)
+            else:
+                logger.warning("Unknown trace sink '%s' in TRACE_SINKS", name)
+
+
+def add_sink(sink):
+    """Register an additional span sink (anything with an `export(span)` method)"""
+    _configure_from_env()
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def get_sinks():
+    _configure_from_env()
+    with _sinks_lock:
+        return list(_sinks)
+
+
+def get_sink(sink_type):
+    """Return the first registered sink of `sink_type`, or None"""
+    return next((sink for sink in get_sinks() if isinstance(sink, sink_type)), None)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Times the enclosed block and exports it to every sink. Exceptions are recorded on the span
+    and re-raised.
+
+    Args:
+        name (str): Stage name, e.g. 'gemini.generate_content'.
+        **attributes: Span attributes such as user_id or doc_type.
+
+    Yields:
+        Span: Call `.set(...)` on it to attach attributes discovered inside the block.
+    """
+    current = Span(name, {key: value for key, value in attributes.items() if value is not None})
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        for sink in get_sinks():
+            try:
+                sink.export(current)
+            except Exception:
+                logger.exception("Trace sink %r failed", sink)
+
+
+def traced(name, **static_attributes):
+    """Decorator form of `span`"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, **static_attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def token_usage(response):
+    """
+    Extracts token counts from a model response.
+
+    Understands Gemini `usage_metadata` (prompt/candidates token counts), LangChain message
+    `usage_metadata` (input/output tokens) and OpenAI `usage` (prompt/completion tokens).
+
+    Returns:
+        dict: {"input_tokens": int or None, "output_tokens": int or None}
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and hasattr(usage, "prompt_token_count"):
+        return {"input_tokens": usage.prompt_token_count, "output_tokens": usage.candidates_token_count}
+    if isinstance(usage, dict):
+        return {"input_tokens": usage.get("input_tokens"), "output_tokens": usage.get("output_tokens")}
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return {"input_tokens": getattr(usage, "prompt_tokens", None),
+                "output_tokens": getattr(usage, "completion_tokens", None)}
+    return {"input_tokens": None, "output_tokens": None}
+
+
+def tracing_callback_handler(**attributes):
+    """
+    Builds a LangChain callback handler that records one span per chat model call (with token
+    usage) and per tool call made by an agent.
+
+    Args:
+        **attributes: Attributes added to every span, e.g. user_id.
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TracingCallbackHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._open = {}
+
+        def _start(self, run_id, name, **extra):
+            context = span(name, **attributes, **extra)
+            self._open[run_id] = (context, context.__enter__())
+
+        def _end(self, run_id, error=None, **extra):
+            context, current = self._open.pop(run_id, (None, None))
+            if context is None:
+                return
+            current.set(**extra)
+            if error is None:
+                context.__exit__(None, None, None)
+            else:
+                context.__exit__(type(error), error, error.__traceback__)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(run_id, "agent.llm", model=(serialized or {}).get("name"))
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage = {}
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    if message is not None:
+                        usage = token_usage(message)
+            self._end(run_id, **usage)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error=error)
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            self._start(run_id, "agent.tool", tool=(serialized or {}).get("name"), tool_input=input_str)
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error=error)
+
+    return TracingCallbackHandler()
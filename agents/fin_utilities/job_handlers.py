@@ -0,0 +1,101 @@
+import os
+import io
+from fin_utilities.extraction_cache import file_content_hash
+from fin_utilities.job_queue import make_idempotency_key
+
+
+class JobDocument(io.BytesIO):
+    """Document stored in a job payload, exposing the `name` attribute the extraction code expects"""
+
+    def __init__(self, content, name):
+        super().__init__(bytes(content))
+        self.name = name
+
+
+def document_payload(uploaded_file, tag=None):
+    """Serialize an uploaded file (Streamlit UploadedFile or any named binary file object) for a job"""
+    content = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+    payload = {"filename": uploaded_file.name, "content": content, "hash": file_content_hash(uploaded_file)}
+    if tag is not None:
+        payload["tag"] = tag
+    return payload
+
+
+def extraction_job(user_id, documents):
+    """
+    Builds an 'extract' job: the documents are extracted and saved as sections of the user document.
+
+    Args:
+        user_id (str): Owner of the documents.
+        documents (Iterable[tuple]): (uploaded_file, tag) pairs.
+
+    Returns:
+        tuple[str, dict, str]: (kind, payload, idempotency key) for JobQueue.enqueue.
+    """
+    from fin_utilities.prompt_registry import get_prompt_registry
+    registry = get_prompt_registry()
+    entries = [document_payload(uploaded_file, tag) for uploaded_file, tag in documents]
+    key = make_idempotency_key("extract", user_id, *(f"{entry['tag']}:{entry['hash']}" for entry in entries),
+                               version=registry.version)
+    return "extract", {"user_id": user_id, "documents": entries}, key
+
+
+def statement_job(kind, user_id, uploaded_file):
+    """Builds an 'ingest' or 'salary' job for a bank statement PDF"""
+    entry = document_payload(uploaded_file)
+    return kind, {"user_id": user_id, "statement": entry}, make_idempotency_key(kind, user_id, entry["hash"])
+
+
+def handle_extract(payload, progress):
+    from fin_utilities.data_extractor import extract_raw_data_batch
+    from fin_utilities.db_connection import UserDocumentDB
+
+    documents = [(JobDocument(entry["content"], entry["filename"]), entry["tag"]) for entry in payload["documents"]]
+    progress(0, len(documents), "extracting")
+    results, errors = extract_raw_data_batch(documents)
+    if results:
+        stored = UserDocumentDB(connection_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017")).upsert_sections(
+            payload["user_id"], results)
+        if stored is None:
+            raise RuntimeError("Saving the extracted sections failed")
+    progress(len(results), len(documents), "saved")
+    if errors:
+        # Retried as a whole; documents that succeeded are served from the extraction cache next time
+        raise RuntimeError("; ".join(f"{tag}: {error}" for tag, error in errors.items()))
+    return {"sections": sorted(results)}
+
+
+def handle_ingest(payload, progress):
+    from fin_utilities.setup_vectordb import QdrantVectorStore
+
+    progress(0, None, "indexing")
+    report = QdrantVectorStore().put_vector_db(payload["user_id"], bytes(payload["statement"]["content"]))
+    if report is None:
+        raise RuntimeError("Vector ingestion failed")
+    return report
+
+
+def handle_salary(payload, progress):
+    from fin_utilities.data_extractor import extract_transaction_data, read_statement_pages
+
+    statement = JobDocument(payload["statement"]["content"], payload["statement"]["filename"])
+    page_texts = read_statement_pages(statement)
+    finished = []
+
+    def on_page_result(result):
+        finished.append(result["index"])
+        progress(len(finished), len(page_texts), f"analyzed page {result['index'] + 1}")
+
+    progress(0, len(page_texts), "classifying transactions")
+    report = extract_transaction_data(statement, page_texts=page_texts, on_page_result=on_page_result)
+    # Pages classified without the model never call on_page_result
+    progress(len(page_texts), len(page_texts), "analyzed")
+    return report
+
+
+# Job kind -> handler(payload, progress) returning a BSON-serializable result
+JOB_HANDLERS = {
+    "extract": handle_extract,
+    "ingest": handle_ingest,
+    "salary": handle_salary,
+}
@@ -0,0 +1,231 @@
+import os
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone, timedelta
+import pymongo
+from pymongo import errors, ReturnDocument
+import bson
+from bson import ObjectId
+from fin_utilities.db_connection import get_mongo_client
+from fin_utilities.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Largest BSON-encoded job payload; a job is one Mongo document, which is capped at 16 MB
+JOB_PAYLOAD_MAX_BYTES = int(os.getenv("JOB_PAYLOAD_MAX_BYTES", str(15 * 1024 * 1024)))
+
+
+class JobPayloadTooLarge(ValueError):
+    """The job payload would not fit in a Mongo document"""
+
+
+def make_idempotency_key(kind, user_id, *content_hashes, version=None):
+    """
+    Derives a job idempotency key from the job kind, the user and the hashes of the documents it
+    processes, so resubmitting the same documents returns the existing job instead of a new one.
+
+    Args:
+        kind (str): Job kind, e.g. 'extract'.
+        user_id (str): Owner of the documents.
+        *content_hashes (str): Content hashes of the input documents (see file_content_hash).
+        version (str, optional): Anything else that changes the result, e.g. the prompt version.
+
+    Returns:
+        str: Hex digest.
+    """
+    parts = [kind, str(user_id), *sorted(content_hashes), str(version or "")]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    """
+    Durable job queue stored in a Mongo collection next to the user documents.
+
+    Workers claim a job atomically and hold a lease on it that they extend while working; a job
+    whose lease expired (its worker died) can be claimed again. Failed attempts are retried with
+    exponential backoff until `max_attempts`, and every job keeps a progress record for polling.
+    """
+
+    def __init__(self, connection_uri="mongodb://localhost:27017",
+                 db_name="Finance_suite", collection_name="Jobs",
+                 retention_seconds=7 * 24 * 3600, backoff_base_seconds=5, backoff_max_seconds=600):
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.collection = get_mongo_client(connection_uri)[db_name][collection_name]
+        try:
+            self.collection.create_indexes([
+                pymongo.IndexModel([("idempotency_key", 1)], name="idempotency_key_unique", unique=True,
+                                   partialFilterExpression={"idempotency_key": {"$type": "string"}}),
+                pymongo.IndexModel([("status", 1), ("available_at", 1)], name="status_available_at"),
+                pymongo.IndexModel([("lease_expires_at", 1)], name="lease_expires_at"),
+                pymongo.IndexModel([("user_id", 1), ("created_at", -1)], name="user_created_at"),
+                pymongo.IndexModel([("finished_at", 1)], name="finished_at_ttl", expireAfterSeconds=retention_seconds),
+            ])
+        except errors.OperationFailure as e:
+            logger.error("❌ Failed to create job queue indexes: %s", e)
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc)
+
+    def enqueue(self, kind, payload, user_id=None, idempotency_key=None, max_attempts=5):
+        """
+        Adds a job, or returns the existing one with the same idempotency key.
+
+        Args:
+            kind (str): Handler name, e.g. 'extract', 'ingest' or 'salary'.
+            payload (dict): Handler input; binary document content may be stored as bytes.
+            user_id (str, optional): Owner of the job.
+            idempotency_key (str, optional): See make_idempotency_key.
+            max_attempts (int): Attempts before the job is marked failed.
+
+        Returns:
+            tuple[str, bool]: (job id, created) - created is False when an existing job was returned.
+
+        Raises:
+            JobPayloadTooLarge: If the encoded payload is larger than JOB_PAYLOAD_MAX_BYTES.
+        """
+        size = len(bson.encode(payload))
+        if size > JOB_PAYLOAD_MAX_BYTES:
+            raise JobPayloadTooLarge(f"Job payload is {size} bytes; the limit is {JOB_PAYLOAD_MAX_BYTES} bytes")
+        now = self._now()
+        job = {
+            "kind": kind,
+            "user_id": user_id,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "available_at": now,
+            "created_at": now,
+            "progress": {"done": 0, "total": None, "message": "queued"},
+        }
+        if idempotency_key:
+            job["idempotency_key"] = idempotency_key
+        try:
+            with span("jobs.enqueue", kind=kind, user_id=user_id):
+                job_id = self.collection.insert_one(job).inserted_id
+            return str(job_id), True
+        except errors.DuplicateKeyError:
+            existing = self.collection.find_one({"idempotency_key": idempotency_key}, {"_id": 1, "status": 1})
+            if existing is None:
+                # The earlier job expired between the insert and the lookup
+                return self.enqueue(kind, payload, user_id, idempotency_key, max_attempts)
+            if existing["status"] == FAILED:
+                # A permanently failed job is resubmitted from scratch
+                self.collection.update_one({"_id": existing["_id"]}, {
+                    "$set": {"status": QUEUED, "attempts": 0, "available_at": now, "payload": payload,
+                             "progress": {"done": 0, "total": None, "message": "queued"}},
+                    "$unset": {"error": "", "finished_at": "", "lease_expires_at": "", "worker": ""},
+                })
+            return str(existing["_id"]), False
+
+    def claim(self, worker_id, kinds=None, lease_seconds=60):
+        """
+        Atomically takes the oldest runnable job: queued and due, or running with an expired lease.
+
+        Returns:
+            dict or None: The claimed job document.
+        """
+        now = self._now()
+        query = {"$or": [
+            {"status": QUEUED, "available_at": {"$lte": now}},
+            {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+        ]}
+        if kinds:
+            query["kind"] = {"$in": list(kinds)}
+        return self.collection.find_one_and_update(
+            query,
+            {"$set": {"status": RUNNING, "worker": worker_id, "started_at": now,
+                      "lease_expires_at": now + timedelta(seconds=lease_seconds)},
+             "$inc": {"attempts": 1}},
+            sort=[("available_at", pymongo.ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _owned(self, job_id, worker_id):
+        return {"_id": ObjectId(job_id), "worker": worker_id, "status": RUNNING}
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=60):
+        """Extend the lease of a job; returns False if the worker no longer owns it"""
+        result = self.collection.update_one(self._owned(job_id, worker_id),
+                                            {"$set": {"lease_expires_at": self._now() + timedelta(seconds=lease_seconds)}})
+        return result.matched_count == 1
+
+    def report_progress(self, job_id, worker_id, done, total=None, message=None):
+        """Record how far a running job got, for clients polling `get`"""
+        self.collection.update_one(self._owned(job_id, worker_id),
+                                   {"$set": {"progress": {"done": done, "total": total, "message": message},
+                                             "progress_at": self._now()}})
+
+    def complete(self, job_id, worker_id, result):
+        """Mark a job succeeded and store its result"""
+        now = self._now()
+        self.collection.update_one(self._owned(job_id, worker_id), {
+            "$set": {"status": SUCCEEDED, "result": result, "finished_at": now, "progress.message": "done"},
+            "$unset": {"lease_expires_at": "", "error": ""},
+        })
+
+    def backoff(self, attempts):
+        """Delay before retry number `attempts`: exponential, randomized between half and full value"""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** max(0, attempts - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def fail(self, job_id, worker_id, error):
+        """
+        Record a failed attempt: the job is queued again after a backoff delay, or marked failed
+        once it used up `max_attempts`.
+
+        Returns:
+            str: The new status.
+        """
+        job = self.collection.find_one(self._owned(job_id, worker_id), {"attempts": 1, "max_attempts": 1})
+        if job is None:
+            return None
+        now = self._now()
+        if job["attempts"] >= job["max_attempts"]:
+            update = {"$set": {"status": FAILED, "error": error, "finished_at": now},
+                      "$unset": {"lease_expires_at": ""}}
+            status = FAILED
+        else:
+            retry_at = now + timedelta(seconds=self.backoff(job["attempts"]))
+            update = {"$set": {"status": QUEUED, "error": error, "available_at": retry_at,
+                               "progress.message": f"retrying after attempt {job['attempts']}"},
+                      "$unset": {"lease_expires_at": ""}}
+            status = QUEUED
+        self.collection.update_one(self._owned(job_id, worker_id), update)
+        return status
+
+    def get(self, job_id):
+        """Return the status, progress, result and error of a job, without its payload"""
+        try:
+            job = self.collection.find_one({"_id": ObjectId(job_id)}, {"payload": 0})
+        except Exception:
+            return None
+        if job is not None:
+            job["id"] = str(job.pop("_id"))
+        return job
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Returns the process-wide job queue (MONGO_URI, JOB_BACKOFF_BASE_SECONDS, JOB_BACKOFF_MAX_SECONDS)"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                connection_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+                backoff_base_seconds=float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "5")),
+                backoff_max_seconds=float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600")),
+            )
+        return _queue
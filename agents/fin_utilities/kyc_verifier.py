@@ -0,0 +1,403 @@
+import re
+import json
+from datetime import date, datetime
+from dataclasses import dataclass, field, asdict
+from difflib import SequenceMatcher
+
+# Verdict of a single comparison and of a whole verification
+MATCH = "match"
+REVIEW = "review"
+MISMATCH = "mismatch"
+NOT_AVAILABLE = "not_available"
+
+# Scores at or above MATCH_THRESHOLD are matches, at or above REVIEW_THRESHOLD need a manual look
+MATCH_THRESHOLD = 0.85
+REVIEW_THRESHOLD = 0.6
+
+HONORIFICS = {"mr", "mrs", "ms", "miss", "dr", "shri", "sri", "smt", "kumari", "km", "late"}
+# Common abbreviations and transliterations of Indian given names
+NAME_ALIASES = {"mohd": "mohammed", "md": "mohammed", "mohammad": "mohammed", "muhammad": "mohammed",
+                "mohamed": "mohammed", "kr": "kumar", "kum": "kumar", "pd": "prasad", "prasadh": "prasad"}
+
+COMPANY_SUFFIXES = {"pvt", "private", "ltd", "limited", "llp", "inc", "co", "company", "corp", "corporation",
+                    "the", "and", "india", "opc"}
+
+# Indian address abbreviations and their expanded forms
+ADDRESS_ABBREVIATIONS = {
+    "rd": "road", "st": "street", "ln": "lane", "apts": "apartments", "apt": "apartments", "appt": "apartments",
+    "bldg": "building", "blk": "block", "flr": "floor", "fl": "floor", "hno": "house", "h": "house",
+    "opp": "opposite", "nr": "near", "ngr": "nagar", "mkt": "market", "sec": "sector", "sect": "sector",
+    "ph": "phase", "dist": "district", "distt": "district", "tq": "taluk", "tal": "taluk", "po": "post",
+    "ps": "police", "vill": "village", "vil": "village", "colny": "colony", "extn": "extension",
+    "ext": "extension", "crs": "cross", "stn": "station",
+}
+# Former and alternate city names
+CITY_ALIASES = {
+    "bangalore": "bengaluru", "bombay": "mumbai", "madras": "chennai", "calcutta": "kolkata",
+    "gurgaon": "gurugram", "poona": "pune", "mysore": "mysuru", "baroda": "vadodara", "trivandrum":
+    "thiruvananthapuram", "cochin": "kochi", "benares": "varanasi", "banaras": "varanasi", "orissa": "odisha",
+    "pondicherry": "puducherry", "allahabad": "prayagraj", "mangalore": "mangaluru", "belgaum": "belagavi",
+}
+# Words that carry no location information
+ADDRESS_STOPWORDS = {"no", "number", "pin", "pincode", "code", "india", "of", "at", "the", "and", "address",
+                     "house", "flat", "door"}
+
+# Wording of the overall verdict per verification kind
+FINAL_VERDICTS = {
+    "kyc": {MATCH: "KYC Successful", REVIEW: "KYC Unsuccessful - manual review required",
+            MISMATCH: "KYC Unsuccessful"},
+    "income": {MATCH: "Verification Successful", REVIEW: "Manual Review Required",
+               MISMATCH: "Verification Unsuccessful"},
+}
+
+PIN_PATTERN = re.compile(r"(?<!\d)([1-9]\d{2})\s?(\d{3})(?!\d)")
+PAN_PATTERN = re.compile(r"^[A-Z]{5}[0-9]{4}[A-Z]$")
+
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%d %m %Y", "%Y-%m-%d", "%Y/%m/%d", "%d-%m-%y", "%d/%m/%y",
+                "%d.%m.%y", "%d %b %Y", "%d-%b-%Y", "%d %B %Y", "%d-%B-%Y", "%d %b %y", "%d-%b-%y", "%b %d %Y",
+                "%B %d %Y", "%d%m%Y")
+
+
+@dataclass
+class FieldCheck:
+    """Outcome of comparing one field across two documents"""
+    check: str
+    sources: tuple
+    values: tuple
+    score: float
+    verdict: str
+    reason: str
+    # A required check without values holds the verification for review instead of being skipped
+    required: bool = True
+
+
+@dataclass
+class VerificationReport:
+    """Every field check of a verification and the overall verdict derived from them"""
+    kind: str
+    checks: list = field(default_factory=list)
+
+    def _counted(self):
+        """Checks that decide the verdict: every required check, and optional ones with values"""
+        return [check for check in self.checks if check.required or check.verdict != NOT_AVAILABLE]
+
+    @property
+    def verdict(self):
+        verdicts = {check.verdict for check in self._counted()}
+        if not verdicts - {NOT_AVAILABLE} or MISMATCH in verdicts:
+            return MISMATCH
+        return REVIEW if verdicts & {REVIEW, NOT_AVAILABLE} else MATCH
+
+    @property
+    def passed(self):
+        return self.verdict == MATCH
+
+    @property
+    def score(self):
+        scores = [check.score for check in self._counted()]
+        return round(min(scores), 3) if scores else 0.0
+
+    @property
+    def final_verdict(self):
+        """Wording of the overall verdict, e.g. 'KYC Successful'"""
+        return FINAL_VERDICTS[self.kind][self.verdict]
+
+    def to_dict(self):
+        return {"kind": self.kind, "verdict": self.verdict, "final_verdict": self.final_verdict,
+                "passed": self.passed, "score": self.score, "checks": [asdict(check) for check in self.checks]}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def to_markdown(self):
+        """Plain markdown rendering, used when no chat model is available to phrase the report"""
+        lines = ["| Check | Documents | Values | Score | Verdict | Reason |", "|---|---|---|---|---|---|"]
+        for check in self.checks:
+            values = " / ".join(str(value) if value else "-" for value in check.values)
+            lines.append(f"| {check.check} | {' vs '.join(check.sources)} | {values} | {check.score:.2f} | "
+                         f"{check.verdict} | {check.reason} |")
+        lines.append(f"\n**Final Verdict: {self.final_verdict}**")
+        return "\n".join(lines)
+
+
+def _verdict(score):
+    if score >= MATCH_THRESHOLD:
+        return MATCH
+    if score >= REVIEW_THRESHOLD:
+        return REVIEW
+    return MISMATCH
+
+
+def _missing(check, sources, values, required=True):
+    return FieldCheck(check, sources, values, 0.0, NOT_AVAILABLE,
+                      f"Value missing in {' and '.join(s for s, v in zip(sources, values) if not v)}", required)
+
+
+# ---------------------------------------------------------------- names
+
+def normalize_name(name):
+    """Lower-case name tokens without honorifics and punctuation ('Mr. R.K. Sharma' -> ['r', 'k', 'sharma'])"""
+    tokens = re.findall(r"[a-z]+", str(name or "").lower().replace(".", " "))
+    return [NAME_ALIASES.get(token, token) for token in tokens if token not in HONORIFICS]
+
+
+def _tokens_compatible(left, right):
+    """Whole tokens must be equal (or nearly so); an initial matches any token with that first letter"""
+    if len(left) == 1 or len(right) == 1:
+        return left[0] == right[0]
+    return left == right or (min(len(left), len(right)) >= 4 and SequenceMatcher(None, left, right).ratio() >= 0.85)
+
+
+def _ordered_subsequence(short, long):
+    """True if every token of `short` matches a distinct token of `long` in the same order"""
+    position = 0
+    for token in short:
+        while position < len(long) and not _tokens_compatible(token, long[position]):
+            position += 1
+        if position == len(long):
+            return False
+        position += 1
+    return True
+
+
+def name_similarity(left, right):
+    """
+    Scores how likely two spellings name the same person.
+
+    Identical names score 1.0, a dropped middle name 0.9 and a different token order 0.9. Initials
+    standing for a name ('R K Sharma' vs 'Rahul Kumar Sharma') score 0.8, which needs a manual
+    review: an initial alone cannot tell 'A Kumar' the person from any other A. Anything else
+    falls back to character similarity.
+
+    Returns:
+        tuple[float, str]: (score, reason)
+    """
+    a, b = normalize_name(left), normalize_name(right)
+    if not a or not b:
+        return 0.0, "Name missing"
+    if a == b:
+        return 1.0, "Names are identical"
+    if sorted(a) == sorted(b):
+        return 0.9, "Same names in a different order"
+    short, long = sorted((a, b), key=len)
+    if _tokens_compatible(short[-1], long[-1]) and _tokens_compatible(short[0], long[0]):
+        if len(short) == len(long) and all(_tokens_compatible(x, y) for x, y in zip(short, long)):
+            initials = any(len(x) == 1 or len(y) == 1 for x, y in zip(short, long) if x != y)
+            if initials:
+                return 0.8, "Names only match through initials"
+            return 0.92, "Names match with minor spelling differences"
+        if _ordered_subsequence(short, long):
+            if any(len(token) == 1 for token in short):
+                return 0.8, "Names only match through initials; one document omits a middle name"
+            return 0.9, "Names match; one document omits a middle name"
+    ratio = SequenceMatcher(None, " ".join(a), " ".join(b)).ratio()
+    # Never let a spelling-level similarity alone reach a clean match
+    return round(min(ratio, MATCH_THRESHOLD - 0.01), 3), "Names differ"
+
+
+def compare_names(check, sources, left, right):
+    if not left or not right:
+        return _missing(check, sources, (left, right))
+    score, reason = name_similarity(left, right)
+    return FieldCheck(check, sources, (left, right), score, _verdict(score), reason)
+
+
+# ---------------------------------------------------------------- dates
+
+def parse_date(value):
+    """
+    Parses a date written in any of the usual Indian formats (day first), e.g. '14/08/1990',
+    '14-Aug-1990', '1990-08-14' or '14.08.90'. A bare year ('1990', as printed on some Aadhaar
+    cards) is returned as an int.
+
+    Returns:
+        date | int | None
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = re.sub(r"\s+", " ", str(value or "").strip().replace(",", " ")).strip()
+    text = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text, flags=re.IGNORECASE)
+    if re.fullmatch(r"(19|20)\d{2}", text):
+        return int(text)
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def compare_dates(check, sources, left, right):
+    if not left or not right:
+        return _missing(check, sources, (left, right))
+    a, b = parse_date(left), parse_date(right)
+    if a is None or b is None:
+        return FieldCheck(check, sources, (left, right), 0.0, REVIEW, "A date could not be parsed")
+    if isinstance(a, int) or isinstance(b, int):
+        year_a, year_b = (x if isinstance(x, int) else x.year for x in (a, b))
+        if year_a == year_b:
+            return FieldCheck(check, sources, (left, right), 0.7, REVIEW, "Only the year of birth is available")
+        return FieldCheck(check, sources, (left, right), 0.0, MISMATCH, "Years of birth differ")
+    if a == b:
+        return FieldCheck(check, sources, (left, right), 1.0, MATCH, f"Both dates are {a.isoformat()}")
+    if a.year == b.year and a.day == b.month and a.month == b.day:
+        return FieldCheck(check, sources, (left, right), 0.6, REVIEW, "Day and month appear swapped")
+    return FieldCheck(check, sources, (left, right), 0.0, MISMATCH, f"{a.isoformat()} vs {b.isoformat()}")
+
+
+# ---------------------------------------------------------------- addresses
+
+def extract_pin(address):
+    """Return the 6-digit PIN code of an address, or None"""
+    match = PIN_PATTERN.search(str(address or ""))
+    return match.group(1) + match.group(2) if match else None
+
+
+def normalize_address(address):
+    """
+    Lower-cases an address, expands abbreviations (Rd, Apts, Ngr, ...), maps former city names
+    to current ones and drops the PIN code and filler words.
+
+    Returns:
+        list[str]: Address tokens.
+    """
+    text = PIN_PATTERN.sub(" ", str(address or "").lower())
+    text = re.sub(r"\.(?=[a-z])", "", text)
+    tokens = []
+    for token in re.findall(r"[a-z]+|\d+[a-z]?", text):
+        token = ADDRESS_ABBREVIATIONS.get(token, token)
+        token = CITY_ALIASES.get(token, token)
+        if token not in ADDRESS_STOPWORDS and (len(token) > 1 or token.isdigit()):
+            tokens.append(token)
+    return tokens
+
+
+def address_similarity(left, right):
+    """
+    Scores how likely two addresses are the same place: the PIN codes must agree, and the share
+    of tokens of the shorter address found in the longer one decides the rest.
+
+    Returns:
+        tuple[float, str]: (score, reason)
+    """
+    pin_a, pin_b = extract_pin(left), extract_pin(right)
+    a, b = normalize_address(left), normalize_address(right)
+    if not a or not b:
+        return 0.0, "Address missing"
+
+    short, long = sorted((a, b), key=len)
+    found = sum(1 for token in short if any(_tokens_compatible(token, other) for other in long))
+    overlap = found / len(short)
+
+    if pin_a and pin_b:
+        if pin_a != pin_b:
+            return round(min(overlap, 0.3), 3), f"PIN codes differ ({pin_a} vs {pin_b})"
+        return round(0.4 + 0.6 * overlap, 3), f"PIN codes match ({pin_a}); {overlap:.0%} of address words agree"
+    return round(overlap * 0.9, 3), f"No PIN code to compare; {overlap:.0%} of address words agree"
+
+
+def compare_addresses(check, sources, left, right):
+    if not left or not right:
+        return _missing(check, sources, (left, right))
+    score, reason = address_similarity(left, right)
+    return FieldCheck(check, sources, (left, right), score, _verdict(score), reason)
+
+
+# ---------------------------------------------------------------- identifiers and employers
+
+def normalize_pan(pan):
+    return re.sub(r"[^A-Z0-9]", "", str(pan or "").upper())
+
+
+def compare_pans(check, sources, left, right):
+    if not left or not right:
+        return _missing(check, sources, (left, right))
+    a, b = normalize_pan(left), normalize_pan(right)
+    if not PAN_PATTERN.match(a) or not PAN_PATTERN.match(b):
+        return FieldCheck(check, sources, (left, right), 0.0, REVIEW, "PAN format is invalid")
+    if a == b:
+        return FieldCheck(check, sources, (left, right), 1.0, MATCH, "PAN numbers are identical")
+    return FieldCheck(check, sources, (left, right), 0.0, MISMATCH, "PAN numbers differ")
+
+
+def normalize_company(name):
+    tokens = re.findall(r"[a-z0-9]+", str(name or "").lower().replace(".", ""))
+    return [token for token in tokens if token not in COMPANY_SUFFIXES]
+
+
+def compare_employers(check, sources, left, right, required=True):
+    if not left or not right:
+        return _missing(check, sources, (left, right), required)
+    a, b = normalize_company(left), normalize_company(right)
+    if a == b:
+        return FieldCheck(check, sources, (left, right), 1.0, MATCH, "Employer names match ignoring legal suffixes")
+    short, long = sorted((a, b), key=len)
+    if short and _ordered_subsequence(short, long):
+        return FieldCheck(check, sources, (left, right), 0.88, MATCH, "One employer name abbreviates the other")
+    score = round(SequenceMatcher(None, " ".join(a), " ".join(b)).ratio(), 3)
+    return FieldCheck(check, sources, (left, right), score, _verdict(score), "Employer names differ")
+
+
+# ---------------------------------------------------------------- verifications
+
+def verify_kyc(pan, aadhar, bankstatement):
+    """
+    Compares name and date of birth between PAN and Aadhaar, and name and address between the
+    bank statement and Aadhaar.
+
+    Args:
+        pan (dict): Extracted PAN card fields.
+        aadhar (dict): Extracted Aadhaar card fields.
+        bankstatement (dict): Extracted bank statement header fields.
+
+    Returns:
+        VerificationReport: Scored checks; `passed` is True only when every check has values on
+            both sides and matches. A missing document or field holds the verification for review.
+    """
+    pan, aadhar, bankstatement = pan or {}, aadhar or {}, bankstatement or {}
+    return VerificationReport("kyc", [
+        compare_names("Name", ("PAN", "Aadhaar"), pan.get("Name"), aadhar.get("Name")),
+        compare_dates("Date of Birth", ("PAN", "Aadhaar"), pan.get("DOB"), aadhar.get("DOB")),
+        compare_names("Name", ("Bank Statement", "Aadhaar"), bankstatement.get("Account_Holder_Name"),
+                      aadhar.get("Name")),
+        compare_addresses("Address", ("Bank Statement", "Aadhaar"), bankstatement.get("Address"),
+                          aadhar.get("Address")),
+    ])
+
+
+def verify_income(pan, itr, form16):
+    """
+    Compares the PAN number across PAN card, ITR and Form 16, the employee name between PAN card
+    and Form 16, and the employer name between ITR and Form 16 when the ITR carries one.
+
+    Returns:
+        VerificationReport: Scored checks; `passed` is True when every check matches. Only the
+            employer check may be skipped, for ITRs without an employer name.
+    """
+    pan, itr, form16 = pan or {}, itr or {}, form16 or {}
+    return VerificationReport("income", [
+        compare_pans("PAN Number", ("PAN", "ITR"), pan.get("PAN_number"), itr.get("PAN_number")),
+        compare_pans("PAN Number", ("PAN", "Form 16"), pan.get("PAN_number"), form16.get("Employee_PAN")),
+        compare_names("Name", ("PAN", "Form 16"), pan.get("Name"), form16.get("Employee_Name")),
+        compare_employers("Employer Name", ("ITR", "Form 16"), itr.get("Employer_Name"), form16.get("Employer_Name"),
+                          required=False),
+    ])
+
+
+def report_prompt(report, documents):
+    """
+    Builds the user message asking the chat model to phrase a report for verdicts that were
+    already decided by this module.
+
+    Args:
+        report (VerificationReport): Result of verify_kyc or verify_income.
+        documents (dict): Extracted fields per document type, shown in the report tables.
+
+    Returns:
+        str: Prompt text.
+    """
+    return (f"Extracted details:\n{json.dumps(documents, indent=2, default=str)}\n\n"
+            f"Comparison results (authoritative, do not change any verdict):\n{report.to_json()}\n\n"
+            f"Final verdict: {report.final_verdict}")
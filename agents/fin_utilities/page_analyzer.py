@@ -0,0 +1,84 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fin_utilities.instrumentation import span, token_usage
+
+# Number of page prompts in flight against the chat model at once
+PAGE_ANALYSIS_MAX_IN_FLIGHT = int(os.getenv("PAGE_ANALYSIS_MAX_IN_FLIGHT", "5"))
+
+SALARY_QUERY = """from the given data, will you find transaction from employer if yes then print date, employer name and transaction amount.
+                Note: if you find more than one transaction then then show all.
+             """
+
+SALARY_PAGE_PROMPT = f"""
+Please analyze the following page content and answer this query: {SALARY_QUERY}
+
+Page Content:
+{{page_content}}
+
+Please provide your analysis based on the above content.
+"""
+
+
+def build_salary_prompt(page_content):
+    """Format the salary-credit query for one bank statement page"""
+    return SALARY_PAGE_PROMPT.format(page_content=page_content)
+
+
+def _analyze_page(llm, prompt):
+    with span("llm.page_analysis", model=getattr(llm, "model_name", None)) as current:
+        response = llm.invoke([{"role": "user", "content": prompt}])
+        current.set(**token_usage(response))
+    return response.content
+
+
+def analyze_pages(llm, page_prompts, max_in_flight=None):
+    """
+    Sends one prompt per page to a chat model concurrently and yields each page's
+    result as soon as it finishes.
+
+    A failing page is reported through its `error` field instead of aborting the run.
+
+    Args:
+        llm (BaseChatModel): Chat model exposing `invoke` (e.g., chat_bank).
+        page_prompts (list[str]): Fully formatted prompt for every page, in page order.
+        max_in_flight (int, optional): Maximum concurrent model calls. Defaults to PAGE_ANALYSIS_MAX_IN_FLIGHT.
+
+    Yields:
+        dict: {"index": position in page_prompts, "response": str or None, "error": str or None}
+    """
+    if not page_prompts:
+        return
+
+    workers = max(1, min(max_in_flight or PAGE_ANALYSIS_MAX_IN_FLIGHT, len(page_prompts)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="page")
+    try:
+        futures = {executor.submit(_analyze_page, llm, prompt): index for index, prompt in enumerate(page_prompts)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield {"index": index, "response": future.result(), "error": None}
+            except Exception as e:
+                yield {"index": index, "response": None, "error": str(e)}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_pages_ordered(llm, page_prompts, max_in_flight=None, on_result=None):
+    """
+    Runs `analyze_pages` to completion and returns the results in page order.
+
+    Args:
+        llm (BaseChatModel): Chat model exposing `invoke`.
+        page_prompts (list[str]): Prompt for every page, in page order.
+        max_in_flight (int, optional): Maximum concurrent model calls.
+        on_result (callable, optional): Called with each result dict as soon as it finishes.
+
+    Returns:
+        list[dict]: One result dict per page, ordered by `index`.
+    """
+    results = [None] * len(page_prompts)
+    for result in analyze_pages(llm, page_prompts, max_in_flight):
+        results[result["index"]] = result
+        if on_result is not None:
+            on_result(result)
+    return results
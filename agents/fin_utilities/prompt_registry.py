@@ -0,0 +1,143 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from dataclasses import dataclass
+import yaml
+from fin_utilities.promptSchema import (kyc_system_prompt, loan_system_prompt, kyc_human, kyc_human1,
+                                        bank_system_message, bank_human, report_system_prompt)
+
+DEFAULT_PROMPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_extraction_prompts.yaml')
+
+# Chat conversations used by the agents, as (role, message) pairs
+CONVERSATIONS = {
+    "kyc_check": [("system", kyc_system_prompt), ("user", kyc_human)],
+    "income_check": [("system", loan_system_prompt), ("user", kyc_human1)],
+    "bank_check": [("system", bank_system_message), ("system", bank_human)],
+    "verification_report": [("system", report_system_prompt)],
+}
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _example_fields(text: str) -> tuple:
+    """Keys of the JSON example at the end of an extraction prompt, or () when it has none"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match is None:
+        return ()
+    try:
+        example = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return ()
+    return tuple(example) if isinstance(example, dict) else ()
+
+
+@dataclass(frozen=True)
+class ExtractionPrompt:
+    """A document extraction prompt together with the hash of its text and the fields it asks for"""
+    tag: str
+    text: str
+    version: str
+    fields: tuple = ()
+
+
+class PromptRegistry:
+    """
+    Loads every extraction prompt from the YAML file once and precompiles the agent
+    conversations. The YAML file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, yaml_path=DEFAULT_PROMPTS_PATH):
+        self.yaml_path = yaml_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._prompts = {}
+        self._version = None
+        self._conversations = {
+            name: tuple({"role": role, "content": message.content} for role, message in messages)
+            for name, messages in CONVERSATIONS.items()
+        }
+        self._conversations_version = _digest("".join(
+            m["content"] for name in sorted(self._conversations) for m in self._conversations[name]
+        ))
+
+    def _load(self):
+        """Parse the YAML file into ExtractionPrompt objects"""
+        try:
+            with open(self.yaml_path, 'r') as file:
+                raw = file.read()
+            prompts = yaml.safe_load(raw)
+        except FileNotFoundError:
+            raise RuntimeError("YAML file not found. Please check the file path.")
+        except yaml.YAMLError as e:
+            raise RuntimeError(f"Error parsing YAML file: {e}") from e
+
+        self._prompts = {tag: ExtractionPrompt(tag, text, _digest(text), _example_fields(text))
+                         for tag, text in prompts.items()}
+        self._version = _digest(raw + self._conversations_version)
+
+    def _refresh(self):
+        """Reload the prompts if the YAML file changed since the last load"""
+        try:
+            mtime = os.stat(self.yaml_path).st_mtime_ns
+        except FileNotFoundError:
+            raise RuntimeError("YAML file not found. Please check the file path.")
+        with self._lock:
+            if mtime != self._mtime:
+                self._load()
+                self._mtime = mtime
+
+    def get(self, tag: str) -> ExtractionPrompt:
+        """
+        Returns the extraction prompt for a document type.
+
+        Args:
+            tag (str): The document type tag (e.g., 'pan', 'aadhar', etc.)
+
+        Returns:
+            ExtractionPrompt: The prompt text and its version hash.
+        """
+        self._refresh()
+        try:
+            return self._prompts[tag]
+        except KeyError:
+            raise RuntimeError(f"Missing key in YAML file: Document type '{tag}' not found in prompts.")
+
+    def tags(self):
+        """Return the document types that have an extraction prompt"""
+        self._refresh()
+        return list(self._prompts)
+
+    @property
+    def version(self) -> str:
+        """Hash over every prompt in the registry, usable as a cache key"""
+        self._refresh()
+        return self._version
+
+    def messages(self, name: str) -> list:
+        """
+        Returns a fresh copy of a precompiled agent conversation.
+
+        Args:
+            name (str): One of the keys of CONVERSATIONS (e.g., 'kyc_check').
+
+        Returns:
+            list[dict]: Messages with 'role' and 'content' keys.
+        """
+        return [dict(message) for message in self._conversations[name]]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Returns the process-wide prompt registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+        return _registry
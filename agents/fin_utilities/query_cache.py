@@ -0,0 +1,191 @@
+import os
+import logging
+import itertools
+import threading
+from cachetools import LRUCache, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Where per-user result generations live: 'local' (this process) or 'mongo' (shared by every
+# process, for deployments where worker.py or other API workers ingest statements)
+RETRIEVAL_CACHE_GENERATIONS = os.getenv("RETRIEVAL_CACHE_GENERATIONS", "local").lower()
+# How long a generation read or bump waits for MongoDB before the cache is bypassed
+RETRIEVAL_CACHE_MONGO_TIMEOUT_MS = int(os.getenv("RETRIEVAL_CACHE_MONGO_TIMEOUT_MS", "500"))
+
+
+class CountingTTLCache:
+    """Thread-safe LRU/TTL cache that counts hits and misses"""
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+            }
+
+
+class _EvictingLRUCache(LRUCache):
+    """LRUCache that calls `on_evict` whenever it drops an entry to make room"""
+
+    def __init__(self, maxsize, on_evict):
+        super().__init__(maxsize=maxsize)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_evict()
+        return item
+
+
+class LocalGenerations:
+    """
+    Per-user result generations of this process only, for deployments where ingestion and
+    queries share a process. At most `maxsize` users are tracked; users never invalidated or
+    evicted read a floor value that moves on every eviction, so forgetting a user can only turn
+    cached results into misses, never bring back stale ones.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self._counter = itertools.count(1)
+        self._floor = 0
+        self._generations = _EvictingLRUCache(maxsize, self._raise_floor)
+        self._lock = threading.Lock()
+
+    def _raise_floor(self):
+        self._floor = next(self._counter)
+
+    def current(self, user_id):
+        with self._lock:
+            return self._generations.get(user_id, self._floor)
+
+    def bump(self, user_id):
+        with self._lock:
+            self._generations[user_id] = next(self._counter)
+
+
+class MongoGenerations:
+    """
+    Per-user result generations in a Mongo collection, shared by every API and worker process,
+    so an ingestion running anywhere invalidates the cached results of all of them. Uses its own
+    client with a short server selection timeout, so an unreachable server only costs a query
+    `timeout_ms` before it runs uncached.
+    """
+
+    def __init__(self, connection_uri="mongodb://localhost:27017", db_name="Finance_suite",
+                 collection_name="RetrievalGenerations", timeout_ms=RETRIEVAL_CACHE_MONGO_TIMEOUT_MS):
+        import pymongo
+
+        client = pymongo.MongoClient(connection_uri, serverSelectionTimeoutMS=timeout_ms,
+                                     connectTimeoutMS=timeout_ms, socketTimeoutMS=timeout_ms)
+        self.collection = client[db_name][collection_name]
+
+    def current(self, user_id):
+        document = self.collection.find_one({"_id": user_id}, {"generation": 1})
+        return document["generation"] if document else 0
+
+    def bump(self, user_id):
+        self.collection.update_one({"_id": user_id}, {"$inc": {"generation": 1}}, upsert=True)
+
+
+def _default_generations():
+    if RETRIEVAL_CACHE_GENERATIONS == "mongo":
+        return MongoGenerations(connection_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    return LocalGenerations(maxsize=int(os.getenv("RETRIEVAL_CACHE_MAX_USERS", "100000")))
+
+
+class RetrievalCache:
+    """
+    In-process cache for `QdrantVectorStore.get_vector_db`: query embeddings keyed by
+    (model, query) and search results keyed by (user, generation, query, top_k).
+
+    The per-user generation comes from RETRIEVAL_CACHE_GENERATIONS: LocalGenerations by default,
+    MongoGenerations when other processes ingest statements. Bumping it through `invalidate_user`
+    once a user's vectors changed makes every cached result of that user unreachable. When the
+    generation cannot be read, results are neither served from nor written to the cache.
+    """
+
+    def __init__(self, maxsize=1024, ttl_seconds=3600, generations=None):
+        self.embeddings = CountingTTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self.results = CountingTTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self._generations = generations
+        self._lock = threading.Lock()
+
+    @property
+    def generations(self):
+        """The generation store, created on first use"""
+        with self._lock:
+            if self._generations is None:
+                self._generations = _default_generations()
+            return self._generations
+
+    def generation(self, user_id):
+        """Current result generation of a user, or None when it cannot be read"""
+        try:
+            return self.generations.current(user_id)
+        except Exception as e:
+            logger.warning("⚠️ Could not read the retrieval cache generation of %s: %s", user_id, e)
+            return None
+
+    def get_embedding(self, model, query):
+        return self.embeddings.get((model, query))
+
+    def put_embedding(self, model, query, embedding):
+        self.embeddings.put((model, query), embedding)
+
+    def get_results(self, user_id, query, top_k, generation):
+        """Results cached for `generation`, read from `generation(user_id)` just before"""
+        if generation is None:
+            return None
+        return self.results.get((user_id, generation, query, top_k))
+
+    def put_results(self, user_id, query, top_k, results, generation):
+        """
+        Store results under the generation read before the search. If the user was invalidated
+        meanwhile, the entry sits under the old generation, which lookups no longer use.
+        """
+        if generation is not None:
+            self.results.put((user_id, generation, query, top_k), results)
+
+    def invalidate_user(self, user_id):
+        """Forget every cached result of a user; call once their vector writes have finished"""
+        try:
+            self.generations.bump(user_id)
+        except Exception as e:
+            logger.error("❌ Could not invalidate the retrieval cache of %s: %s", user_id, e)
+
+    def stats(self):
+        """Return hit-rate metrics for both cache layers"""
+        return {"query_embeddings": self.embeddings.stats(), "results": self.results.stats()}
+
+
+# Shared by every QdrantVectorStore in the process so writes invalidate results everywhere
+retrieval_cache = RetrievalCache(
+    maxsize=int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=int(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "3600")),
+)
@@ -0,0 +1,332 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from fin_utilities.instrumentation import span, token_usage
+
+logger = logging.getLogger(__name__)
+
+# Default quotas per provider: requests per minute, tokens per minute and the ceiling of calls in
+# flight. Each can be overridden with RATE_LIMIT_<PROVIDER>_RPM / _TPM / _CONCURRENCY, e.g.
+# RATE_LIMIT_OPENAI_TPM=800000. An empty or 0 value disables that bucket.
+DEFAULT_LIMITS = {
+    "gemini": {"rpm": 4000, "tpm": 4_000_000, "concurrency": 16},
+    "openai": {"rpm": 5000, "tpm": 800_000, "concurrency": 8},
+    "anthropic": {"rpm": 1000, "tpm": 80_000, "concurrency": 4},
+    "openai_embeddings": {"rpm": 5000, "tpm": 1_000_000, "concurrency": 8},
+}
+FALLBACK_LIMITS = {"rpm": None, "tpm": None, "concurrency": 8}
+
+# Attempts after the first one for throttled (429) or transient (5xx, timeout) failures
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+RATE_LIMIT_BACKOFF_BASE_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_BASE_SECONDS", "1.0"))
+RATE_LIMIT_BACKOFF_MAX_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_MAX_SECONDS", "60"))
+# Calls slower than this (seconds) count as a congestion signal and shrink the concurrency limit
+RATE_LIMIT_LATENCY_TARGET = float(os.getenv("RATE_LIMIT_LATENCY_TARGET", "0") or 0) or None
+
+RATE_LIMIT_PATTERN = re.compile(r"\b429\b|rate.?limit|resource (?:has been )?exhausted|quota exceeded|too many requests",
+                                re.IGNORECASE)
+TRANSIENT_PATTERN = re.compile(r"\b(?:500|502|503|504|529)\b|overloaded|service unavailable|timed? ?out|deadline exceeded",
+                               re.IGNORECASE)
+RETRY_HINT_PATTERN = re.compile(r"retry (?:in|after) ([\d.]+)\s*(ms|s|seconds?)\b", re.IGNORECASE)
+TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504, 529}
+
+
+class RateLimitExceeded(RuntimeError):
+    """The provider kept throttling the call after every retry"""
+
+
+def _status_code(error):
+    for attribute in ("status_code", "code", "http_status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_rate_limited(error):
+    """True for provider throttling errors (HTTP 429 / quota exhausted) from any of the SDKs"""
+    status = _status_code(error)
+    if status is not None:
+        return status == 429
+    return bool(RATE_LIMIT_PATTERN.search(f"{type(error).__name__} {error}"))
+
+
+def is_transient(error):
+    """True for errors worth retrying that are not throttling: 5xx, overload, timeouts, dropped connections"""
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    if any(marker in name for marker in ("Timeout", "Connection", "ServiceUnavailable", "InternalServerError")):
+        return True
+    # LangChain wrappers keep only the message of the SDK error
+    return not is_rate_limited(error) and bool(TRANSIENT_PATTERN.search(str(error)))
+
+
+def retry_after_seconds(error):
+    """
+    Delay requested by the provider, from the Retry-After(-ms) header, a google RetryInfo detail
+    or a "retry in Ns" hint in the message.
+
+    Returns:
+        float or None: Seconds to wait, or None when the error carries no hint.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    match = RETRY_HINT_PATTERN.search(str(error))
+    if match:
+        return float(match.group(1)) / (1000 if match.group(2) == "ms" else 1)
+    return None
+
+
+def estimate_tokens(value):
+    """Rough token count of a prompt (text, chat messages or a list of parts), about 4 characters per token"""
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        return estimate_tokens(content)
+    # Images and uploaded files are billed at a flat rate per item
+    return 258
+
+
+def used_tokens(response):
+    """Input plus output tokens reported in a model response, or None when it carries no usage"""
+    usage = [count for count in token_usage(response).values() if count]
+    return sum(usage) if usage else None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` per second up to `capacity`. Reservations may drive it
+    negative; the caller then waits until the debt is refilled, so requests are served in order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount):
+        """Takes `amount` tokens and returns the seconds to wait before using them"""
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount):
+        """Returns tokens reserved but not used (negative amounts charge extra usage)"""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limiter for one provider.
+
+    Every call takes a request from the RPM bucket and its estimated tokens from the TPM bucket,
+    then waits for a concurrency slot. The concurrency limit follows AIMD: it grows by about one
+    slot per limit-many successful calls and halves on a 429 (or shrinks by 10% on a call slower
+    than `latency_target`). A 429 also pauses every caller for the provider's Retry-After, and
+    throttled or transient failures are retried with exponential backoff.
+    """
+
+    def __init__(self, name, requests_per_minute=None, tokens_per_minute=None, max_concurrency=8,
+                 min_concurrency=1, latency_target=RATE_LIMIT_LATENCY_TARGET, max_retries=RATE_LIMIT_MAX_RETRIES,
+                 backoff_base_seconds=RATE_LIMIT_BACKOFF_BASE_SECONDS, backoff_max_seconds=RATE_LIMIT_BACKOFF_MAX_SECONDS):
+        self.name = name
+        self.request_bucket = TokenBucket(requests_per_minute / 60, max(1, requests_per_minute / 60)) \
+            if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 6) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latency_average = None
+        self.condition = threading.Condition()
+        self.counters = {"calls": 0, "throttled": 0, "retries": 0, "failed": 0, "waited_seconds": 0.0}
+
+    def paused(self):
+        """True while callers wait out a Retry-After"""
+        return time.monotonic() < self.paused_until
+
+    def _acquire(self, tokens):
+        wait_seconds = 0.0
+        if self.request_bucket is not None:
+            wait_seconds = max(wait_seconds, self.request_bucket.reserve(1))
+        if self.token_bucket is not None and tokens:
+            wait_seconds = max(wait_seconds, self.token_bucket.reserve(tokens))
+        started = time.monotonic()
+        if wait_seconds:
+            time.sleep(wait_seconds)
+        with self.condition:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if delay <= 0 and self.in_flight < int(self.limit):
+                    break
+                self.condition.wait(timeout=delay if delay > 0 else None)
+            self.in_flight += 1
+            self.counters["calls"] += 1
+            self.counters["waited_seconds"] += time.monotonic() - started
+
+    def _count(self, counter):
+        with self.condition:
+            self.counters[counter] += 1
+
+    def _release(self, latency=None, throttled=False, retry_after=None):
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.counters["throttled"] += 1
+                # One decrease per round trip: the other 429s of the burst come from calls already in flight
+                if now - self.last_decrease > max(0.05, self.latency_average or 1.0):
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self.last_decrease = now
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            elif latency is not None:
+                self.latency_average = latency if self.latency_average is None \
+                    else 0.8 * self.latency_average + 0.2 * latency
+                if self.latency_target and latency > self.latency_target:
+                    self.limit = max(self.min_concurrency, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt`: exponential, randomized between half and full value"""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** max(0, attempt - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def call(self, operation, tokens=0, measure=None, max_retries=None):
+        """
+        Runs `operation()` within the provider's limits, retrying throttled and transient failures.
+
+        Args:
+            operation (callable): Zero-argument function making the outbound call.
+            tokens (int): Estimated tokens of the call, taken from the TPM bucket.
+            measure (callable, optional): Returns the actual tokens used from the result, to correct the estimate.
+            max_retries (int, optional): Overrides the limiter's retry count, e.g. 0 when the caller can fail over.
+
+        Returns:
+            The result of `operation`.
+
+        Raises:
+            RateLimitExceeded: If the provider still throttled the call after the last retry.
+            Exception: Any other error of `operation`, after the retries for transient errors.
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            attempt += 1
+            self._acquire(tokens)
+            started = time.monotonic()
+            try:
+                result = operation()
+            except Exception as e:
+                throttled = is_rate_limited(e)
+                retry_after = retry_after_seconds(e) if throttled else None
+                self._release(throttled=throttled, retry_after=retry_after)
+                if not (throttled or is_transient(e)) or attempt > retries:
+                    self._count("failed")
+                    if throttled:
+                        raise RateLimitExceeded(f"{self.name} rate limit exceeded after {attempt} attempt(s): {e}") from e
+                    raise
+                delay = retry_after if retry_after is not None else self.backoff(attempt)
+                self._count("retries")
+                logger.warning("⚠️ %s call %s (attempt %s); retrying in %.1fs: %s", self.name,
+                               "throttled" if throttled else "failed", attempt, delay, e)
+                with span("ratelimit.retry", provider=self.name, attempt=attempt, throttled=throttled,
+                          delay_ms=round(delay * 1000, 1)):
+                    time.sleep(delay)
+                continue
+
+            self._release(latency=time.monotonic() - started)
+            if measure is not None and self.token_bucket is not None:
+                try:
+                    used = measure(result)
+                except Exception:
+                    used = None
+                if used:
+                    self.token_bucket.refund(tokens - used)
+            return result
+
+    def stats(self):
+        with self.condition:
+            return dict(self.counters, limit=round(self.limit, 2), in_flight=self.in_flight, paused=self.paused())
+
+
+def _limit_setting(provider, key, default):
+    value = os.getenv(f"RATE_LIMIT_{provider.upper()}_{key.upper()}")
+    if value is None:
+        return default
+    return float(value) if value.strip() else None
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    """
+    Returns the process-wide limiter of a provider ('gemini', 'openai', 'anthropic',
+    'openai_embeddings' or any other name, which gets FALLBACK_LIMITS).
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            defaults = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+            _limiters[provider] = AdaptiveLimiter(
+                provider,
+                requests_per_minute=_limit_setting(provider, "rpm", defaults["rpm"]) or None,
+                tokens_per_minute=_limit_setting(provider, "tpm", defaults["tpm"]) or None,
+                max_concurrency=int(_limit_setting(provider, "concurrency", defaults["concurrency"]) or 1),
+            )
+        return _limiters[provider]
+
+
+def limiter_stats():
+    """Counters and the current concurrency limit of every limiter in use"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
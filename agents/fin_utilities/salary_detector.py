@@ -0,0 +1,163 @@
+import re
+import pandas as pd
+
+# A statement row: transaction date, narration, then two or more money columns (amount(s) and balance)
+ROW_PATTERN = re.compile(
+    r"^\s*(?P<date>\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4}|\d{1,2}[ \-][A-Za-z]{3}[ \-]\d{2,4})\s+"
+    r"(?P<narration>.*?)\s+"
+    r"(?P<amounts>(?:-?[\d,]+\.\d{2}\s*(?:CR|DR|Cr|Dr)?\s*){2,})$"
+)
+AMOUNT_PATTERN = re.compile(r"(-?[\d,]+\.\d{2})\s*(CR|DR|Cr|Dr)?")
+
+CHANNEL_PATTERN = r"\b(?:NEFT|RTGS)\b"
+EXCLUDED_CHANNEL_PATTERN = r"\b(?:IMPS|UPI|ATM|POS)\b"
+SALARY_KEYWORD_PATTERN = r"\b(?:SALARY|SAL|SALARIES|PAYROLL|WAGES|STIPEND)\b"
+
+# Tokens that never name the employer in a NEFT/RTGS narration
+NARRATION_NOISE = {"NEFT", "RTGS", "CR", "DR", "BY", "TO", "FROM", "TRF", "TRANSFER", "INB", "SALARY", "SAL",
+                   "SALARIES", "PAYROLL", "WAGES", "STIPEND", "FOR", "THE", "MONTH", "OF", "AND", "CREDIT", "REF"}
+MONTHS = {"JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "SEPT", "OCT", "NOV", "DEC"}
+IFSC_PATTERN = re.compile(r"^[A-Z]{4}0[A-Z0-9]{6}$")
+
+# Largest relative spread of monthly amounts still considered a stable salary
+MAX_AMOUNT_VARIATION = 0.15
+
+
+def _to_amount(text):
+    return float(text.replace(",", ""))
+
+
+def parse_statement_rows(page_texts):
+    """
+    Parses bank statement page texts into one row per transaction.
+
+    Args:
+        page_texts (list[str]): Extracted text of every statement page, in page order.
+
+    Returns:
+        pd.DataFrame: Columns page, date, narration, amount, balance, marker. `marker` holds an
+            explicit CR/DR suffix when the statement prints one.
+    """
+    records = []
+    for page, text in enumerate(page_texts):
+        for line in text.splitlines():
+            match = ROW_PATTERN.match(line)
+            if not match:
+                continue
+            amounts = AMOUNT_PATTERN.findall(match.group("amounts"))
+            amount, amount_marker = amounts[-2]
+            balance, _ = amounts[-1]
+            records.append({
+                "page": page,
+                "date": match.group("date"),
+                "narration": match.group("narration").strip(),
+                "amount": _to_amount(amount),
+                "balance": _to_amount(balance),
+                "marker": amount_marker.upper(),
+            })
+    return pd.DataFrame(records, columns=["page", "date", "narration", "amount", "balance", "marker"])
+
+
+def _counterparty(narration):
+    """Return the first narration segment that names a party rather than a channel, IFSC, reference or month"""
+    for segment in re.split(r"[/\-:*|]+", narration.upper()):
+        words = [word.strip(".,()") for word in segment.split()]
+        words = [word for word in words
+                 if len(word) >= 2 and word.isalpha() and word not in NARRATION_NOISE
+                 and word not in MONTHS and not IFSC_PATTERN.match(word)]
+        if words:
+            return " ".join(words)
+    return None
+
+
+def classify_transactions(rows):
+    """
+    Flags employer salary credits in parsed statement rows.
+
+    A row is a credit when the running balance grows by its amount (or it carries a CR marker).
+    A credit is treated as salary when it arrives over NEFT/RTGS and either mentions salary in its
+    narration or comes from a counterparty that pays in several months with a stable amount.
+
+    Args:
+        rows (pd.DataFrame): Output of `parse_statement_rows`.
+
+    Returns:
+        pd.DataFrame: `rows` with the added columns is_credit, counterparty, month, score and is_salary.
+    """
+    rows = rows.copy()
+    if rows.empty:
+        for column in ("is_credit", "counterparty", "month", "score", "is_salary"):
+            rows[column] = pd.Series(dtype=object)
+        return rows
+
+    narration = rows["narration"].str.upper()
+    is_bank_transfer = narration.str.contains(CHANNEL_PATTERN, regex=True) & ~narration.str.contains(
+        EXCLUDED_CHANNEL_PATTERN, regex=True)
+    mentions_salary = narration.str.contains(SALARY_KEYWORD_PATTERN, regex=True)
+
+    balance_delta = rows["balance"].diff()
+    tolerance = 0.01
+    rows["is_credit"] = (
+        (rows["marker"] == "CR")
+        | ((rows["marker"] != "DR") & ((balance_delta - rows["amount"]).abs() <= tolerance))
+        # The opening row has no previous balance to compare against
+        | ((rows["marker"] == "") & balance_delta.isna() & mentions_salary)
+    )
+
+    rows["counterparty"] = rows["narration"].map(_counterparty)
+    dates = pd.to_datetime(rows["date"], dayfirst=True, errors="coerce", format="mixed")
+    rows["month"] = dates.dt.to_period("M").astype(str)
+
+    candidates = rows["is_credit"] & is_bank_transfer & rows["counterparty"].notna()
+    grouped = rows[candidates].groupby("counterparty")
+    months_paid = grouped["month"].nunique()
+    variation = (grouped["amount"].std(ddof=0) / grouped["amount"].mean()).fillna(0.0)
+    recurring = rows["counterparty"].map(months_paid).fillna(0) >= 2
+    stable = rows["counterparty"].map(variation).fillna(1.0) <= MAX_AMOUNT_VARIATION
+
+    rows["score"] = (
+        0.3 * rows["is_credit"]
+        + 0.2 * is_bank_transfer
+        + 0.3 * mentions_salary
+        + 0.1 * (candidates & recurring)
+        + 0.1 * (candidates & stable)
+    ).round(2)
+    rows["is_salary"] = candidates & (mentions_salary | (recurring & stable))
+    return rows
+
+
+def detect_salary_credits(page_texts):
+    """
+    Runs the rule-based salary detector over a bank statement.
+
+    Args:
+        page_texts (list[str]): Extracted text of every statement page, in page order.
+
+    Returns:
+        dict: {
+            "salary_credits": [{"page", "date", "employer_name", "credit_amount", "confidence"}],
+            "unclassified_pages": page indexes without any parsable transaction row,
+            "rows_parsed": number of transaction rows recognised
+        }
+    """
+    rows = classify_transactions(parse_statement_rows(page_texts))
+    parsed_pages = set(rows["page"].unique()) if not rows.empty else set()
+    unclassified_pages = [page for page, text in enumerate(page_texts)
+                          if page not in parsed_pages and text.strip()]
+
+    salary_rows = rows[rows["is_salary"].astype(bool)] if not rows.empty else rows
+    salary_credits = [
+        {
+            "page": int(row.page),
+            "date": row.date,
+            "employer_name": row.counterparty,
+            "credit_amount": float(row.amount),
+            "confidence": float(row.score),
+        }
+        for row in salary_rows.itertuples(index=False)
+    ]
+    return {
+        "salary_credits": salary_credits,
+        "unclassified_pages": unclassified_pages,
+        "rows_parsed": int(len(rows)),
+    }
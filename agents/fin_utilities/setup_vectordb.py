@@ -1,144 +1,340 @@
-import os
-import uuid
-import openai
-from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-
-load_dotenv()
-
-class QdrantVectorStore:
-    def __init__(self):
-        self.collection_name = os.getenv("QDRANT_COLLECTION_NAME")
-        self.qdrant_client = self._get_qdrant_client()
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-
-    def _get_qdrant_client(self):
-        """Initialize and maintain Qdrant connection"""
-        try:
-            client = QdrantClient(url=os.getenv("QDRANT_HOST"), api_key=os.getenv("QDRANT_API_KEY"))
-            
-            if not client.collection_exists(self.collection_name):
-                client.recreate_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
-                    shard_number=2
-                )
-            
-            return client
-        except Exception as e:
-            print(f"Error connecting to Qdrant: {str(e)}")
-            return None
-
-    def _generate_embeddings(self, texts):
-        """Generate OpenAI embeddings for given texts"""
-        try:
-            openai.api_key = self.openai_api_key
-            response = openai.embeddings.create(input=texts, model="text-embedding-3-small")
-            return [item.embedding for item in response.data]
-        except Exception as e:
-            print(f"Error generating embeddings: {str(e)}")
-            return []
-
-    def _load_pdf_text(self, pdf_path):
-        """Load and split PDF text into pages"""
-        try:
-            loader = PyPDFLoader(pdf_path)
-            pages = loader.load()
-            return [page.page_content for page in pages]
-        except Exception as e:
-            print(f"Error loading PDF: {str(e)}")
-            return []
-
-    def put_vector_db(self, user_id, pdf_path):
-        """Process a PDF, generate embeddings, and store them in Qdrant, replacing old entries"""
-        try:
-            if self.qdrant_client is None:
-                print("Qdrant client initialization failed.")
-                return
-
-            # Ensure the collection exists
-            if not self.qdrant_client.collection_exists(self.collection_name):
-                print(f"Collection {self.collection_name} does not exist. Creating it...")
-                self.qdrant_client.recreate_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=1536, distance=Distance.COSINE)
-                )
-
-            # Check if user exists and delete old entries
-            user_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
-            existing_vectors = self.qdrant_client.scroll(
-                collection_name=self.collection_name, scroll_filter=user_filter, limit=1
-            )[0]
-
-            if existing_vectors:
-                self.qdrant_client.delete(collection_name=self.collection_name, points_selector=user_filter)
-                print(f"Deleted existing vectors for user: {user_id}")
-
-            # Process new PDF text
-            text_chunks = self._load_pdf_text(pdf_path)
-            if not text_chunks:
-                print(f"No text found in PDF: {pdf_path}")
-                return
-
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=350, chunk_overlap=50)
-            split_docs = text_splitter.create_documents(text_chunks)
-            text_chunks = [doc.page_content for doc in split_docs]
-            print(text_chunks)
-
-            # Generate embeddings
-            embeddings = self._generate_embeddings(text_chunks)
-            if not embeddings or len(embeddings) != len(text_chunks):
-                print("Embedding generation failed. Check OpenAI API or embedding function.")
-                return
-
-            # Insert vectors in batches
-            BATCH_SIZE = 50
-            points = [
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={"user_id": user_id, "text": chunk, "chunk_id": idx}
-                )
-                for idx, (chunk, embedding) in enumerate(zip(text_chunks, embeddings))
-            ]
-
-            for i in range(0, len(points), BATCH_SIZE):
-                batch = points[i:i+BATCH_SIZE]
-                self.qdrant_client.upsert(collection_name=self.collection_name, points=batch)
-                print(f"Inserted {len(batch)} vectors for user: {user_id}")
-
-            print(f"Successfully uploaded {len(points)} vectors for user: {user_id}")
-
-        except Exception as e:
-            print(f"Error processing {pdf_path} for user {user_id}: {str(e)}")
-
-
-    def get_vector_db(self, user_id, query, top_k=12):
-        """Query the vector database and retrieve relevant document chunks"""
-        try:
-            if self.qdrant_client is None:
-                print("Qdrant client initialization failed.")
-                return []
-
-            query_embedding = self._generate_embeddings([query])[0]
-            if not query_embedding:
-                print("Failed to generate query embedding.")
-                return []
-
-            user_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
-
-            results = self.qdrant_client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                query_filter=user_filter,
-                limit=top_k
-            )
-
-            return [result.payload for result in results]
-        
-        except Exception as e:
-            print(f"Error retrieving data for user {user_id}: {str(e)}")
-            return []
+import logging
+import os
+import time
+import uuid
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+from qdrant_client.models import (PointStruct, Filter, FieldCondition, MatchValue,
+                                  IsEmptyCondition, PayloadField, PointIdsList, SetPayload, SetPayloadOperation)
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from fin_utilities.embedding_cache import get_embedding_cache
+from fin_utilities.embeddings import get_embedding_provider
+from fin_utilities.query_cache import retrieval_cache
+from fin_utilities.vector_collection import CollectionConfig, ensure_collection
+from fin_utilities.instrumentation import span
+from fin_utilities.document_store import get_document_store
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Ingestion pipeline limits: embedding request size and number of upserts in flight
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "8000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "256"))
+UPSERT_MAX_IN_FLIGHT = int(os.getenv("UPSERT_MAX_IN_FLIGHT", "2"))
+
+# Namespace for deterministic point IDs derived from (user, document, chunk hash)
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1c3e-3f4a-5b7e-9d43-2a8f0c7d5e11")
+
+class QdrantVectorStore:
+    def __init__(self):
+        self.collection_name = os.getenv("QDRANT_COLLECTION_NAME")
+        self.collection_config = CollectionConfig.from_env()
+        self.qdrant_client = self._get_qdrant_client()
+        self.embedding_provider = get_embedding_provider(self.collection_config.storage_profile.dimensions)
+        # Identifies the vector space in the embedding caches
+        self.embedding_model_id = self.embedding_provider.model_id
+        self.embedding_cache = get_embedding_cache() if self.embedding_provider.cacheable else None
+
+    def _get_qdrant_client(self):
+        """Initialize and maintain Qdrant connection"""
+        try:
+            # QDRANT_HOST may also be ":memory:" to run against an in-process local instance
+            client = QdrantClient(location=os.getenv("QDRANT_HOST"), api_key=os.getenv("QDRANT_API_KEY"))
+            ensure_collection(client, self.collection_name, self.collection_config)
+            return client
+        except Exception as e:
+            logger.error("Error connecting to Qdrant: %s", e)
+            return None
+
+    def _generate_embeddings(self, texts):
+        """Generate embeddings for given texts with the configured provider"""
+        try:
+            return self.embedding_provider.embed(texts)
+        except Exception as e:
+            logger.error("Error generating embeddings: %s", e)
+            return []
+
+    def _embed_chunks(self, texts):
+        """Generate embeddings, reusing cached vectors for chunk texts embedded before"""
+        if self.embedding_cache is None:
+            return self._generate_embeddings(texts)
+
+        with span("embedding_cache.get_many", inputs=len(texts)) as current:
+            cached = self.embedding_cache.get_many(self.embedding_model_id, texts)
+            current.set(hits=len(cached))
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            fresh = self._generate_embeddings(missing)
+            if len(fresh) != len(missing):
+                return []
+            with span("embedding_cache.put_many", inputs=len(missing)):
+                self.embedding_cache.put_many(self.embedding_model_id, missing, fresh)
+            cached.update(zip(missing, fresh))
+        return [cached[text] for text in texts]
+
+    @staticmethod
+    def _chunk_hash(chunk):
+        return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _point_id(user_id, document_id, chunk_hash):
+        """Deterministic point ID, so an unchanged chunk always maps to the same point"""
+        return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{user_id}:{document_id}:{chunk_hash}"))
+
+    def _existing_points(self, user_id, document_id=None):
+        """Map the ID of every point already stored for a user's document, or for the whole user, to its chunk_id"""
+        conditions = [FieldCondition(key="user_id", match=MatchValue(value=user_id))]
+        if document_id is not None:
+            conditions.append(FieldCondition(key="document_id", match=MatchValue(value=document_id)))
+        document_filter = Filter(must=conditions)
+        point_ids, offset = {}, None
+        with span("qdrant.scroll", user_id=user_id, doc_type=document_id) as current:
+            while True:
+                points, offset = self.qdrant_client.scroll(
+                    collection_name=self.collection_name, scroll_filter=document_filter,
+                    limit=1000, offset=offset, with_payload=["chunk_id"], with_vectors=False
+                )
+                point_ids.update((str(point.id), (point.payload or {}).get("chunk_id")) for point in points)
+                if offset is None:
+                    current.set(points=len(point_ids))
+                    return point_ids
+
+    @staticmethod
+    def _read_pdf(pdf_path):
+        """Parsed PDF from the shared document store; `pdf_path` may also be the PDF bytes"""
+        if isinstance(pdf_path, (bytes, bytearray)):
+            content = bytes(pdf_path)
+        else:
+            with open(pdf_path, "rb") as file:
+                content = file.read()
+        return get_document_store().get(content)
+
+    def _load_pdf_text(self, pdf_path):
+        """Load and split PDF text into pages"""
+        try:
+            return list(self._read_pdf(pdf_path).page_texts)
+        except Exception as e:
+            logger.error("Error loading PDF: %s", e)
+            return []
+
+    def _iter_pdf_pages(self, pdf_path):
+        """Yield the text of each PDF page; pages are parsed once per content by the document store"""
+        yield from self._read_pdf(pdf_path).page_texts
+
+    def _iter_chunks(self, pages):
+        """Split each page into chunks as it arrives"""
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=350, chunk_overlap=50)
+        for page_text in pages:
+            yield from text_splitter.split_text(page_text)
+
+    def _iter_embedding_batches(self, chunks):
+        """Group chunks into embedding requests bounded by token count and input count"""
+        batch, batch_tokens = [], 0
+        for chunk in chunks:
+            chunk_tokens = self.embedding_provider.count_tokens(chunk)
+            if batch and (batch_tokens + chunk_tokens > EMBEDDING_BATCH_MAX_TOKENS
+                          or len(batch) >= EMBEDDING_BATCH_MAX_INPUTS):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(chunk)
+            batch_tokens += chunk_tokens
+        if batch:
+            yield batch
+
+    def _upsert_points(self, points, user_id=None, document_id=None):
+        with span("qdrant.upsert", user_id=user_id, doc_type=document_id, points=len(points)):
+            self.qdrant_client.upsert(collection_name=self.collection_name, points=points)
+        return len(points)
+
+    def put_vector_db(self, user_id, pdf_path, document_id="bankstatement", incremental=True):
+        """
+        Process a PDF, generate embeddings, and store them in Qdrant, replacing old entries.
+
+        `pdf_path` is the path of the PDF or its bytes. Page texts come from the shared document
+        store, so a statement already read for salary analysis is not parsed again.
+        Pages are streamed through splitting, token-bounded embedding batches and upserts, and the
+        upsert of one batch overlaps with embedding the next, so memory stays flat for large PDFs.
+
+        Point IDs are derived from the user, document and chunk hash. In incremental mode chunks
+        already stored are skipped and only new chunks are embedded and upserted; otherwise every
+        chunk is embedded again and every other vector of the user is replaced. Either way old
+        points are only deleted once all new points are written, so a failure part-way leaves
+        the previous index searchable.
+
+        Returns:
+            dict: Throughput report (chunks, vectors, skipped, deleted, seconds, chunks_per_s,
+                vectors_per_s), or None on failure.
+        """
+        try:
+            if self.qdrant_client is None:
+                logger.error("Qdrant client initialization failed.")
+                return
+
+            # Ensure the collection exists
+            if not self.qdrant_client.collection_exists(self.collection_name):
+                logger.warning("Collection %s does not exist. Creating it...", self.collection_name)
+                ensure_collection(self.qdrant_client, self.collection_name, self.collection_config)
+
+            user_condition = FieldCondition(key="user_id", match=MatchValue(value=user_id))
+            # Incremental mode diffs this document's points; replace mode every point of the user
+            existing_ids = self._existing_points(user_id, document_id if incremental else None)
+
+            current_ids = set()
+            skipped = 0
+            # Position of each chunk waiting to be embedded within the whole document
+            positions = {}
+            # New position of unchanged chunks that moved within the document
+            moved = {}
+
+            def new_chunks(chunks):
+                """Drop duplicate chunks and, in incremental mode, chunks already stored for this document"""
+                nonlocal skipped
+                for position, chunk in enumerate(chunks):
+                    point_id = self._point_id(user_id, document_id, self._chunk_hash(chunk))
+                    if point_id in current_ids:
+                        continue
+                    current_ids.add(point_id)
+                    if incremental and point_id in existing_ids:
+                        skipped += 1
+                        if existing_ids[point_id] != position:
+                            moved[point_id] = position
+                        continue
+                    positions[point_id] = position
+                    yield chunk
+
+            started = time.perf_counter()
+            chunk_count, vector_count = 0, 0
+            embedding_failed = False
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=UPSERT_MAX_IN_FLIGHT, thread_name_prefix="upsert") as executor:
+                chunks = new_chunks(self._iter_chunks(self._iter_pdf_pages(pdf_path)))
+                for batch in self._iter_embedding_batches(chunks):
+                    # Generate embeddings while the previous batch is still being upserted
+                    embeddings = self._embed_chunks(batch)
+                    if not embeddings or len(embeddings) != len(batch):
+                        logger.error("Embedding generation failed. Check OpenAI API or embedding function.")
+                        embedding_failed = True
+                        break
+
+                    points = []
+                    for chunk, embedding in zip(batch, embeddings):
+                        chunk_hash = self._chunk_hash(chunk)
+                        point_id = self._point_id(user_id, document_id, chunk_hash)
+                        points.append(PointStruct(
+                            id=point_id,
+                            vector=embedding,
+                            payload={"user_id": user_id, "document_id": document_id, "text": chunk,
+                                     "chunk_id": positions.pop(point_id), "chunk_hash": chunk_hash}
+                        ))
+                    chunk_count += len(batch)
+
+                    # Keep at most UPSERT_MAX_IN_FLIGHT batches buffered
+                    if len(pending) >= UPSERT_MAX_IN_FLIGHT:
+                        vector_count += pending.popleft().result()
+                    pending.append(executor.submit(self._upsert_points, points, user_id, document_id))
+
+                while pending:
+                    vector_count += pending.popleft().result()
+
+            if embedding_failed:
+                return
+
+            if not current_ids:
+                logger.info("No text found in PDF for user: %s", user_id)
+                return
+
+            if moved:
+                # Text inserted or removed earlier in the document shifts the chunks after it
+                with span("qdrant.set_payload", user_id=user_id, doc_type=document_id, points=len(moved)):
+                    self.qdrant_client.batch_update_points(
+                        collection_name=self.collection_name,
+                        update_operations=[SetPayloadOperation(set_payload=SetPayload(payload={"chunk_id": position},
+                                                                                      points=[point_id]))
+                                           for point_id, position in moved.items()])
+
+            if incremental:
+                # Vectors written before documents were tracked can't be diffed, so drop them
+                with span("qdrant.delete", user_id=user_id, reason="legacy"):
+                    self.qdrant_client.delete(
+                        collection_name=self.collection_name,
+                        points_selector=Filter(must=[user_condition,
+                                                     IsEmptyCondition(is_empty=PayloadField(key="document_id"))])
+                    )
+
+            # Remove chunks that are no longer part of the document (or, replacing, of the user)
+            vanished_ids = existing_ids.keys() - current_ids
+            if vanished_ids:
+                with span("qdrant.delete", user_id=user_id, doc_type=document_id, reason="vanished",
+                          points=len(vanished_ids)):
+                    self.qdrant_client.delete(collection_name=self.collection_name,
+                                              points_selector=PointIdsList(points=list(vanished_ids)))
+                logger.info("Deleted %d stale vectors for user: %s", len(vanished_ids), user_id)
+
+            elapsed = time.perf_counter() - started
+            report = {
+                "chunks": chunk_count,
+                "vectors": vector_count,
+                "skipped": skipped,
+                "deleted": len(vanished_ids),
+                "seconds": round(elapsed, 3),
+                "chunks_per_s": round(chunk_count / elapsed, 1) if elapsed else None,
+                "vectors_per_s": round(vector_count / elapsed, 1) if elapsed else None,
+            }
+            logger.info("Successfully uploaded %d vectors for user: %s, %d unchanged (%s chunks/s, %s vectors/s)",
+                        vector_count, user_id, skipped, report["chunks_per_s"], report["vectors_per_s"])
+            return report
+
+        except Exception as e:
+            logger.error("Error processing the PDF for user %s: %s", user_id, e)
+        finally:
+            # Once the writes are over (or failed part-way), results cached before or during them are stale
+            retrieval_cache.invalidate_user(user_id)
+
+
+    def get_vector_db(self, user_id, query, top_k=12):
+        """Query the vector database and retrieve relevant document chunks"""
+        try:
+            if self.qdrant_client is None:
+                logger.error("Qdrant client initialization failed.")
+                return []
+
+            generation = retrieval_cache.generation(user_id)
+            cached_results = retrieval_cache.get_results(user_id, query, top_k, generation)
+            if cached_results is not None:
+                return list(cached_results)
+
+            query_embedding = retrieval_cache.get_embedding(self.embedding_model_id, query)
+            if query_embedding is None:
+                query_embedding = (self._generate_embeddings([query]) or [None])[0]
+                if not query_embedding:
+                    logger.error("Failed to generate query embedding.")
+                    return []
+                retrieval_cache.put_embedding(self.embedding_model_id, query, query_embedding)
+
+            user_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+
+            with span("qdrant.search", user_id=user_id, top_k=top_k) as current:
+                results = self.qdrant_client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_embedding,
+                    query_filter=user_filter,
+                    search_params=self.collection_config.storage_profile.search_params(),
+                    limit=top_k
+                )
+                current.set(results=len(results))
+
+            payloads = [result.payload for result in results]
+            retrieval_cache.put_results(user_id, query, top_k, payloads, generation)
+            return list(payloads)
+        
+        except Exception as e:
+            logger.error("Error retrieving data for user %s: %s", user_id, e)
+            return []
+
+    def cache_stats(self):
+        """Hit-rate metrics of the query embedding and retrieval result caches"""
+        return retrieval_cache.stats()
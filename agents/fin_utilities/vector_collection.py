@@ -0,0 +1,209 @@
+import logging
+import os
+from dataclasses import dataclass
+from qdrant_client.models import (Distance, VectorParams, HnswConfigDiff, CollectionParamsDiff, OptimizersConfigDiff,
+                                  KeywordIndexParams, PayloadSchemaType, ScalarQuantization, ScalarQuantizationConfig,
+                                  ScalarType, BinaryQuantization, BinaryQuantizationConfig, SearchParams,
+                                  QuantizationSearchParams, VectorParamsDiff, Disabled)
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() == "true"
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """
+    How statement vectors are stored: embedding dimensions requested from the model, the
+    quantization kept in RAM, and whether the original float32 vectors live on disk. Searches
+    over quantized vectors are rescored against the originals, fetching `oversampling` times
+    more candidates than requested.
+    """
+    name: str
+    dimensions: int
+    quantization: str = None
+    on_disk_vectors: bool = False
+    oversampling: float = 1.0
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99,
+                                                                      always_ram=True))
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def search_params(self):
+        if self.quantization is None:
+            return None
+        return SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=self.oversampling))
+
+
+STORAGE_PROFILES = {
+    # Full text-embedding-3-small vectors in RAM, the original layout
+    "full": StorageProfile("full", dimensions=1536),
+    # 512-dim vectors, int8 copies in RAM, originals on disk
+    "compact": StorageProfile("compact", dimensions=512, quantization="scalar", on_disk_vectors=True,
+                              oversampling=1.5),
+    # 1536-dim vectors, 1-bit copies in RAM, originals on disk
+    "binary": StorageProfile("binary", dimensions=1536, quantization="binary", on_disk_vectors=True,
+                             oversampling=3.0),
+}
+
+
+def get_storage_profile(name=None):
+    """Return the storage profile selected by name or QDRANT_STORAGE_PROFILE (default 'full')"""
+    name = name or os.getenv("QDRANT_STORAGE_PROFILE", "full")
+    try:
+        return STORAGE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown Qdrant storage profile '{name}'. Valid values: {', '.join(STORAGE_PROFILES)}")
+
+
+@dataclass
+class CollectionConfig:
+    """
+    Layout of the Qdrant collection holding every user's statement chunks.
+
+    With `tenant_index` on, `user_id` gets a tenant keyword index and HNSW links are built per
+    tenant (payload_m) instead of one global graph (m=0), which keeps user-filtered search fast
+    as the number of users grows.
+    """
+    storage_profile: StorageProfile = STORAGE_PROFILES["full"]
+    distance: Distance = Distance.COSINE
+    shard_number: int = 2
+    replication_factor: int = 1
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    payload_m: int = 16
+    tenant_index: bool = True
+    on_disk_payload: bool = True
+    indexing_threshold: int = 20000
+    keyword_fields: tuple = ("document_id",)
+
+    @classmethod
+    def from_env(cls):
+        """Build the configuration from QDRANT_* environment variables"""
+        return cls(
+            storage_profile=get_storage_profile(),
+            shard_number=int(os.getenv("QDRANT_SHARD_NUMBER", "2")),
+            replication_factor=int(os.getenv("QDRANT_REPLICATION_FACTOR", "1")),
+            hnsw_m=int(os.getenv("QDRANT_HNSW_M", "16")),
+            hnsw_ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100")),
+            payload_m=int(os.getenv("QDRANT_PAYLOAD_M", "16")),
+            tenant_index=_env_bool("QDRANT_TENANT_INDEX", True),
+            on_disk_payload=_env_bool("QDRANT_ON_DISK_PAYLOAD", True),
+            indexing_threshold=int(os.getenv("QDRANT_INDEXING_THRESHOLD", "20000")),
+        )
+
+    @property
+    def vector_size(self):
+        return self.storage_profile.dimensions
+
+    def hnsw_config(self):
+        if self.tenant_index:
+            return HnswConfigDiff(m=0, payload_m=self.payload_m, ef_construct=self.hnsw_ef_construct)
+        return HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+
+def _ensure_payload_indexes(client, collection_name, config, existing_schema):
+    """Create the keyword payload indexes that are missing"""
+    if "user_id" not in existing_schema:
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name="user_id",
+            field_schema=KeywordIndexParams(type="keyword", is_tenant=config.tenant_index),
+        )
+        logger.info("Created user_id payload index on %s", collection_name)
+    for field_name in config.keyword_fields:
+        if field_name not in existing_schema:
+            client.create_payload_index(collection_name=collection_name, field_name=field_name,
+                                        field_schema=PayloadSchemaType.KEYWORD)
+            logger.info("Created %s payload index on %s", field_name, collection_name)
+
+
+def _default_vector_params(collection_name, vectors):
+    """
+    The parameters of the unnamed vector the store writes to. Collections created with named
+    vectors report a dict of them, where the unnamed vector, if any, is keyed by ''.
+    """
+    if not isinstance(vectors, dict):
+        return vectors
+    if "" not in vectors:
+        raise ValueError(f"Collection {collection_name} only has named vectors ({', '.join(sorted(vectors))}) "
+                         f"but the store writes unnamed vectors; use a new collection name.")
+    return vectors[""]
+
+
+def ensure_collection(client, collection_name, config=None):
+    """
+    Creates the collection with the configured layout, or migrates an existing one in place.
+
+    Existing collections keep their points: missing payload indexes are added and the HNSW,
+    optimizer, replication and on-disk payload settings are updated. The shard count of an
+    existing collection cannot be changed in place and is only reported.
+
+    Args:
+        client (QdrantClient): Connected Qdrant client.
+        collection_name (str): Name of the collection.
+        config (CollectionConfig, optional): Layout to apply. Defaults to CollectionConfig.from_env().
+    """
+    config = config or CollectionConfig.from_env()
+
+    if not client.collection_exists(collection_name):
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(size=config.vector_size, distance=config.distance,
+                                        on_disk=config.storage_profile.on_disk_vectors),
+            shard_number=config.shard_number,
+            replication_factor=config.replication_factor,
+            on_disk_payload=config.on_disk_payload,
+            hnsw_config=config.hnsw_config(),
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=config.indexing_threshold),
+            quantization_config=config.storage_profile.quantization_config(),
+        )
+        logger.info("Created collection %s", collection_name)
+        _ensure_payload_indexes(client, collection_name, config, {})
+        return
+
+    info = client.get_collection(collection_name)
+    _ensure_payload_indexes(client, collection_name, config, info.payload_schema or {})
+
+    params = info.config.params
+    if params.shard_number is not None and params.shard_number != config.shard_number:
+        logger.warning("Collection %s has %s shards; re-create it to use %s.",
+                       collection_name, params.shard_number, config.shard_number)
+    vectors = _default_vector_params(collection_name, params.vectors)
+    if vectors.size != config.vector_size:
+        raise ValueError(f"Collection {collection_name} stores {vectors.size}-dim vectors but storage profile "
+                         f"'{config.storage_profile.name}' needs {config.vector_size}; use a new collection name.")
+
+    hnsw = info.config.hnsw_config
+    wanted_hnsw = config.hnsw_config()
+    up_to_date = (
+        hnsw.m == wanted_hnsw.m
+        and hnsw.ef_construct == wanted_hnsw.ef_construct
+        and hnsw.payload_m == wanted_hnsw.payload_m
+        and params.replication_factor == config.replication_factor
+        and params.on_disk_payload == config.on_disk_payload
+        and info.config.optimizer_config.indexing_threshold == config.indexing_threshold
+        and bool(vectors.on_disk) == config.storage_profile.on_disk_vectors
+        and type(info.config.quantization_config) is type(config.storage_profile.quantization_config())
+    )
+    if up_to_date:
+        return
+
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": VectorParamsDiff(on_disk=config.storage_profile.on_disk_vectors)},
+        quantization_config=config.storage_profile.quantization_config() or Disabled.DISABLED,
+        hnsw_config=wanted_hnsw,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=config.indexing_threshold),
+        collection_params=CollectionParamsDiff(
+            replication_factor=config.replication_factor,
+            on_disk_payload=config.on_disk_payload,
+        ),
+    )
+    logger.info("Migrated collection %s to the configured layout", collection_name)
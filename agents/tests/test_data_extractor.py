@@ -0,0 +1,20 @@
+import pytest
+from fin_utilities.data_extractor import validate_extraction
+from fin_utilities.prompt_registry import get_prompt_registry
+
+
+def test_complete_answer_is_valid():
+    answer = dict.fromkeys(get_prompt_registry().get("pan").fields)
+    assert validate_extraction(answer, "pan") is answer
+
+
+def test_answer_missing_a_field_is_rejected():
+    answer = dict.fromkeys(get_prompt_registry().get("pan").fields)
+    del answer["DOB"]
+    with pytest.raises(ValueError, match="DOB"):
+        validate_extraction(answer, "pan")
+
+
+def test_non_object_answer_is_rejected():
+    with pytest.raises(ValueError):
+        validate_extraction(["PAN_number"], "pan")
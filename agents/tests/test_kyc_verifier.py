@@ -0,0 +1,55 @@
+from fin_utilities.kyc_verifier import MATCH, REVIEW, MISMATCH, NOT_AVAILABLE, name_similarity, verify_kyc, verify_income
+
+PAN = {"PAN_number": "ABCDE1234F", "Name": "RAHUL KUMAR SHARMA", "DOB": "14/08/1990"}
+AADHAR = {"Name": "Rahul Kumar Sharma", "DOB": "14-08-1990",
+          "Address": "Flat No. 12, Green Avenue Apts, MG Road, Bengaluru, Karnataka, PIN: 560001"}
+BANKSTATEMENT = {"Account_Holder_Name": "RAHUL KUMAR SHARMA",
+                 "Address": "Flat 12 Green Avenue Apartments, M.G. Rd, Bangalore 560001"}
+FORM16 = {"Employee_PAN": "ABCDE1234F", "Employee_Name": "Rahul Kumar Sharma", "Employer_Name": "ACME TECHNOLOGIES"}
+
+
+def test_complete_documents_pass():
+    report = verify_kyc(PAN, AADHAR, BANKSTATEMENT)
+    assert report.verdict == MATCH
+    assert report.passed
+
+
+def test_missing_document_is_not_a_pass():
+    report = verify_kyc(PAN, AADHAR, None)
+    assert report.verdict == REVIEW
+    assert not report.passed
+    assert report.score == 0.0
+
+
+def test_missing_fields_are_not_a_pass():
+    report = verify_kyc({"Name": "Rahul Sharma"}, {"Name": "Rahul Sharma"}, {})
+    assert report.verdict == REVIEW
+    assert not report.passed
+    assert [check.verdict for check in report.checks].count(NOT_AVAILABLE) == 3
+
+
+def test_missing_field_does_not_hide_a_mismatch():
+    report = verify_kyc(PAN, dict(AADHAR, DOB="01-01-1970"), None)
+    assert report.verdict == MISMATCH
+
+
+def test_no_values_at_all_is_a_mismatch():
+    assert verify_kyc(None, None, None).verdict == MISMATCH
+
+
+def test_initials_need_review():
+    score, _ = name_similarity("A Kumar", "Amit Kumar")
+    assert REVIEW == verify_kyc(dict(PAN, Name="A Kumar"), dict(AADHAR, Name="Amit Kumar"),
+                                dict(BANKSTATEMENT, Account_Holder_Name="Amit Kumar")).verdict
+    assert score < 0.85
+    assert name_similarity("R K Sharma", "Rahul Kumar Sharma")[0] < 0.85
+
+
+def test_income_without_itr_employer_passes():
+    report = verify_income(PAN, {"PAN_number": "ABCDE1234F"}, FORM16)
+    assert report.passed
+
+
+def test_income_without_form16_is_not_a_pass():
+    report = verify_income(PAN, {"PAN_number": "ABCDE1234F"}, None)
+    assert report.verdict == REVIEW
@@ -0,0 +1,19 @@
+from fin_agents.verification_agent import verdict_passed
+
+
+def test_prefetch_passes_only_on_the_success_verdict():
+    assert verdict_passed("kyc_check", {"mode": "prefetch", "output": "", "final_verdict": "KYC Successful"})
+    assert not verdict_passed("kyc_check", {"mode": "prefetch", "output": "KYC Successful",
+                                            "final_verdict": "KYC Unsuccessful - manual review required"})
+    assert verdict_passed("income_check", {"mode": "prefetch", "output": "",
+                                           "final_verdict": "**Verification Successful.**"})
+
+
+def test_prefetch_without_a_verdict_is_unknown():
+    assert verdict_passed("kyc_check", {"mode": "prefetch", "output": "KYC Successful", "final_verdict": None}) is None
+
+
+def test_agent_mode_reads_the_report_text():
+    assert verdict_passed("kyc_check", {"mode": "agent", "output": "Final Verdict: KYC Successful",
+                                        "final_verdict": None})
+    assert verdict_passed("income_check", {"mode": "agent", "output": "Verified.", "final_verdict": None}) is None
@@ -0,0 +1,141 @@
+"""
+Worker entry point for the Mongo-backed job queue (extraction, vector ingestion, salary analysis).
+
+Each process runs `--threads` workers that claim jobs, keep their lease alive while working,
+record progress and retry failures with backoff. Start more processes, or more nodes pointing at
+the same MONGO_URI, to raise throughput.
+
+Run from the agents directory:
+    python worker.py --processes 2 --threads 4
+    python worker.py --kinds salary ingest
+"""
+import os
+import time
+import uuid
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from fin_utilities.instrumentation import span
+from fin_utilities.job_handlers import JOB_HANDLERS
+from fin_utilities.job_queue import get_job_queue, FAILED
+
+logger = logging.getLogger("worker")
+
+# Lease held on a claimed job; the worker renews it every third of this interval
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Wait between polls when the queue is empty
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+
+
+class Worker:
+    """Claims and runs jobs until stopped"""
+
+    def __init__(self, queue, handlers=None, kinds=None, name=None, lease_seconds=JOB_LEASE_SECONDS,
+                 poll_seconds=JOB_POLL_SECONDS):
+        self.queue = queue
+        self.handlers = handlers or JOB_HANDLERS
+        self.kinds = kinds or list(self.handlers)
+        # Unique per Worker: run_process builds all of a process's workers on one thread
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.stopped = threading.Event()
+
+    def _keep_lease(self, job_id, done):
+        """Renew the lease until the job finishes or the worker lost it"""
+        while not done.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job_id, self.name, self.lease_seconds):
+                logger.warning("⚠️ Lost the lease on job %s", job_id)
+                return
+
+    def run_one(self):
+        """
+        Claim and run a single job.
+
+        Returns:
+            bool: False when no job was available.
+        """
+        job = self.queue.claim(self.name, self.kinds, self.lease_seconds)
+        if job is None:
+            return False
+        job_id = str(job["_id"])
+
+        if job["attempts"] > job["max_attempts"]:
+            # Its earlier workers died holding the lease
+            self.queue.fail(job_id, self.name, job.get("error") or "Worker lost the job too many times")
+            return True
+
+        def progress(done, total=None, message=None):
+            self.queue.report_progress(job_id, self.name, done, total, message)
+
+        done = threading.Event()
+        threading.Thread(target=self._keep_lease, args=(job_id, done), daemon=True).start()
+        try:
+            with span("jobs.run", kind=job["kind"], user_id=job.get("user_id"), attempt=job["attempts"]):
+                result = self.handlers[job["kind"]](job["payload"], progress)
+            self.queue.complete(job_id, self.name, result)
+            logger.info("✅ Job %s (%s) succeeded.", job_id, job["kind"])
+        except Exception as e:
+            status = self.queue.fail(job_id, self.name, f"{type(e).__name__}: {e}")
+            log = logger.error if status == FAILED else logger.warning
+            log("❌ Job %s (%s) attempt %s failed (%s): %s", job_id, job["kind"], job["attempts"], status, e)
+        finally:
+            done.set()
+        return True
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                if not self.run_one():
+                    self.stopped.wait(self.poll_seconds)
+            except Exception as e:
+                logger.error("❌ Worker %s could not poll the queue: %s", self.name, e)
+                self.stopped.wait(self.poll_seconds)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def run_process(threads, kinds):
+    """Run `threads` workers in this process until interrupted"""
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    queue = get_job_queue()
+    workers = [Worker(queue, kinds=kinds) for _ in range(threads)]
+    pool = [threading.Thread(target=worker.run, name=f"worker-{index}", daemon=True)
+            for index, worker in enumerate(workers)]
+    for thread in pool:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in pool):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=int(os.getenv("JOB_WORKER_THREADS", "4")))
+    parser.add_argument("--kinds", nargs="+", choices=list(JOB_HANDLERS), help="Only run these job kinds")
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        run_process(args.threads, args.kinds)
+        return
+    processes = [multiprocessing.Process(target=run_process, args=(args.threads, args.kinds))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()